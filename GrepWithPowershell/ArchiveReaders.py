@@ -0,0 +1,131 @@
+import io
+import os
+import bz2
+import gzip
+import lzma
+import tarfile
+import zipfile
+
+# Shown between an archive and the path of a member: logs.zip!/2024/app.log
+MEMBER_SEPARATOR = "!/"
+
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tbz", ".tar.xz", ".txz")
+ZIP_SUFFIXES = (".zip",)
+# Single compressed files: the member is the file name without the suffix
+STREAM_OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open, ".lzma": lzma.open}
+COMPRESSED_SUFFIXES = tuple(STREAM_OPENERS)
+
+# Archives inside archives are opened up to this depth
+MAX_NESTING = 3
+
+# Nested documents (PDF, DOCX, XLSX) and nested zips need random access,
+# so they are read into memory, up to this size
+MAX_MEMBER_IN_MEMORY = 64 * 1024 * 1024
+
+def archive_kind(name):
+    """'tar', 'zip' or 'stream' (.gz, .bz2, .xz) for archive names, else None."""
+    lower_name = name.lower()
+    if lower_name.endswith(TAR_SUFFIXES):
+        return "tar"
+    if lower_name.endswith(ZIP_SUFFIXES):
+        return "zip"
+    if lower_name.endswith(COMPRESSED_SUFFIXES):
+        return "stream"
+    return None
+
+def is_archive(name):
+    return archive_kind(name) is not None
+
+def strip_compression(name):
+    """'app.log.gz' -> 'app.log'; other names are returned unchanged."""
+    root, ext = os.path.splitext(name)
+    return root if ext.lower() in STREAM_OPENERS else name
+
+# ------------------------------
+# In-memory members
+# ------------------------------
+class ArchiveMember(io.BytesIO):
+    """
+    An archive member read into memory, for readers that need to seek.
+    Formats as its display path (archive.zip!/inner.pdf) in messages.
+    """
+
+    def __init__(self, data, path):
+        super().__init__(data)
+        self.path = path
+
+    def __str__(self):
+        return self.path
+
+    def __format__(self, spec):
+        return format(self.path, spec)
+
+def read_member(stream, path, limit=MAX_MEMBER_IN_MEMORY):
+    """Read a member stream into an ArchiveMember; ValueError past limit bytes."""
+    data = stream.read(limit + 1)
+    if len(data) > limit:
+        raise ValueError(f"member bigger than {limit // (1024 * 1024)} MB, skipped")
+    return ArchiveMember(data, path)
+
+# ------------------------------
+# Streaming member iteration
+# ------------------------------
+def _open_members(source, name, path):
+    """
+    Yield (inner_name, stream) for the regular members of one archive level.
+    source is a file path or a binary stream; each stream is only valid
+    until the next member is requested. Tar archives (compressed or not)
+    are read strictly sequentially.
+    """
+    kind = archive_kind(name)
+    if kind == "zip":
+        if not isinstance(source, str) and not source.seekable():
+            source = read_member(source, path)
+        with zipfile.ZipFile(source) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                with zf.open(info) as stream:
+                    yield info.filename, stream
+    elif kind == "tar":
+        if isinstance(source, str):
+            tf = tarfile.open(source, mode="r|*")
+        else:
+            tf = tarfile.open(fileobj=source, mode="r|*")
+        with tf:
+            for info in tf:
+                if not info.isfile():
+                    continue
+                stream = tf.extractfile(info)
+                yield info.name, stream
+    elif kind == "stream":
+        suffix = os.path.splitext(name)[1].lower()
+        with STREAM_OPENERS[suffix](source, "rb") as stream:
+            yield strip_compression(os.path.basename(name)), stream
+
+def iter_archive(file_path, on_error=None):
+    """
+    Yield (member_path, inner_name, stream) for every file inside an archive,
+    one at a time and without extracting anything to disk. Archives nested
+    in archives are opened in turn (up to MAX_NESTING levels), so a member
+    path can look like 'logs.zip!/2024.tar.gz!/app.log'.
+
+    A nested archive that cannot be read (corrupt, too big to open in
+    memory) is passed to on_error(member_path, error) and skipped; the
+    other members are still yielded. Without on_error the error is raised.
+    Errors of the outer archive itself are always raised.
+    """
+    yield from _iter_level(file_path, file_path, file_path, 0, on_error)
+
+def _iter_level(source, name, path, depth, on_error=None):
+    for inner_name, stream in _open_members(source, name, path):
+        member_path = f"{path}{MEMBER_SEPARATOR}{inner_name}"
+        if depth + 1 < MAX_NESTING and is_archive(inner_name):
+            try:
+                yield from _iter_level(stream, inner_name, member_path, depth + 1, on_error)
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(member_path, e)
+        else:
+            yield member_path, inner_name, stream
@@ -0,0 +1,232 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import statistics
+import subprocess
+import multiprocessing
+from datetime import datetime
+
+from .CorpusGenerator import NEEDLE, generate_corpus
+
+# ------------------------------
+# Benchmark matrix
+# ------------------------------
+FILE_TYPES = ("text", "logs", "pdf", "docx", "xlsx")
+
+# iter_search() keyword arguments per option set; "search_text" overrides the needle
+OPTION_SETS = {
+    "default": {},
+    "single-process": {"workers": 1},
+    "case-sensitive": {"case_sensitive": True},
+    "whole-word": {"whole_word": True},
+    "multi-term": {"search_text": [NEEDLE, "ERROR", "qui"]},
+    "regex": {"search_text": r"need\w+|ERR[A-Z]+", "regex": True},
+    "no-context": {"lines_before": 0, "lines_after": 0},
+    "files-only": {"files_with_matches_only": True},
+}
+
+# Text cache states: "cold" starts from an empty cache, "warm" after one unmeasured run.
+# Plain text files never go through the cache, so they only run cold.
+CACHE_MODES = ("cold", "warm")
+CACHED_TYPES = ("pdf", "docx", "xlsx")
+
+def benchmark_cases(types=None, options=None, cache_modes=None):
+    """Return the (file_type, option_name, cache_mode) combinations to run."""
+    cases = []
+    for file_type in types or FILE_TYPES:
+        for option_name in options or OPTION_SETS:
+            for cache_mode in cache_modes or CACHE_MODES:
+                if cache_mode == "warm" and file_type not in CACHED_TYPES:
+                    continue
+                cases.append((file_type, option_name, cache_mode))
+    return cases
+
+# ------------------------------
+# Measurements (run in a fresh process per case)
+# ------------------------------
+def _peak_rss_mb():
+    """
+    Returns (main process, largest worker) peak resident set size in MB.
+    Uses resource on Linux/macOS and psutil (if installed) on Windows,
+    where the worker peak is not available. None where unknown.
+    """
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        unit = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is in bytes on macOS, KB elsewhere
+        main = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+        workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit
+        return round(main / 2 ** 20, 1), round(workers / 2 ** 20, 1) if workers else None
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / 2 ** 20, 1), None
+    except ImportError:
+        return None, None
+
+def _run_case(conn, folder, search_text, kwargs, cache_dir):
+    """Child process body: one timed iter_search() over folder, metrics sent back through conn."""
+    # Text cache (and index) location, inherited by the search workers
+    os.environ["LOCALAPPDATA"] = cache_dir
+    try:
+        from SearchHelper import iter_search, SearchSummary
+        start = time.perf_counter()
+        first_result = None
+        summary = None
+        for item in iter_search(folder, search_text, **kwargs):
+            if isinstance(item, SearchSummary):
+                summary = item
+                break
+            if first_result is None:
+                first_result = time.perf_counter() - start
+        seconds = time.perf_counter() - start
+        peak_rss, worker_peak_rss = _peak_rss_mb()
+        conn.send({
+            "seconds": round(seconds, 4),
+            "first_result_s": round(first_result, 4) if first_result is not None else None,
+            "files": summary.total_files,
+            "files_with_matches": summary.files_with_matches,
+            "matches": summary.total_matches,
+            "peak_rss_mb": peak_rss,
+            "worker_peak_rss_mb": worker_peak_rss,
+        })
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+def _measure(folder, search_text, kwargs, cache_dir):
+    """Run one search in a fresh spawned process, so peak RSS and imports belong to this run only."""
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_run_case, args=(child_conn, folder, search_text, kwargs, cache_dir))
+    process.start()
+    child_conn.close()
+    try:
+        result = parent_conn.recv()
+    except EOFError:
+        result = {"error": f"benchmark process exited with code {process.exitcode}"}
+    process.join()
+    return result
+
+# ------------------------------
+# Runner
+# ------------------------------
+def _git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=False)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+def run_benchmarks(root, scale=1.0, seed=0, types=None, options=None, cache_modes=None, repeat=3, output=None):
+    """
+    Generate (or reuse) the corpus under root, run every benchmark case
+    repeat times and return the results. With output, they are also saved
+    as JSON for compare_results().
+
+    Each case reports the median over its runs of: seconds, files/s, MB/s,
+    time to first result and peak RSS (main process and largest worker).
+    """
+    types = list(types or FILE_TYPES)
+    manifest = generate_corpus(root, scale, seed, types)
+    results = {
+        "meta": {
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "corpus": manifest,
+        },
+        "cases": [],
+    }
+
+    for file_type, option_name, cache_mode in benchmark_cases(types, options, cache_modes):
+        name = f"{file_type}/{option_name}/{cache_mode}"
+        kwargs = dict(OPTION_SETS[option_name])
+        search_text = kwargs.pop("search_text", NEEDLE)
+        folder = os.path.join(root, manifest["types"][file_type]["folder"])
+        corpus_bytes = manifest["types"][file_type]["bytes"]
+
+        runs = []
+        for _ in range(repeat):
+            cache_dir = tempfile.mkdtemp(prefix="grep-bench-")
+            try:
+                if cache_mode == "warm":
+                    _measure(folder, search_text, kwargs, cache_dir)
+                runs.append(_measure(folder, search_text, kwargs, cache_dir))
+            finally:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+
+        case = {"name": name, "file_type": file_type, "options": option_name, "cache": cache_mode,
+                "search_text": search_text, "kwargs": kwargs, "runs": runs}
+        errors = [run["error"] for run in runs if "error" in run]
+        if errors:
+            case["error"] = errors[0]
+            print(f"{name:<32} FAILED: {errors[0]}")
+        else:
+            seconds = statistics.median(run["seconds"] for run in runs)
+            first_results = [run["first_result_s"] for run in runs if run["first_result_s"] is not None]
+            peaks = [run["peak_rss_mb"] for run in runs if run["peak_rss_mb"] is not None]
+            worker_peaks = [run["worker_peak_rss_mb"] for run in runs if run["worker_peak_rss_mb"] is not None]
+            case.update({
+                "seconds": seconds,
+                "files_per_s": round(runs[0]["files"] / seconds, 1) if seconds else None,
+                "mb_per_s": round(corpus_bytes / 2 ** 20 / seconds, 2) if seconds else None,
+                "first_result_s": statistics.median(first_results) if first_results else None,
+                "peak_rss_mb": max(peaks) if peaks else None,
+                "worker_peak_rss_mb": max(worker_peaks) if worker_peaks else None,
+                "matches": runs[0]["matches"],
+            })
+            print(f"{name:<32} {seconds:8.3f}s {case['files_per_s'] or 0:10.1f} files/s "
+                  f"{case['mb_per_s'] or 0:8.2f} MB/s  first {case['first_result_s'] or 0:.3f}s  "
+                  f"rss {case['peak_rss_mb']} MB  matches {case['matches']}")
+        results["cases"].append(case)
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {output}")
+    return results
+
+# ------------------------------
+# Comparing two runs
+# ------------------------------
+def _load(results):
+    if isinstance(results, str):
+        with open(results, encoding="utf-8") as f:
+            return json.load(f)
+    return results
+
+def compare_results(baseline, current, threshold=0.10):
+    """
+    Print the cases of two result sets (dicts or JSON paths) side by side.
+    Cases more than threshold slower than the baseline are flagged.
+    Returns the names of the regressed cases.
+    """
+    baseline, current = _load(baseline), _load(current)
+    base_cases = {case["name"]: case for case in baseline["cases"] if "seconds" in case}
+    regressions = []
+    print(f"{'case':<32} {'base s':>9} {'new s':>9} {'speedup':>8}")
+    for case in current["cases"]:
+        base = base_cases.get(case["name"])
+        if base is None or "seconds" not in case:
+            continue
+        speedup = base["seconds"] / case["seconds"] if case["seconds"] else float("inf")
+        flag = ""
+        if case["seconds"] > base["seconds"] * (1 + threshold):
+            flag = "  SLOWER"
+            regressions.append(case["name"])
+        if base.get("matches") != case.get("matches"):
+            flag += f"  matches {base.get('matches')} -> {case.get('matches')}"
+        print(f"{case['name']:<32} {base['seconds']:9.3f} {case['seconds']:9.3f} {speedup:7.2f}x{flag}")
+    return regressions
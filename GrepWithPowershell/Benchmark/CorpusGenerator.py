@@ -0,0 +1,204 @@
+import os
+import json
+import random
+import shutil
+import zipfile
+
+# Word planted in every corpus at a known rate, so each file type has hits
+NEEDLE = "needle"
+MANIFEST = "manifest.json"
+
+# Corpus at scale=1.0; the scale multiplies the file counts (and the length of the logs)
+CORPUS_SHAPE = {
+    "text": {"files": 2000, "lines": 80},
+    "logs": {"files": 2, "lines": 400000},
+    "pdf": {"files": 20, "pages": 40, "lines": 45},
+    "docx": {"files": 60, "paragraphs": 300, "table_rows": 40},
+    "xlsx": {"files": 8, "rows": 1500, "columns": 60},
+}
+
+# ------------------------------
+# Reproducible text
+# ------------------------------
+class TextSource:
+    """
+    Pseudo-random words and sentences from a fixed seed: the same seed and
+    scale always give the same corpus content.
+    """
+
+    def __init__(self, seed=0, needle_rate=0.002):
+        self.rng = random.Random(seed)
+        syllables = ["ka", "lo", "mer", "ti", "sun", "dra", "pe", "vo", "rin", "ash", "tul", "ne", "qui", "bor"]
+        self.words = sorted({"".join(self.rng.choice(syllables) for _ in range(self.rng.randint(1, 4)))
+                             for _ in range(3000)})
+        self.needle_rate = needle_rate
+
+    def word(self):
+        if self.rng.random() < self.needle_rate:
+            return NEEDLE
+        return self.rng.choice(self.words)
+
+    def sentence(self, min_words=4, max_words=14):
+        words = [self.word() for _ in range(self.rng.randint(min_words, max_words))]
+        return " ".join(words).capitalize() + "."
+
+    def log_line(self, line_no):
+        level = self.rng.choices(("INFO", "DEBUG", "WARN", "ERROR"), (70, 20, 8, 2))[0]
+        return f"2024-01-01T{line_no // 3600 % 24:02d}:{line_no // 60 % 60:02d}:{line_no % 60:02d} {level} " \
+               f"[worker-{self.rng.randint(1, 16)}] {self.sentence(3, 10)}"
+
+# ------------------------------
+# Writers, one per file type
+# ------------------------------
+def write_text(path, source, lines):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for _ in range(lines):
+            f.write(source.sentence() + "\n")
+
+def write_log(path, source, lines):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for line_no in range(lines):
+            f.write(source.log_line(line_no) + "\n")
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path, source, pages, lines):
+    """Minimal PDF writer (one Helvetica text stream per page), so no PDF library is needed."""
+    objects = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    pages_id = 2 + 2 * pages
+    page_ids = []
+    for _ in range(pages):
+        text = " ".join(f"({_pdf_escape(source.sentence())}) Tj T*" for _ in range(lines))
+        stream = f"BT /F1 10 Tf 40 760 Td 14 TL {text} ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 1 0 R >> >> >>" % (pages_id, len(objects)))
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects.append(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages))
+    objects.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, len(objects), xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>')
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/></Relationships>')
+
+def _docx_paragraph(text):
+    return f'<w:p><w:r><w:t xml:space="preserve">{text}</w:t></w:r></w:p>'
+
+def write_docx(path, source, paragraphs, table_rows):
+    """Minimal DOCX (document.xml only) with body paragraphs and one 4-column table in the middle."""
+    body = [_docx_paragraph(source.sentence()) for _ in range(paragraphs // 2)]
+    rows = []
+    for _ in range(table_rows):
+        cells = "".join(f"<w:tc>{_docx_paragraph(source.sentence(1, 4))}</w:tc>" for _ in range(4))
+        rows.append(f"<w:tr>{cells}</w:tr>")
+    body.append(f"<w:tbl>{''.join(rows)}</w:tbl>")
+    body += [_docx_paragraph(source.sentence()) for _ in range(paragraphs - paragraphs // 2)]
+    document = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                f'<w:body>{"".join(body)}</w:body></w:document>')
+    # Fixed timestamps keep the archive bytes reproducible too
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in (("[Content_Types].xml", _DOCX_CONTENT_TYPES), ("_rels/.rels", _DOCX_RELS),
+                           ("word/document.xml", document)):
+            zf.writestr(zipfile.ZipInfo(name, (2024, 1, 1, 0, 0, 0)), data, zipfile.ZIP_DEFLATED)
+
+def write_xlsx(path, source, rows, columns):
+    """Wide sheet of mixed text and number cells, written in openpyxl write-only mode."""
+    import openpyxl
+    wb = openpyxl.Workbook(write_only=True)
+    sheet = wb.create_sheet("Data")
+    for row in range(rows):
+        sheet.append([source.word() if column % 3 else row * columns + column for column in range(columns)])
+    wb.save(path)
+
+# ------------------------------
+# Corpus
+# ------------------------------
+def _scaled(value, scale):
+    return max(1, int(value * scale))
+
+def generate_corpus(root, scale=1.0, seed=0, types=None, force=False):
+    """
+    Write a synthetic corpus under root, one subfolder per file type
+    (text, logs, pdf, docx, xlsx), and return its manifest.
+
+    - scale: multiplies the file counts in CORPUS_SHAPE (the line count for logs)
+    - seed: same seed and scale -> same content
+    - types: subset of CORPUS_SHAPE keys (default: all)
+    - force: regenerate even if root already holds a corpus with the same parameters
+
+    The manifest (also saved as root/manifest.json) lists, per type, the
+    folder, file count and total bytes.
+    """
+    types = list(types or CORPUS_SHAPE)
+    manifest_path = os.path.join(root, MANIFEST)
+    manifest = None
+    if not force and os.path.isfile(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("seed") != seed or manifest.get("scale") != scale:
+            manifest = None
+    if manifest is None:
+        manifest = {"seed": seed, "scale": scale, "needle": NEEDLE, "types": {}}
+    missing = [file_type for file_type in types if file_type not in manifest["types"]]
+    if not missing:
+        return manifest
+
+    for file_type in missing:
+        shape = dict(CORPUS_SHAPE[file_type])
+        scaled_key = "lines" if file_type == "logs" else "files"
+        shape[scaled_key] = _scaled(shape[scaled_key], scale)
+        folder = os.path.join(root, file_type)
+        # Files of an earlier, bigger corpus would be searched too and skew files/s and MB/s
+        shutil.rmtree(folder, ignore_errors=True)
+        os.makedirs(folder)
+        # One text source per type, so generating a subset gives the same files
+        source = TextSource(seed * 100 + list(CORPUS_SHAPE).index(file_type))
+        print(f"Generating {shape['files']} {file_type} files in {folder}...")
+        for number in range(shape["files"]):
+            # Spread the small text files over subfolders, like a real tree
+            if file_type == "text":
+                subfolder = os.path.join(folder, f"dir{number % 20:02d}")
+                os.makedirs(subfolder, exist_ok=True)
+                write_text(os.path.join(subfolder, f"file{number:05d}.txt"), source, shape["lines"])
+            elif file_type == "logs":
+                write_log(os.path.join(folder, f"app{number:02d}.log"), source, shape["lines"])
+            elif file_type == "pdf":
+                write_pdf(os.path.join(folder, f"doc{number:03d}.pdf"), source, shape["pages"], shape["lines"])
+            elif file_type == "docx":
+                write_docx(os.path.join(folder, f"doc{number:03d}.docx"), source, shape["paragraphs"], shape["table_rows"])
+            elif file_type == "xlsx":
+                write_xlsx(os.path.join(folder, f"book{number:02d}.xlsx"), source, shape["rows"], shape["columns"])
+
+        total_bytes = 0
+        for dir_path, _, file_names in os.walk(folder):
+            total_bytes += sum(os.path.getsize(os.path.join(dir_path, name)) for name in file_names)
+        manifest["types"][file_type] = {"folder": file_type, "files": shape["files"], "bytes": total_bytes}
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
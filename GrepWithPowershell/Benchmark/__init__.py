@@ -0,0 +1,2 @@
+from .CorpusGenerator import CORPUS_SHAPE, NEEDLE, generate_corpus
+from .BenchmarkRunner import FILE_TYPES, OPTION_SETS, CACHE_MODES, benchmark_cases, run_benchmarks, compare_results
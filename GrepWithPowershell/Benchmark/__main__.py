@@ -0,0 +1,64 @@
+import sys
+import argparse
+from datetime import datetime
+
+from .CorpusGenerator import generate_corpus
+from .BenchmarkRunner import FILE_TYPES, OPTION_SETS, CACHE_MODES, run_benchmarks, compare_results
+
+# ------------------------------
+# Command line
+# ------------------------------
+# Run from the GrepWithPowershell folder:
+#   python -m Benchmark generate --root bench-corpus --scale 0.1
+#   python -m Benchmark run --root bench-corpus --types pdf,docx --output before.json
+#   python -m Benchmark compare before.json after.json
+
+def _csv(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m Benchmark", description="SearchHelper benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    corpus_args = argparse.ArgumentParser(add_help=False)
+    corpus_args.add_argument("--root", required=True, help="corpus folder")
+    corpus_args.add_argument("--scale", type=float, default=1.0, help="corpus size multiplier (default 1.0)")
+    corpus_args.add_argument("--seed", type=int, default=0)
+    corpus_args.add_argument("--types", type=_csv, help=f"comma-separated subset of: {', '.join(FILE_TYPES)}")
+
+    generate = commands.add_parser("generate", parents=[corpus_args], help="write the synthetic corpus")
+    generate.add_argument("--force", action="store_true", help="regenerate an existing corpus")
+
+    run = commands.add_parser("run", parents=[corpus_args], help="run the benchmarks (generates the corpus if needed)")
+    run.add_argument("--options", type=_csv, help=f"comma-separated subset of: {', '.join(OPTION_SETS)}")
+    run.add_argument("--cache", type=_csv, help=f"comma-separated subset of: {', '.join(CACHE_MODES)}")
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--output", help="JSON results file (default bench-<timestamp>.json)")
+
+    compare = commands.add_parser("compare", help="compare two JSON result files")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.10, help="slowdown flagged as a regression (default 0.10)")
+
+    args = parser.parse_args(argv)
+    for name, values, known in (("type", getattr(args, "types", None), FILE_TYPES),
+                                ("option set", getattr(args, "options", None), OPTION_SETS),
+                                ("cache mode", getattr(args, "cache", None), CACHE_MODES)):
+        unknown = [value for value in values or () if value not in known]
+        if unknown:
+            parser.error(f"unknown {name}: {', '.join(unknown)}")
+
+    if args.command == "generate":
+        manifest = generate_corpus(args.root, args.scale, args.seed, args.types, args.force)
+        for file_type, info in manifest["types"].items():
+            print(f"{file_type:<6} {info['files']:6d} files {info['bytes'] / 2 ** 20:10.1f} MB")
+        return 0
+    if args.command == "run":
+        output = args.output or f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+        run_benchmarks(args.root, args.scale, args.seed, args.types, args.options, args.cache, args.repeat, output)
+        return 0
+    regressions = compare_results(args.baseline, args.current, args.threshold)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
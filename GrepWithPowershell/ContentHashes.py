@@ -0,0 +1,168 @@
+import os
+import sys
+import sqlite3
+import hashlib
+
+HASH_CHUNK = 1024 * 1024
+# Files of the same size are first told apart by their first block only
+HEAD_BYTES = 64 * 1024
+
+def default_hash_cache_path():
+    """The hashes live next to the text cache and the search indexes."""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "GrepWithPowershell", "content-hashes.sqlite")
+
+def content_hash(file_path, limit=None):
+    """BLAKE2b digest (hex) of the file's bytes, or of its first limit bytes."""
+    digest = hashlib.blake2b(digest_size=16)
+    remaining = limit
+    with open(file_path, "rb") as f:
+        while remaining is None or remaining > 0:
+            chunk = f.read(HASH_CHUNK if remaining is None else min(remaining, HASH_CHUNK))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+# ------------------------------
+# Persistent hash cache
+# ------------------------------
+class HashCache:
+    """
+    Content hashes keyed by path, only valid while the file keeps the same
+    size and mtime, so later searches skip re-reading unchanged files.
+    """
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or default_hash_cache_path()
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.cache_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                hash TEXT NOT NULL
+            )""")
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, file_path, st):
+        row = self.conn.execute("SELECT size, mtime, hash FROM hashes WHERE path = ?",
+                                (os.path.abspath(file_path),)).fetchone()
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime:
+            return None
+        return row[2]
+
+    def put(self, file_path, st, digest):
+        try:
+            self.conn.execute("INSERT OR REPLACE INTO hashes (path, size, mtime, hash) VALUES (?, ?, ?, ?)",
+                              (os.path.abspath(file_path), st.st_size, st.st_mtime, digest))
+        except sqlite3.OperationalError as e:
+            print(f"Cannot cache hash of {file_path}: {e}", file=sys.stderr)
+
+    def commit(self):
+        try:
+            self.conn.commit()
+        except sqlite3.OperationalError as e:
+            print(f"Cannot save content hashes: {e}", file=sys.stderr)
+
+def open_hash_cache():
+    """Open the default HashCache, or return None (files are then hashed every time)."""
+    try:
+        return HashCache()
+    except (OSError, sqlite3.Error) as e:
+        print(f"Content hash cache disabled: {e}", file=sys.stderr)
+        return None
+
+# ------------------------------
+# Grouping identical files
+# ------------------------------
+def unique_files(file_paths, hash_cache=None, stop_flag=None):
+    """
+    Group files by content. Returns (unique, copies): unique holds one path
+    per distinct content, in the order of file_paths, and copies maps each
+    of them to the other paths with the same bytes (only when there are some).
+
+    Files are grouped by size first and only files sharing a size are read:
+    their first block tells most of them apart, then the survivors are
+    hashed whole (through hash_cache when given). Files that cannot be
+    read are kept as unique.
+    """
+    file_paths = list(file_paths)
+    stats = {}
+    by_size = {}
+    for file_path in file_paths:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            continue
+        stats[file_path] = st
+        by_size.setdefault(st.st_size, []).append(file_path)
+
+    first_copy = {}  # duplicate path -> first path with the same content
+    for paths in by_size.values():
+        if len(paths) < 2 or (stop_flag and stop_flag.get('stop')):
+            continue
+        digests = {}  # path -> hash of the whole content
+        heads = {}    # hash of the first block -> paths whose whole hash is not known yet
+        for file_path in paths:
+            st = stats[file_path]
+            digest = hash_cache.get(file_path, st) if hash_cache is not None else None
+            if digest is None:
+                try:
+                    head = content_hash(file_path, HEAD_BYTES)
+                except OSError:
+                    continue
+                if st.st_size > HEAD_BYTES:
+                    heads.setdefault(head, []).append(file_path)
+                    continue
+                digest = head  # the first block is the whole file
+                if hash_cache is not None:
+                    hash_cache.put(file_path, st, digest)
+            digests[file_path] = digest
+        for same_head in heads.values():
+            if len(same_head) < 2 and not digests:
+                continue  # differs from every other file of this size
+            for file_path in same_head:
+                try:
+                    digests[file_path] = content_hash(file_path)
+                except OSError:
+                    continue
+                if hash_cache is not None:
+                    hash_cache.put(file_path, stats[file_path], digests[file_path])
+
+        by_hash = {}
+        for file_path in paths:
+            if file_path in digests:
+                first = by_hash.setdefault(digests[file_path], file_path)
+                if first != file_path:
+                    first_copy[file_path] = first
+    if hash_cache is not None:
+        hash_cache.commit()
+
+    unique = []
+    copies = {}
+    for file_path in file_paths:
+        first = first_copy.get(file_path)
+        if first is None:
+            unique.append(file_path)
+        else:
+            copies.setdefault(first, []).append(file_path)
+    return unique, copies
+
+class DuplicateResult(tuple):
+    """
+    (path, matches) of a file whose content was also found under other
+    paths, yielded when identical copies are grouped. It unpacks like any
+    other result; copies lists the other paths, in walk order.
+    """
+
+    def __new__(cls, path, matches, copies):
+        result = super().__new__(cls, (path, matches))
+        result.copies = copies
+        return result
@@ -0,0 +1,229 @@
+import os
+import re
+import sys
+from datetime import datetime
+from ArchiveReaders import strip_compression
+
+# ------------------------------
+# Ignore rules
+# ------------------------------
+def _glob_to_regex(glob):
+    """Translate a glob to a regex: '*' and '?' stay inside one path part, '**' crosses parts."""
+    out = []
+    i = 0
+    while i < len(glob):
+        ch = glob[i]
+        if glob.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if glob.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if ch == "*":
+            out.append("[^/]*")
+        elif ch == "?":
+            out.append("[^/]")
+        elif ch == "[":
+            end = glob.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(ch))
+            else:
+                body = glob[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        else:
+            out.append(re.escape(ch))
+        i += 1
+    return "".join(out)
+
+class IgnoreRules:
+    """
+    .gitignore-style exclusion rules, matched against paths relative to the
+    search root (always with '/' separators).
+
+    - 'name' or '*.log'   matches that name at any depth
+    - 'build/'            only matches directories
+    - '/dist' or 'a/b/*'  anchored to the root (any pattern with a '/' in it)
+    - '**'                matches across folders
+    - '!pattern'          re-includes what an earlier rule excluded
+    """
+
+    def __init__(self, patterns=()):
+        if isinstance(patterns, str):
+            patterns = patterns.split(",")
+        self.rules = []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern.startswith("#"):
+                continue
+            negate = pattern.startswith("!")
+            if negate:
+                pattern = pattern[1:]
+            dir_only = pattern.endswith("/")
+            # Only the trailing slash goes first: a leading one still anchors '/build/'
+            pattern = pattern.rstrip("/")
+            anchored = "/" in pattern
+            pattern = pattern.lstrip("/")
+            regex = _glob_to_regex(pattern)
+            regex = re.compile(f"^{regex}$" if anchored else f"^(?:.*/)?{regex}$")
+            self.rules.append((regex, negate, dir_only))
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def is_excluded(self, rel_path, is_dir):
+        excluded = False
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                excluded = not negate
+        return excluded
+
+def parse_extensions(extensions):
+    """'.txt, py,.pdf' -> ('.txt', '.py', '.pdf'); '*' or '' -> None (all files)."""
+    if not extensions or extensions == "*":
+        return None
+    return tuple(("." + ext.strip().lstrip(".")).lower() for ext in extensions.split(",") if ext.strip()) or None
+
+def _timestamp(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+# ------------------------------
+# scandir walker
+# ------------------------------
+def walk_files(folder, extensions=None, recursive=True, exclude=None, max_size=None, modified_since=None,
+               max_depth=None, follow_symlinks=False, stop_flag=None):
+    """
+    Yield os.DirEntry objects for the files to search, in os.walk (top-down) order.
+
+    - extensions: tuple from parse_extensions() or a comma-separated string;
+      compressed files match on their inner name (app.log.gz is a '.log' file)
+    - exclude: IgnoreRules, or a list / comma-separated string of .gitignore-style globs.
+      Excluded folders are never entered.
+    - max_size: skip files bigger than this many bytes
+    - modified_since: skip files older than this (timestamp, datetime or ISO date string)
+    - max_depth: 0 = only folder itself, 1 = one level of subfolders, ...
+      recursive=False is the same as max_depth=0.
+    - follow_symlinks: enter symlinked folders; each real folder is only visited once
+
+    entry.stat() is reused from the directory listing wherever the OS provides it.
+    """
+    if isinstance(extensions, str):
+        extensions = parse_extensions(extensions)
+    if exclude is not None and not isinstance(exclude, IgnoreRules):
+        exclude = IgnoreRules(exclude)
+    modified_since = _timestamp(modified_since)
+    if not recursive:
+        max_depth = 0
+    need_stat = max_size is not None or modified_since is not None
+
+    visited = set()
+    # Stack of (path, relative path, depth); children are pushed reversed to keep listing order
+    stack = [(folder, "", 0)]
+    while stack:
+        dir_path, rel_dir, depth = stack.pop()
+        if stop_flag and stop_flag.get('stop'):
+            return
+        if follow_symlinks:
+            try:
+                st = os.stat(dir_path)
+            except OSError:
+                continue
+            key = (st.st_dev, st.st_ino)
+            if key in visited:
+                continue
+            visited.add(key)
+
+        try:
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError as e:
+            print(f"Cannot list {dir_path}: {e}", file=sys.stderr)
+            continue
+
+        subdirs = []
+        for entry in entries:
+            if stop_flag and stop_flag.get('stop'):
+                return
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=follow_symlinks):
+                    if max_depth is not None and depth >= max_depth:
+                        continue
+                    if exclude and exclude.is_excluded(rel_path, True):
+                        continue
+                    subdirs.append((entry.path, rel_path, depth + 1))
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+
+            if extensions:
+                lower_name = entry.name.lower()
+                # app.log.gz passes a '.log' filter too
+                if not (lower_name.endswith(extensions) or strip_compression(lower_name).endswith(extensions)):
+                    continue
+            if exclude and exclude.is_excluded(rel_path, False):
+                continue
+            if need_stat:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                if max_size is not None and st.st_size > max_size:
+                    continue
+                if modified_since is not None and st.st_mtime < modified_since:
+                    continue
+            yield entry
+
+        stack.extend(reversed(subdirs))
+
+def file_filter(folder, extensions=None, recursive=True, exclude=None, max_size=None, modified_since=None,
+                max_depth=None):
+    """
+    Return wanted(path, st): whether walk_files() with the same options would
+    yield that file, given its os.stat() result. Used to check single paths
+    (e.g. from change notifications) without walking the whole tree.
+    """
+    if isinstance(extensions, str):
+        extensions = parse_extensions(extensions)
+    if exclude is not None and not isinstance(exclude, IgnoreRules):
+        exclude = IgnoreRules(exclude)
+    modified_since = _timestamp(modified_since)
+    if not recursive:
+        max_depth = 0
+
+    def wanted(path, st):
+        rel_path = os.path.relpath(path, folder).replace(os.sep, "/")
+        if rel_path.startswith("../"):
+            return False
+        parts = rel_path.split("/")
+        if max_depth is not None and len(parts) - 1 > max_depth:
+            return False
+        if extensions:
+            lower_name = parts[-1].lower()
+            if not (lower_name.endswith(extensions) or strip_compression(lower_name).endswith(extensions)):
+                return False
+        if exclude:
+            for i in range(1, len(parts)):
+                if exclude.is_excluded("/".join(parts[:i]), True):
+                    return False
+            if exclude.is_excluded(rel_path, False):
+                return False
+        if max_size is not None and st.st_size > max_size:
+            return False
+        if modified_since is not None and st.st_mtime < modified_since:
+            return False
+        return True
+
+    return wanted
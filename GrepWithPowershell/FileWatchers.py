@@ -0,0 +1,256 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+from abc import ABC, abstractmethod
+import ctypes
+import ctypes.util
+from FileWalker import IgnoreRules
+
+# ------------------------------
+# Change notification backends
+# ------------------------------
+class FileWatcher(ABC):
+    """
+    Tells SearchWatcher when files under a folder may have changed.
+
+    - wait(timeout) blocks up to timeout seconds and returns a set of paths
+      that changed (empty when nothing happened), or None when the whole
+      tree has to be rescanned (first poll, lost events, new folders, ...)
+    - close() releases the OS resources
+
+    Events are only hints: SearchWatcher stats every reported path itself.
+    """
+
+    name = ""
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def __init__(self, folder, recursive=True, exclude=None, max_depth=None, follow_symlinks=False, interval=2.0):
+        self.folder = folder
+        self.interval = interval
+
+    @abstractmethod
+    def wait(self, timeout):
+        pass
+
+    def close(self):
+        pass
+
+class PollingWatcher(FileWatcher):
+    """Portable fallback: asks for a full rescan (walk + stat) every interval seconds."""
+
+    name = "poll"
+
+    def __init__(self, folder, recursive=True, exclude=None, max_depth=None, follow_symlinks=False, interval=2.0):
+        super().__init__(folder, recursive, exclude, max_depth, follow_symlinks, interval)
+        self._next_poll = time.monotonic() + interval
+
+    def wait(self, timeout):
+        remaining = self._next_poll - time.monotonic()
+        if remaining > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(0.0, remaining))
+        self._next_poll = time.monotonic() + self.interval
+        return None
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+# Events of one burst (a writer flushing several blocks) are collected for this long
+SETTLE_SECONDS = 0.2
+
+def _libc():
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+class InotifyWatcher(FileWatcher):
+    """
+    Linux inotify through ctypes (no extra module): one watch per folder,
+    so only the files that were written, created, moved or deleted are
+    re-checked. Raises OSError when inotify cannot be set up (e.g. the
+    fs.inotify.max_user_watches limit), so callers can fall back to polling.
+    """
+
+    name = "inotify"
+
+    @classmethod
+    def available(cls):
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            return hasattr(_libc(), "inotify_init1")
+        except OSError:
+            return False
+
+    def __init__(self, folder, recursive=True, exclude=None, max_depth=None, follow_symlinks=False, interval=2.0):
+        super().__init__(folder, recursive, exclude, max_depth, follow_symlinks, interval)
+        if exclude is not None and not isinstance(exclude, IgnoreRules):
+            exclude = IgnoreRules(exclude)
+        self.exclude = exclude
+        self.max_depth = 0 if not recursive else max_depth
+        self.follow_symlinks = follow_symlinks
+        self._libc = _libc()
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches = {}  # wd -> folder path
+        try:
+            self._add_tree(folder, "", 0)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, dir_path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dir_path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOSPC, errno.ENOMEM, errno.EMFILE):
+                raise OSError(error, f"cannot watch {dir_path}: {os.strerror(error)} "
+                                     "(raise fs.inotify.max_user_watches or use polling)")
+            return  # folder vanished or is unreadable: the walk skips it too
+        self._watches[wd] = dir_path
+
+    def _add_tree(self, dir_path, rel_dir, depth):
+        """Watch dir_path and its subfolders, with the same depth and exclude rules as walk_files()."""
+        visited = set()
+        stack = [(dir_path, rel_dir, depth)]
+        while stack:
+            dir_path, rel_dir, depth = stack.pop()
+            try:
+                st = os.stat(dir_path)
+            except OSError:
+                continue
+            if (st.st_dev, st.st_ino) in visited:
+                continue
+            visited.add((st.st_dev, st.st_ino))
+            self._add_watch(dir_path)
+            if self.max_depth is not None and depth >= self.max_depth:
+                continue
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if not entry.is_dir(follow_symlinks=self.follow_symlinks):
+                        continue
+                except OSError:
+                    continue
+                if self.exclude and self.exclude.is_excluded(rel_path, True):
+                    continue
+                stack.append((entry.path, rel_path, depth + 1))
+
+    def _read_events(self):
+        data = b""
+        while True:
+            try:
+                chunk = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            data += chunk
+        events = []
+        pos = 0
+        while pos + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, pos)
+            pos += EVENT_HEADER.size
+            name = data[pos:pos + length].rstrip(b"\0")
+            pos += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        time.sleep(SETTLE_SECONDS)
+        changed = set()
+        rescan = False
+        for wd, mask, name in self._read_events():
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            dir_path = self._watches.get(wd)
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if dir_path is None:
+                continue
+            if mask & IN_ISDIR:
+                # A folder appeared, went or moved: watch what is there now and rescan
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    path = os.path.join(dir_path, name)
+                    rel_path = os.path.relpath(path, self.folder).replace(os.sep, "/")
+                    depth = rel_path.count("/") + 1
+                    if not (self.exclude and self.exclude.is_excluded(rel_path, True)) and \
+                            (self.max_depth is None or depth <= self.max_depth):
+                        self._add_tree(path, rel_path, depth)
+                rescan = True
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                rescan = True
+                continue
+            if name:
+                changed.add(os.path.join(dir_path, name))
+        return None if rescan else changed
+
+    def close(self):
+        if self._fd is not None and self._fd >= 0:
+            os.close(self._fd)
+        self._fd = None
+
+# Preferred first; "auto" picks the first one available
+WATCH_BACKENDS = {backend.name: backend for backend in (InotifyWatcher, PollingWatcher)}
+
+def get_watch_backend(name, folder, recursive=True, exclude=None, max_depth=None, follow_symlinks=False,
+                      interval=2.0):
+    """
+    Return a started FileWatcher by name ("inotify", "poll" or "auto").
+    "auto" (or None) falls back to polling when inotify is missing or
+    cannot watch the whole tree. Raises ValueError for unknown or missing backends.
+    """
+    name = (name or "auto").lower()
+    args = (folder, recursive, exclude, max_depth, follow_symlinks, interval)
+    if name == "auto":
+        for backend in WATCH_BACKENDS.values():
+            if not backend.available():
+                continue
+            try:
+                return backend(*args)
+            except OSError as e:
+                print(f"Cannot use {backend.name} watcher: {e}", file=sys.stderr)
+        raise ValueError("No file watcher available")
+    backend = WATCH_BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown watch backend '{name}' (choose from: auto, {', '.join(WATCH_BACKENDS)})")
+    if not backend.available():
+        raise ValueError(f"Watch backend '{name}' is not available on this system")
+    return backend(*args)
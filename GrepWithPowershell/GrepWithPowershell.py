@@ -1,10 +1,24 @@
 ﻿import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
+import re
+import sys
 import threading
-import PyPDF2
-import ctypes
-from SearchHelper import searcher  # <-- Il tuo helper con PDF, Word, Excel, TXT ecc.
+import multiprocessing
+from collections import Counter
+from datetime import datetime
+from SearchHelper import iter_search, SearchSummary  # <-- Il tuo helper con PDF, Word, Excel, TXT ecc.
+from SearchQuery import SearchQuery
+from SearchIndex import SearchIndex
+from SearchWatcher import SearchWatcher, WatchUpdate
+from ResultStore import ResultStore
+from ResultsView import ResultsView
+from ResultExport import export_results, export_format_of
+from SearchJobs import SearchJobs
+
+# The search thread writes results to a ResultStore; the Tk loop looks for
+# new ones this often and only loads the rows the view shows
+RESULTS_REFRESH_MS = 250
 
 class GrepWithPowershell:
 
@@ -52,14 +66,38 @@ class GrepWithPowershell:
         self.window.configure(bg='#000000')
 
         # Variables
-        self.stop_search = False
+        # One search thread at a time; a new search cancels the running one
+        self.search_jobs = SearchJobs()
         self.case_sensitive = tk.BooleanVar(value=False)
         self.recursive = tk.BooleanVar(value=True)
+        self.use_index = tk.BooleanVar(value=False)
+        self.use_regex = tk.BooleanVar(value=False)
+        self.whole_word = tk.BooleanVar(value=False)
+        self.multi_terms = tk.BooleanVar(value=False)
+        self.skip_copies = tk.BooleanVar(value=False)  # search byte-identical files once
+        self.count_first = tk.BooleanVar(value=False)  # list the files first, for a percentage and ETA
+        self.fuzzy_errors = tk.StringVar(value="")  # max edits for approximate matching, empty = exact
 
         # Context variables for lines before/after
         self.lines_before = tk.IntVar(value=2)
         self.lines_after = tk.IntVar(value=2)
 
+        # File filters (empty = no limit)
+        self.max_size_mb = tk.StringVar(value="")
+        self.modified_since = tk.StringVar(value="")
+
+        # Result limits (empty = no limit)
+        self.files_only = tk.BooleanVar(value=False)
+        self.max_per_file = tk.StringVar(value="")
+        self.max_results = tk.StringVar(value="")
+
+        # Watch mode: keep searching changed files after the search
+        self.watch_changes = tk.BooleanVar(value=False)
+
+        # Results of the last search, on disk; stores still being written are kept open
+        self.result_store = None
+        self.running_stores = Counter()
+
         # Configure modern styles
         self.setup_styles()
 
@@ -83,6 +121,7 @@ class GrepWithPowershell:
         self.create_input_section(main_container)
         self.create_action_buttons(main_container)
         self.create_results_and_status(main_container)
+        self.window.after(RESULTS_REFRESH_MS, self.refresh_results)
 
         # ------------------------------
         # Safe close protocol
@@ -102,6 +141,12 @@ class GrepWithPowershell:
         style.map("Modern.TCheckbutton", background=[('active', self.colors['bg_card'])], foreground=[('active', self.colors['text_primary'])])
         style.configure("Dark.Vertical.TScrollbar", background='#1e1e1e', troughcolor='#0a0a0a', bordercolor='#1e1e1e', arrowcolor='#a0a0a0', relief="flat")
         style.map("Dark.Vertical.TScrollbar", background=[('active', '#2d2d2d'), ('pressed', '#3c3c3c')])
+        style.configure("Dark.Treeview", background=self.colors['bg_dark'], fieldbackground=self.colors['bg_dark'],
+                        foreground=self.colors['text_primary'], font=("Consolas", 10), rowheight=22, borderwidth=0)
+        style.configure("Dark.Treeview.Heading", background=self.colors['bg_medium'],
+                        foreground=self.colors['text_secondary'], font=("Segoe UI", 9), relief="flat")
+        style.map("Dark.Treeview", background=[('selected', self.colors['accent'])],
+                  foreground=[('selected', '#ffffff')])
 
     # ------------------------------
     # Rounded button with custom hover color
@@ -176,9 +221,16 @@ class GrepWithPowershell:
                  font=("Segoe UI", 10), borderwidth=0, insertbackground=self.colors['text_primary'],
                  relief="flat").grid(row=2, column=1, sticky="ew", padx=(10, 0), pady=8, ipady=8, ipadx=10)
 
+        # Excluded folders/files (.gitignore-style)
+        self.create_input_row(input_inner, "Exclude (e.g. .git/, node_modules/, *.min.js)", 3)
+        self.exclude_var = tk.StringVar(value=".git/, .svn/, node_modules/, __pycache__/")
+        tk.Entry(input_inner, textvariable=self.exclude_var, bg=self.colors['bg_light'], fg=self.colors['text_primary'],
+                 font=("Segoe UI", 10), borderwidth=0, insertbackground=self.colors['text_primary'],
+                 relief="flat").grid(row=3, column=1, sticky="ew", padx=(10, 0), pady=8, ipady=8, ipadx=10)
+
         # Options
         options_frame = tk.Frame(input_inner, bg=self.colors['bg_card'])
-        options_frame.grid(row=3, column=1, sticky="w", padx=(10, 0), pady=(15, 0))
+        options_frame.grid(row=4, column=1, sticky="w", padx=(10, 0), pady=(15, 0))
         tk.Checkbutton(options_frame, text="Case sensitive", variable=self.case_sensitive, bg=self.colors['bg_card'],
                        fg=self.colors['text_secondary'], selectcolor=self.colors['bg_light'],
                        activebackground=self.colors['bg_card'], activeforeground=self.colors['text_primary'],
@@ -186,11 +238,32 @@ class GrepWithPowershell:
         tk.Checkbutton(options_frame, text="Recursive search", variable=self.recursive, bg=self.colors['bg_card'],
                        fg=self.colors['text_secondary'], selectcolor=self.colors['bg_light'],
                        activebackground=self.colors['bg_card'], activeforeground=self.colors['text_primary'],
-                       font=("Segoe UI", 9), borderwidth=0, highlightthickness=0).pack(side="left")
+                       font=("Segoe UI", 9), borderwidth=0, highlightthickness=0).pack(side="left", padx=(0, 20))
+        tk.Checkbutton(options_frame, text="Use index", variable=self.use_index, bg=self.colors['bg_card'],
+                       fg=self.colors['text_secondary'], selectcolor=self.colors['bg_light'],
+                       activebackground=self.colors['bg_card'], activeforeground=self.colors['text_primary'],
+                       font=("Segoe UI", 9), borderwidth=0, highlightthickness=0).pack(side="left", padx=(0, 20))
+        tk.Checkbutton(options_frame, text="Regex", variable=self.use_regex, bg=self.colors['bg_card'],
+                       fg=self.colors['text_secondary'], selectcolor=self.colors['bg_light'],
+                       activebackground=self.colors['bg_card'], activeforeground=self.colors['text_primary'],
+                       font=("Segoe UI", 9), borderwidth=0, highlightthickness=0).pack(side="left", padx=(0, 20))
+        tk.Checkbutton(options_frame, text="Whole word", variable=self.whole_word, bg=self.colors['bg_card'],
+                       fg=self.colors['text_secondary'], selectcolor=self.colors['bg_light'],
+                       activebackground=self.colors['bg_card'], activeforeground=self.colors['text_primary'],
+                       font=("Segoe UI", 9), borderwidth=0, highlightthickness=0).pack(side="left", padx=(0, 20))
+        tk.Checkbutton(options_frame, text="Multiple terms (separated by ;)", variable=self.multi_terms, bg=self.colors['bg_card'],
+                       fg=self.colors['text_secondary'], selectcolor=self.colors['bg_light'],
+                       activebackground=self.colors['bg_card'], activeforeground=self.colors['text_primary'],
+                       font=("Segoe UI", 9), borderwidth=0, highlightthickness=0).pack(side="left", padx=(0, 20))
+        tk.Label(options_frame, text="Fuzzy (max edits)", bg=self.colors['bg_card'],
+                 fg=self.colors['text_secondary'], font=("Segoe UI", 9)).pack(side="left", padx=(0, 5))
+        tk.Entry(options_frame, textvariable=self.fuzzy_errors, width=4, bg=self.colors['bg_light'],
+                 fg=self.colors['text_primary'], font=("Segoe UI", 9), borderwidth=0, relief="flat",
+                 justify="center", insertbackground=self.colors['text_primary']).pack(side="left")
 
         # Context settings for lines before/after
         context_frame = tk.Frame(input_inner, bg=self.colors['bg_card'])
-        context_frame.grid(row=4, column=1, sticky="w", padx=(10, 0), pady=(15, 0))
+        context_frame.grid(row=5, column=1, sticky="w", padx=(10, 0), pady=(15, 0))
         tk.Label(context_frame, text="Context:", bg=self.colors['bg_card'],
                  fg=self.colors['text_secondary'], font=("Segoe UI", 10, "bold")).pack(side="left", padx=(0, 10))
         tk.Label(context_frame, text="Lines before", bg=self.colors['bg_card'],
@@ -202,7 +275,53 @@ class GrepWithPowershell:
                  fg=self.colors['text_secondary'], font=("Segoe UI", 9)).pack(side="left", padx=(0, 5))
         tk.Entry(context_frame, textvariable=self.lines_after, width=4, bg=self.colors['bg_light'],
                  fg=self.colors['text_primary'], font=("Segoe UI", 9), borderwidth=0, relief="flat",
-                 justify="center", insertbackground=self.colors['text_primary']).pack(side="left")
+                 justify="center", insertbackground=self.colors['text_primary']).pack(side="left", padx=(0, 15))
+
+        # File filters
+        tk.Label(context_frame, text="Filters:", bg=self.colors['bg_card'],
+                 fg=self.colors['text_secondary'], font=("Segoe UI", 10, "bold")).pack(side="left", padx=(15, 10))
+        tk.Label(context_frame, text="Max size (MB)", bg=self.colors['bg_card'],
+                 fg=self.colors['text_secondary'], font=("Segoe UI", 9)).pack(side="left", padx=(0, 5))
+        tk.Entry(context_frame, textvariable=self.max_size_mb, width=6, bg=self.colors['bg_light'],
+                 fg=self.colors['text_primary'], font=("Segoe UI", 9), borderwidth=0, relief="flat",
+                 justify="center", insertbackground=self.colors['text_primary']).pack(side="left", padx=(0, 15))
+        tk.Label(context_frame, text="Modified since (YYYY-MM-DD)", bg=self.colors['bg_card'],
+                 fg=self.colors['text_secondary'], font=("Segoe UI", 9)).pack(side="left", padx=(0, 5))
+        tk.Entry(context_frame, textvariable=self.modified_since, width=11, bg=self.colors['bg_light'],
+                 fg=self.colors['text_primary'], font=("Segoe UI", 9), borderwidth=0, relief="flat",
+                 justify="center", insertbackground=self.colors['text_primary']).pack(side="left", padx=(0, 15))
+        tk.Checkbutton(context_frame, text="Skip identical copies", variable=self.skip_copies, bg=self.colors['bg_card'],
+                       fg=self.colors['text_secondary'], selectcolor=self.colors['bg_light'],
+                       activebackground=self.colors['bg_card'], activeforeground=self.colors['text_primary'],
+                       font=("Segoe UI", 9), borderwidth=0, highlightthickness=0).pack(side="left", padx=(0, 20))
+        tk.Checkbutton(context_frame, text="Count files first (ETA)", variable=self.count_first, bg=self.colors['bg_card'],
+                       fg=self.colors['text_secondary'], selectcolor=self.colors['bg_light'],
+                       activebackground=self.colors['bg_card'], activeforeground=self.colors['text_primary'],
+                       font=("Segoe UI", 9), borderwidth=0, highlightthickness=0).pack(side="left")
+
+        # Result limits
+        limits_frame = tk.Frame(input_inner, bg=self.colors['bg_card'])
+        limits_frame.grid(row=6, column=1, sticky="w", padx=(10, 0), pady=(15, 0))
+        tk.Label(limits_frame, text="Limits:", bg=self.colors['bg_card'],
+                 fg=self.colors['text_secondary'], font=("Segoe UI", 10, "bold")).pack(side="left", padx=(0, 10))
+        tk.Checkbutton(limits_frame, text="Only file names", variable=self.files_only, bg=self.colors['bg_card'],
+                       fg=self.colors['text_secondary'], selectcolor=self.colors['bg_light'],
+                       activebackground=self.colors['bg_card'], activeforeground=self.colors['text_primary'],
+                       font=("Segoe UI", 9), borderwidth=0, highlightthickness=0).pack(side="left", padx=(0, 20))
+        tk.Label(limits_frame, text="Max per file", bg=self.colors['bg_card'],
+                 fg=self.colors['text_secondary'], font=("Segoe UI", 9)).pack(side="left", padx=(0, 5))
+        tk.Entry(limits_frame, textvariable=self.max_per_file, width=6, bg=self.colors['bg_light'],
+                 fg=self.colors['text_primary'], font=("Segoe UI", 9), borderwidth=0, relief="flat",
+                 justify="center", insertbackground=self.colors['text_primary']).pack(side="left", padx=(0, 15))
+        tk.Label(limits_frame, text="Max results", bg=self.colors['bg_card'],
+                 fg=self.colors['text_secondary'], font=("Segoe UI", 9)).pack(side="left", padx=(0, 5))
+        tk.Entry(limits_frame, textvariable=self.max_results, width=6, bg=self.colors['bg_light'],
+                 fg=self.colors['text_primary'], font=("Segoe UI", 9), borderwidth=0, relief="flat",
+                 justify="center", insertbackground=self.colors['text_primary']).pack(side="left", padx=(0, 20))
+        tk.Checkbutton(limits_frame, text="Watch for changes", variable=self.watch_changes, bg=self.colors['bg_card'],
+                       fg=self.colors['text_secondary'], selectcolor=self.colors['bg_light'],
+                       activebackground=self.colors['bg_card'], activeforeground=self.colors['text_primary'],
+                       font=("Segoe UI", 9), borderwidth=0, highlightthickness=0).pack(side="left")
 
         input_inner.columnconfigure(1, weight=1)
 
@@ -235,13 +354,17 @@ class GrepWithPowershell:
         save_button = self.create_rounded_button(button_frame, "💾 SAVE", self.save_results,
                                                  self.colors['success'], '#ffffff',
                                                  hover_color=self.colors['success_hover'])
-        save_button.pack(side="left")
+        save_button.pack(side="left", padx=(0, 10))
+        self.index_button = self.create_rounded_button(button_frame, "🗂 REBUILD INDEX", self.start_rebuild_index,
+                                                       self.colors['bg_medium'], self.colors['text_primary'],
+                                                       hover_color=self.colors['neutral_hover'])
+        self.index_button.pack(side="left")
 
     # ------------------------------
     # Results + Status section
     # ------------------------------
     def create_results_and_status(self, parent):
-        """Creates the results text area and status bar with correct layout"""
+        """Creates the results view and status bar with correct layout"""
 
         container = tk.Frame(parent, bg=self.colors['bg_dark'])
         container.pack(fill="both", expand=True)
@@ -254,6 +377,12 @@ class GrepWithPowershell:
         self.status_var = tk.StringVar(value="Ready")
         tk.Label(self.status_bar, textvariable=self.status_var, bg=self.colors['bg_light'],
                  fg=self.colors['text_primary'], font=("Segoe UI", 9), anchor="w").pack(side="left", padx=15, pady=5)
+        self.last_stats = None
+        self.details_button = tk.Button(self.status_bar, text="📊 Details", command=self.show_search_details,
+                                        bg=self.colors['bg_light'], fg=self.colors['text_secondary'],
+                                        activebackground=self.colors['neutral_hover'], font=("Segoe UI", 9),
+                                        relief="flat", borderwidth=0, cursor="hand2", state="disabled")
+        self.details_button.pack(side="right", padx=15)
 
         # Results frame
         self.results_card = tk.Frame(container, bg=self.colors['bg_card'], highlightthickness=1,
@@ -269,36 +398,33 @@ class GrepWithPowershell:
         results_inner = tk.Frame(self.results_card, bg=self.colors['bg_card'])
         results_inner.pack(fill="both", expand=True, padx=20, pady=(10, 10))
 
-        self.results_text = tk.Text(results_inner, wrap=tk.NONE, bg=self.colors['bg_dark'], fg=self.colors['text_primary'],
-                                    font=("Consolas", 10), insertbackground=self.colors['text_primary'], borderwidth=0,
-                                    relief="flat", padx=10, pady=10)
-        v_scrollbar = ttk.Scrollbar(results_inner, orient="vertical", command=self.results_text.yview,
-                                    style="Dark.Vertical.TScrollbar")
-        v_scrollbar.pack(side="right", fill="y")
-        self.results_text.pack(side="left", fill="both", expand=True)
-        self.results_text.configure(yscrollcommand=v_scrollbar.set)
-
-        # Text tags
-        self.results_text.tag_config("path", foreground=self.colors['accent'], font=("Consolas", 10, "bold"))
-        self.results_text.tag_config("line", foreground=self.colors['success'])
-        self.results_text.tag_config("content", foreground=self.colors['text_primary'])
-        self.results_text.tag_config("summary", foreground=self.colors['text_secondary'], font=("Consolas", 10, "italic"))
-        self.results_text.tag_config("highlight", foreground="#f44336", font=("Consolas", 10, "bold"))
+        # Files and their matches as a tree, read from the result store a page at a time
+        self.results_view = ResultsView(results_inner, self.colors)
 
     # ------------------------------
-    # Highlight search word
+    # Result store and view
     # ------------------------------
-    def highlight_search_word(self, text_widget, word):
-        if not word:
-            return
-        start_pos = "1.0"
-        while True:
-            start_pos = text_widget.search(word, start_pos, stopindex=tk.END, nocase=not self.case_sensitive.get())
-            if not start_pos:
-                break
-            end_pos = f"{start_pos}+{len(word)}c"
-            text_widget.tag_add("highlight", start_pos, end_pos)
-            start_pos = end_pos
+    def refresh_results(self):
+        """Tk loop side: show what the search added to the store since the last look."""
+        self.results_view.refresh()
+        self.window.after(RESULTS_REFRESH_MS, self.refresh_results)
+
+    def show_store(self, store):
+        """Show the store a search just opened; the previous one is closed unless still written."""
+        previous = self.result_store
+        self.result_store = store
+        self.running_stores[store] += 1
+        self.results_view.set_store(store)
+        if previous is not None and previous not in self.running_stores:
+            previous.close()
+
+    def release_store(self, store):
+        """A search (or export) is over: its store is only kept while it is the one shown or still used."""
+        self.running_stores[store] -= 1
+        if self.running_stores[store] <= 0:
+            del self.running_stores[store]
+            if store is not self.result_store:
+                store.close()
 
     # ------------------------------
     # Folder selection
@@ -312,23 +438,51 @@ class GrepWithPowershell:
     # Clear results
     # ------------------------------
     def clear_results(self):
-        self.results_text.delete(1.0, tk.END)
+        if self.search_jobs.running:
+            # The search thread writes to the store: stop it before emptying the store under it
+            self.search_jobs.cancel()
+            if not self.search_jobs.join(timeout=2):
+                self.status_var.set("⏳ Still stopping the search - clear again in a moment")
+                return
+        if self.result_store is not None:
+            self.result_store.clear()
+        self.results_view.reload()
         self.status_var.set("Results cleared")
 
     # ------------------------------
     # Stop search
     # ------------------------------
     def stop_search_action(self):
-        self.stop_search = True
+        self.search_jobs.cancel()
         self.status_var.set("Stopping...")
 
+    # ------------------------------
+    # Rebuild search index (threaded)
+    # ------------------------------
+    def start_rebuild_index(self):
+        folder = self.folder_var.get()
+        if not os.path.isdir(folder):
+            messagebox.showerror("Error", "The specified folder does not exist!")
+            return
+        self.index_button.config(state="disabled")
+        self.status_var.set("🗂 Rebuilding index...")
+        threading.Thread(target=self.rebuild_index, args=(folder,), daemon=True).start()
+
+    def rebuild_index(self, folder):
+        try:
+            with SearchIndex(folder) as index:
+                indexed = index.rebuild()
+            message = f"✅ Index rebuilt - {indexed} files"
+        except Exception as e:
+            print(f"Index rebuild failed for {folder}: {e}", file=sys.stderr)
+            message = f"❌ Index rebuild failed: {e}"
+        self.window.after(0, lambda: self.status_var.set(message))
+        self.window.after(0, lambda: self.index_button.config(state="normal"))
+
     # ------------------------------
     # Start search (threaded)
     # ------------------------------
     def start_search(self):
-        self.search_thread = threading.Thread(target=self.search_files, daemon=True)
-        self.search_thread.start()
-
         search_text = self.search_var.get()
         folder = self.folder_var.get()
         if not search_text:
@@ -337,86 +491,296 @@ class GrepWithPowershell:
         if not os.path.isdir(folder):
             messagebox.showerror("Error", "The specified folder does not exist!")
             return
-        self.stop_search = False
-        self.search_button.config(state="disabled")
+        try:
+            self.get_file_filters()
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid filter: {e}")
+            return
+        try:
+            _, max_results = self.get_result_limits()
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid limit: {e}")
+            return
+        if max_results and self.watch_changes.get():
+            messagebox.showerror("Error", "Max results cannot be combined with Watch for changes.")
+            return
+        if self.use_regex.get():
+            for pattern in self.get_search_terms():
+                try:
+                    re.compile(pattern)
+                except re.error as e:
+                    messagebox.showerror("Error", f"Invalid regex '{pattern}':\n{e}")
+                    return
+        try:
+            max_errors = self.get_max_errors()
+            if max_errors:
+                SearchQuery(self.get_search_terms(), self.case_sensitive.get(), self.use_regex.get(),
+                            self.whole_word.get(), max_errors)
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid fuzzy search: {e}")
+            return
+        # The search still running (if any) is cancelled and replaced
         self.stop_button.config(state="normal")
-        self.clear_results()
-        threading.Thread(target=self.search_files, daemon=True).start()
+        self.search_jobs.start(self.search_files)
 
     # ------------------------------
-    # Search files via searcher()
+    # Search terms from the entry
     # ------------------------------
-    def search_files(self):
-        folder = self.folder_var.get()
+    def get_search_terms(self):
         search_text = self.search_var.get()
+        if self.multi_terms.get():
+            return [term.strip() for term in search_text.split(";") if term.strip()]
+        return [search_text]
+
+    # ------------------------------
+    # File filters from the entries
+    # ------------------------------
+    def get_file_filters(self):
+        """Returns (max_size in bytes, modified_since date string), None where empty. Raises ValueError."""
+        max_size_mb = self.max_size_mb.get().strip()
+        modified_since = self.modified_since.get().strip()
+        max_size = int(float(max_size_mb) * 1024 * 1024) if max_size_mb else None
+        if modified_since:
+            datetime.fromisoformat(modified_since)
+        return max_size, modified_since or None
+
+    # ------------------------------
+    # Result limits from the entries
+    # ------------------------------
+    def get_result_limits(self):
+        """Returns (max matches per file, max total results), None where empty. Raises ValueError."""
+        limits = []
+        for var in (self.max_per_file, self.max_results):
+            value = var.get().strip()
+            limit = int(value) if value else None
+            if limit is not None and limit < 1:
+                raise ValueError(f"{limit} is not a positive number")
+            limits.append(limit)
+        return tuple(limits)
+
+    # ------------------------------
+    # Fuzzy edits from the entry
+    # ------------------------------
+    def get_max_errors(self):
+        """Returns the edits a fuzzy hit may have, 0 when empty (exact search). Raises ValueError."""
+        value = self.fuzzy_errors.get().strip()
+        max_errors = int(value) if value else 0
+        if max_errors < 0:
+            raise ValueError(f"{max_errors} is not a valid number of edits")
+        return max_errors
+
+    # ------------------------------
+    # Search files via iter_search()
+    # ------------------------------
+    def search_files(self, token):
+        """Runs on the search job's thread until done or token is cancelled."""
+        folder = self.folder_var.get()
+        search_terms = self.get_search_terms()
+        use_regex = self.use_regex.get()
+        whole_word = self.whole_word.get()
         extensions = self.extensions_var.get().strip()
+        exclude = self.exclude_var.get().strip()
+        max_size, modified_since = self.get_file_filters()
+        files_only = self.files_only.get()
+        max_per_file, max_results = self.get_result_limits()
+        max_errors = self.get_max_errors()
         case_sensitive = self.case_sensitive.get()
         recursive = self.recursive.get()
         lines_before = self.lines_before.get()
         lines_after = self.lines_after.get()
-
-        self.window.after(0, lambda: self.status_var.set("⏳ Searching..."))
-
-        stop_flag = {'stop': False}
+        use_index = self.use_index.get()
+        watch = self.watch_changes.get()
+        dedup = "group" if self.skip_copies.get() else None
+        precount = self.count_first.get()
+
+        total_files = total_matches = files_with_matches = 0
+        limit_note = ""
+        stats = None
+        index = None
+        store = ResultStore()
+        self.window.after(0, lambda: self.show_store(store))
 
         try:
-            # Call searcher helper
-            results, total_files, total_matches = searcher(
+            if use_index:
+                self.window.after(0, lambda: self.status_var.set("🗂 Updating index..."))
+                index = SearchIndex(folder)
+                # Only what this search will look at: excluded folders are not read
+                index.update(token, extensions=extensions, recursive=recursive, exclude=exclude,
+                             max_size=max_size, modified_since=modified_since)
+
+            self.window.after(0, lambda: self.status_var.set("⏳ Searching..."))
+
+            def show_progress(progress):
+                # Called on this thread every PROGRESS_INTERVAL seconds
+                if progress.phase == "done":
+                    return
+                text = f"⏳ {progress.summary()}" if progress.phase == "counting" else f"⏳ Searching - {progress.summary()}"
+                if progress.current_file:
+                    text += f" - {os.path.basename(progress.current_file)}"
+                self.window.after(0, lambda: self.show_progress(token, text))
+
+            search_options = dict(
                 folder=folder,
-                search_text=search_text,
+                search_text=search_terms,
                 extensions=extensions,
                 case_sensitive=case_sensitive,
                 recursive=recursive,
                 lines_before=lines_before,
                 lines_after=lines_after,
-                stop_flag=stop_flag
+                index=index,
+                regex=use_regex,
+                whole_word=whole_word,
+                exclude=exclude,
+                max_size=max_size,
+                modified_since=modified_since,
+                files_with_matches_only=files_only,
+                max_matches_per_file=max_per_file,
+                max_errors=max_errors,
+                dedup=dedup,
+                progress=show_progress,
+                precount=precount
             )
+            if watch:
+                results = SearchWatcher(**search_options).run(token)
+            else:
+                results = iter_search(stop_flag=token, max_total_results=max_results, **search_options)
+
+            # Stream results from the searcher helper as each file completes
+            for item in results:
+                if isinstance(item, SearchSummary):
+                    total_files = item.total_files
+                    total_matches = item.total_matches
+                    files_with_matches = item.files_with_matches
+                    limit_note = " (result limit reached)" if item.limit_reached else ""
+                    if item.duplicate_files:
+                        limit_note += f" ({item.duplicate_files} identical copies not searched again)"
+                    stats = item.stats
+                    if not watch or token.cancelled:
+                        break
+                    self.window.after(0, lambda: self.status_var.set(
+                        f"👀 Watching for changes - {total_matches} matches in {files_with_matches}/{total_files} files"))
+                    continue
+
+                if token.cancelled:
+                    continue
+
+                if isinstance(item, WatchUpdate):
+                    # Changed files: the store keeps their current results, the view is rebuilt
+                    stamp = datetime.now().strftime("%H:%M:%S")
+                    note = "" if item.entries else " - no matches left"
+                    message = f"🔄 {stamp} {item.reason}: {item.file_path}{note}"
+                    removed = store.remove(item.file_path)
+                    for file_path, matches in item.entries:
+                        store.add(file_path, matches)
+                    # Replaced, not added to: a file that lost matches brings the totals down
+                    total_matches += sum(len(matches) for _, matches in item.entries) - removed
+                    files_with_matches += bool(item.entries) - bool(removed)
+                    self.window.after(0, self.results_view.reload)
+                    self.window.after(0, lambda message=message: self.status_var.set(message))
+                    continue
+
+                store.add(*item, getattr(item, "copies", None))
 
-            files_with_matches = len(results)
+        finally:
+            if index is not None:
+                index.close()
+            store.commit()
+            self.window.after(0, lambda: self.release_store(store))
+            stats_note = f" - {stats.summary()}" if stats is not None else ""
+            state = "⏹ Stopped" if token.cancelled else "✅ Done"
+            message = f"{state} - {total_matches} matches in {files_with_matches}/{total_files} files{limit_note}{stats_note}"
+            self.window.after(0, lambda: self.search_finished(token, message, stats))
 
-            for file_path, matches in results:
-                if self.stop_search:
-                    stop_flag['stop'] = True
-                    break
-                self.window.after(0, lambda fp=file_path: self.results_text.insert(tk.END, f"\n📄 {fp}\n", "path"))
-                for match in matches:
-                    line_text = f"   Line {match[0]}:\n{match[1]}\n" if isinstance(match[0], int) else f"   Page {match[0]}:\n{match[1]}\n"
-                    self.window.after(0, lambda lt=line_text: self.results_text.insert(tk.END, lt, "content"))
-                    self.window.after(0, lambda: self.highlight_search_word(self.results_text, search_text))
-                self.window.after(0, lambda: self.results_text.insert(tk.END, "\n", "content"))
-                self.window.after(0, lambda: self.results_text.see(tk.END))
+    # ------------------------------
+    # Search progress
+    # ------------------------------
+    def show_progress(self, token, text):
+        """Tk loop side: live counters in the status bar, while the search is still the current one."""
+        if self.search_jobs.is_current(token) and not token.cancelled:
+            self.status_var.set(text)
 
-            if total_matches == 0:
-                self.window.after(0, lambda: self.results_text.insert(tk.END, "\n⚠️ No results found.\n", "summary"))
+    # ------------------------------
+    # Search over
+    # ------------------------------
+    def search_finished(self, token, message, stats):
+        """Tk loop side: final status and buttons, unless a newer search has taken over."""
+        if not self.search_jobs.is_current(token):
+            return
+        self.status_var.set(message)
+        self.last_stats = stats
+        self.details_button.config(state="normal" if stats is not None else "disabled")
+        self.stop_button.config(state="disabled")
 
-        finally:
-            self.window.after(0, lambda: self.status_var.set(
-                f"✅ Done - {total_matches} matches in {files_with_matches}/{total_files} files"
-            ))
-            self.window.after(0, lambda: self.search_button.config(state="normal"))
-            self.window.after(0, lambda: self.stop_button.config(state="disabled"))
+    # ------------------------------
+    # Search statistics dialog
+    # ------------------------------
+    def show_search_details(self):
+        if self.last_stats is None:
+            return
+        dialog = tk.Toplevel(self.window)
+        dialog.title("Search details")
+        dialog.configure(bg=self.colors['bg_dark'])
+        dialog.geometry("760x480")
+        text = tk.Text(dialog, wrap=tk.NONE, bg=self.colors['bg_dark'], fg=self.colors['text_primary'],
+                       font=("Consolas", 10), borderwidth=0, relief="flat", padx=10, pady=10)
+        text.pack(fill="both", expand=True, padx=10, pady=10)
+        text.insert(tk.END, self.last_stats.report())
+        text.config(state="disabled")
 
     # ------------------------------
     # Save results to file
     # ------------------------------
     def save_results(self):
-        content = self.results_text.get(1.0, tk.END).strip()
-        if not content:
+        store = self.result_store
+        if store is None or not store.file_count():
             messagebox.showinfo("Info", "No results to save.")
             return
-        file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text Files", "*.txt")])
-        if file_path:
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(content)
-            messagebox.showinfo("Saved", f"Results saved to:\n{file_path}")
+        file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[
+            ("Text Files", "*.txt"), ("JSON Lines", "*.jsonl"), ("CSV", "*.csv"), ("HTML report", "*.html")])
+        if not file_path:
+            return
+        try:
+            export_format = export_format_of(file_path)
+        except ValueError:
+            export_format = "txt"
+        # Streamed from the store entry by entry, whatever the view has loaded; the store stays open meanwhile
+        self.running_stores[store] += 1
+        title = f"Search results for {self.search_var.get()} in {self.folder_var.get()}"
+        self.status_var.set(f"💾 Saving {os.path.basename(file_path)}...")
+        threading.Thread(target=self.export_store, args=(store, file_path, export_format, title),
+                         daemon=True).start()
+
+    # ------------------------------
+    # Export a result store (threaded)
+    # ------------------------------
+    def export_store(self, store, file_path, export_format, title):
+        """Runs on its own thread, so saving millions of matches does not freeze the window."""
+        try:
+            files, matches = export_results(store, file_path, export_format, title=title)
+            message = f"Results saved to:\n{file_path}"
+            status = f"💾 Saved {matches} matches in {files} files to {os.path.basename(file_path)}"
+        except Exception as e:
+            message = None
+            status = f"❌ Saving failed: {e}"
+        self.window.after(0, lambda: self.export_finished(store, message, status))
+
+    def export_finished(self, store, message, status):
+        """Tk loop side: report the export and let go of the store."""
+        self.release_store(store)
+        self.status_var.set(status)
+        if message:
+            messagebox.showinfo("Saved", message)
+        else:
+            messagebox.showerror("Error", status)
 
     # ------------------------------
     # Safe close
     # ------------------------------
     def on_close(self):
-        self.stop_search = True
-        if hasattr(self, 'search_thread') and self.search_thread.is_alive():
-            self.search_thread.join()
+        self.search_jobs.cancel()
+        self.search_jobs.join(timeout=5)
+        if self.result_store is not None:
+            self.result_store.close()
         self.window.destroy()
         self.root.quit()
 
@@ -425,6 +789,8 @@ class GrepWithPowershell:
 # Run the app
 # ------------------------------
 if __name__ == "__main__":
+    # Needed by the searcher process pool in frozen (pyinstaller) builds
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = GrepWithPowershell(root)
     root.mainloop()
@@ -0,0 +1,155 @@
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from SearchJobs import until_cancelled
+
+# ------------------------------
+# XML helpers
+# ------------------------------
+def _local(tag):
+    """'{namespace}name' -> 'name'"""
+    return tag.rsplit("}", 1)[-1]
+
+def _iter_elements(zf, member, name):
+    """Stream the <name> elements of a zip member; each one is cleared once yielded."""
+    with zf.open(member) as f:
+        for _, elem in ET.iterparse(f):
+            if _local(elem.tag) == name:
+                yield elem
+                elem.clear()
+
+def _member_contains(zf, member, pattern, chunk_size=1024 * 1024):
+    """Raw regex search over a zip member, read in chunks (with overlap)."""
+    tail = b""
+    with zf.open(member) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return False
+            if pattern.search(tail + chunk):
+                return True
+            tail = chunk[-64:]
+
+# ------------------------------
+# XLSX
+# ------------------------------
+# Cells that are not shared strings but can still hold arbitrary text:
+# inline strings, cached formula strings and errors (#N/A, ...)
+_TEXT_CELL_MARKER = re.compile(rb"""\bt=["'](?:inlineStr|str|e)["']""")
+
+# Everything str() of a number, date, time or boolean cell can contain
+_NON_STRING_CHARS = set("0123456789.-+:e TrueFalse")
+
+def _could_match_non_string(query):
+    """True if the query could hit a numeric, date or boolean cell."""
+    if query.literals is None:
+        return True
+    allowed = _NON_STRING_CHARS if query.case_sensitive else {ch.lower() for ch in _NON_STRING_CHARS}
+    for literal in query.literals:
+        chars = set(literal if query.case_sensitive else literal.lower())
+        if chars <= allowed:
+            return True
+    return False
+
+def _text_cells_match(zf, member, query, cancel=None):
+    """Check the inline/formula/error string cells of one sheet against the query."""
+    for cell in until_cancelled(_iter_elements(zf, member, "c"), cancel):
+        if cell.get("t") in ("inlineStr", "str", "e"):
+            text = "".join(node.text or "" for node in cell.iter() if _local(node.tag) in ("t", "v"))
+            if query.search_line(text):
+                return True
+    return False
+
+def xlsx_could_match(file_path, query, cancel=None):
+    """
+    Cheap prefilter: False when no cell of the workbook can match the query.
+
+    Looks for a hit among the shared strings (xl/sharedStrings.xml) first.
+    Without one, the workbook can only match through inline/formula strings
+    (sheets are parsed only when a raw scan finds such cells) or, for queries
+    made only of digits and the like, through numeric cells.
+    Also False once cancel (a SearchJobs.CancelToken) is cancelled.
+    """
+    try:
+        with zipfile.ZipFile(file_path) as zf:
+            names = zf.namelist()
+            if "xl/sharedStrings.xml" in names:
+                for si in until_cancelled(_iter_elements(zf, "xl/sharedStrings.xml", "si"), cancel):
+                    text = "".join(t.text or "" for t in si.iter() if _local(t.tag) == "t")
+                    if query.search_line(text):
+                        return True
+            if cancel is not None and cancel.cancelled:
+                return False
+            if _could_match_non_string(query):
+                return True
+            for name in names:
+                if name.startswith("xl/worksheets/") and name.endswith(".xml"):
+                    if _member_contains(zf, name, _TEXT_CELL_MARKER) and _text_cells_match(zf, name, query, cancel):
+                        return True
+    except (zipfile.BadZipFile, ET.ParseError, KeyError):
+        return True  # let the full reader report the problem
+    return False
+
+def iter_xlsx_cells(file_path):
+    """
+    Yield (sheet_title, coordinate, cell_str) for every non-empty cell,
+    streaming the sheets in read-only mode. openpyxl is only imported here,
+    when the first workbook is met.
+    """
+    import openpyxl
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet in wb.worksheets:
+            for row in sheet.iter_rows():
+                for cell in row:
+                    if cell.value is not None:
+                        yield sheet.title, cell.coordinate, str(cell.value)
+    finally:
+        wb.close()
+
+# ------------------------------
+# DOCX
+# ------------------------------
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P, _W_R, _W_T, _W_TAB, _W_BR, _W_CR = (_W + name for name in ("p", "r", "t", "tab", "br", "cr"))
+
+def _docx_parts(names):
+    """Text parts in reading order: body, headers, footers, footnotes, endnotes."""
+    parts = ["word/document.xml"] if "word/document.xml" in names else []
+    for prefix in ("word/header", "word/footer"):
+        parts += sorted(name for name in names if name.startswith(prefix) and name.endswith(".xml"))
+    parts += [name for name in ("word/footnotes.xml", "word/endnotes.xml") if name in names]
+    return parts
+
+def iter_docx_paragraphs(file_path):
+    """
+    Yield the text of every paragraph of a DOCX, straight from the zip with an
+    incremental XML parser: body paragraphs (tables included) in document
+    order, then headers, footers, footnotes and endnotes. Paragraph numbers
+    (position in this sequence) are stable for a given file.
+    """
+    with zipfile.ZipFile(file_path) as zf:
+        for part in _docx_parts(zf.namelist()):
+            with zf.open(part) as f:
+                paragraphs = []  # text pieces of the open paragraphs (text boxes can nest them)
+                run_depth = 0
+                for event, elem in ET.iterparse(f, events=("start", "end")):
+                    tag = elem.tag
+                    if event == "start":
+                        if tag == _W_P:
+                            paragraphs.append([])
+                        elif tag == _W_R:
+                            run_depth += 1
+                        continue
+                    if tag == _W_T:
+                        if paragraphs:
+                            paragraphs[-1].append(elem.text or "")
+                    elif tag == _W_R:
+                        run_depth -= 1
+                    elif tag == _W_TAB and run_depth and paragraphs:
+                        paragraphs[-1].append("\t")
+                    elif tag in (_W_BR, _W_CR) and run_depth and paragraphs:
+                        paragraphs[-1].append("\n")
+                    elif tag == _W_P:
+                        yield "".join(paragraphs.pop())
+                        elem.clear()
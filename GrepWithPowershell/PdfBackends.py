@@ -0,0 +1,127 @@
+import importlib.util
+from abc import ABC, abstractmethod
+
+# ------------------------------
+# PDF extraction backends
+# ------------------------------
+def _normalize(text):
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+class PdfBackend(ABC):
+    """
+    Text extraction engine for PDFs.
+
+    - page_count(file_path) -> number of pages
+    - iter_pages(file_path, first=1, last=None) lazily yields (page_num, text)
+      for the pages in [first, last] that have text, so callers can stop early.
+
+    file_path can also be a seekable binary stream (e.g. a PDF inside an archive).
+    """
+
+    name = ""
+    module = ""
+
+    @classmethod
+    def available(cls):
+        return importlib.util.find_spec(cls.module) is not None
+
+    @abstractmethod
+    def page_count(self, file_path):
+        pass
+
+    @abstractmethod
+    def iter_pages(self, file_path, first=1, last=None):
+        pass
+
+class PyPDF2Backend(PdfBackend):
+    name = "pypdf2"
+    module = "PyPDF2"
+
+    def page_count(self, file_path):
+        import PyPDF2
+        with open(file_path, "rb") as f:
+            return len(PyPDF2.PdfReader(f).pages)
+
+    def iter_pages(self, file_path, first=1, last=None):
+        if not isinstance(file_path, str):
+            yield from self._iter_reader_pages(file_path, first, last)
+            return
+        with open(file_path, "rb") as f:
+            yield from self._iter_reader_pages(f, first, last)
+
+    def _iter_reader_pages(self, stream, first, last):
+        import PyPDF2
+        reader = PyPDF2.PdfReader(stream)
+        last = len(reader.pages) if last is None else min(last, len(reader.pages))
+        for page_num in range(first, last + 1):
+            text = reader.pages[page_num - 1].extract_text()
+            if text:
+                yield page_num, _normalize(text)
+
+class PyMuPDFBackend(PdfBackend):
+    name = "pymupdf"
+    module = "fitz"
+
+    def page_count(self, file_path):
+        import fitz
+        with fitz.open(file_path) as doc:
+            return doc.page_count
+
+    def iter_pages(self, file_path, first=1, last=None):
+        import fitz
+        doc = fitz.open(file_path) if isinstance(file_path, str) else fitz.open(stream=file_path.read(), filetype="pdf")
+        with doc:
+            last = doc.page_count if last is None else min(last, doc.page_count)
+            for page_num in range(first, last + 1):
+                text = doc[page_num - 1].get_text()
+                if text:
+                    yield page_num, _normalize(text)
+
+class PdfiumBackend(PdfBackend):
+    name = "pdfium"
+    module = "pypdfium2"
+
+    def page_count(self, file_path):
+        import pypdfium2
+        pdf = pypdfium2.PdfDocument(file_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def iter_pages(self, file_path, first=1, last=None):
+        import pypdfium2
+        pdf = pypdfium2.PdfDocument(file_path)
+        try:
+            last = len(pdf) if last is None else min(last, len(pdf))
+            for page_num in range(first, last + 1):
+                text = pdf[page_num - 1].get_textpage().get_text_range()
+                if text:
+                    yield page_num, _normalize(text)
+        finally:
+            pdf.close()
+
+# Fastest first; "auto" picks the first one installed
+PDF_BACKENDS = {backend.name: backend for backend in (PyMuPDFBackend, PdfiumBackend, PyPDF2Backend)}
+DEFAULT_PDF_BACKEND = "pypdf2"
+
+def get_pdf_backend(name=None):
+    """
+    Return a backend instance by name ("pypdf2", "pymupdf", "pdfium" or "auto").
+    None means the default (PyPDF2). Raises ValueError for unknown or missing engines.
+    """
+    name = (name or DEFAULT_PDF_BACKEND).lower()
+    if name == "auto":
+        for backend in PDF_BACKENDS.values():
+            if backend.available():
+                return backend()
+        raise ValueError("No PDF backend installed")
+    backend = PDF_BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown PDF backend '{name}' (choose from: auto, {', '.join(PDF_BACKENDS)})")
+    if not backend.available():
+        raise ValueError(f"PDF backend '{name}' needs the '{backend.module}' module")
+    return backend()
+
+def available_pdf_backends():
+    return [name for name, backend in PDF_BACKENDS.items() if backend.available()]
@@ -0,0 +1,247 @@
+import os
+import csv
+import json
+import html
+from abc import ABC, abstractmethod
+from SearchMatch import materialize, context_blocks
+
+# Same output as json.dumps(..., ensure_ascii=False), without its per-call setup
+_encode_json = json.JSONEncoder(ensure_ascii=False).encode
+
+# ------------------------------
+# Records shared by the exporters
+# ------------------------------
+def hit_record(hit):
+    """{'pattern', 'start', 'end'} for a hit (plus 'distance' for fuzzy queries)."""
+    record = {"pattern": hit[0], "start": hit[1], "end": hit[2]}
+    if len(hit) > 3:
+        record["distance"] = hit[3]
+    return record
+
+def match_records(file_path, matches):
+    """The JSON Lines 'match' records of one result entry, one per match."""
+    for location, context, hits in materialize(matches):
+        yield {
+            "type": "match",
+            "path": file_path,
+            "location": location,
+            "context": context,
+            "hits": [hit_record(hit) for hit in hits],
+        }
+
+def copies_record(file_path, copies):
+    """The JSON Lines 'copies' record naming the identical copies of a file."""
+    return {"type": "copies", "path": file_path, "copies": copies}
+
+def hit_column(context, start):
+    """1-based column of offset start in its line of context."""
+    return start - context.rfind("\n", 0, start)
+
+def block_label(file_path, block):
+    """'Line 12', 'Lines 10-14', 'Page 3' or 'Cell Sheet1!B4' for a ContextBlock."""
+    if block.count > 1 and block.first_line is not None:
+        return f"Lines {block.first_line}-{block.last_line}"
+    if not isinstance(block.location, int):
+        return f"Cell {block.location}"
+    return f"Page {block.location}" if file_path.lower().endswith(".pdf") else f"Line {block.location}"
+
+# ------------------------------
+# Exporters
+# ------------------------------
+class ResultExporter(ABC):
+    """
+    Writes results to a text stream as they come, one entry at a time, so
+    nothing but the entry being written is held in memory.
+
+    - begin() once, add(path, matches, copies=None) per result entry,
+      end() once
+    - files and matches count what was written
+
+    Matches are the ones of searcher() / ResultStore; lazy text matches
+    have their context read back from the file here.
+    """
+
+    name = ""
+    extension = ""
+    encoding = "utf-8"
+
+    def __init__(self, stream, title="Search results"):
+        self.stream = stream
+        self.title = title
+        self.files = 0
+        self.matches = 0
+
+    def begin(self):
+        pass
+
+    def add(self, file_path, matches, copies=None):
+        self.files += 1
+        self.matches += len(matches)
+        self.write_entry(file_path, matches, copies)
+
+    @abstractmethod
+    def write_entry(self, file_path, matches, copies):
+        pass
+
+    def end(self):
+        pass
+
+class TextExporter(ResultExporter):
+    """The plain-text layout of the results view: context blocks under each file."""
+
+    name = "txt"
+    extension = ".txt"
+
+    def write_entry(self, file_path, matches, copies):
+        write = self.stream.write
+        write(f"📄 {file_path}\n")
+        if copies:
+            write(f"   Identical copies: {', '.join(copies)}\n")
+        for block in context_blocks(matches):
+            write(f"   {block_label(file_path, block)}:\n{block.text}\n")
+        write("\n")
+
+class JsonlExporter(ResultExporter):
+    """One JSON object per line: a 'match' per match, a 'copies' record after them, a final 'summary'."""
+
+    name = "jsonl"
+    extension = ".jsonl"
+
+    def write_entry(self, file_path, matches, copies):
+        for record in match_records(file_path, matches):
+            self._write(record)
+        if copies:
+            self._write(copies_record(file_path, copies))
+
+    def end(self):
+        self._write({"type": "summary", "files_with_matches": self.files, "matches": self.matches})
+
+    def _write(self, record):
+        self.stream.write(_encode_json(record) + "\n")
+
+class CsvExporter(ResultExporter):
+    """
+    One row per hit: path, line_or_page, column, match, context. Written
+    with a BOM so spreadsheet apps read it as UTF-8. Identical copies are
+    not listed.
+    """
+
+    name = "csv"
+    extension = ".csv"
+    encoding = "utf-8-sig"
+    columns = ("path", "line_or_page", "column", "match", "context")
+
+    def begin(self):
+        self.writer = csv.writer(self.stream)
+        self.writer.writerow(self.columns)
+
+    def write_entry(self, file_path, matches, copies):
+        for location, context, hits in materialize(matches):
+            for hit in hits:
+                self.writer.writerow((file_path, location, hit_column(context, hit[1]), context[hit[1]:hit[2]], context))
+
+class HtmlExporter(ResultExporter):
+    """A static, self-contained HTML report: one section per file, hits highlighted, totals at the end."""
+
+    name = "html"
+    extension = ".html"
+    style = """
+        body { background: #1e1e1e; color: #d4d4d4; font-family: "Segoe UI", sans-serif; margin: 2em; }
+        h1 { font-size: 1.4em; }
+        h2 { font-size: 1em; color: #ffffff; margin: 1.5em 0 0.5em; word-break: break-all; }
+        .label { color: #9a9a9a; font-size: 0.85em; margin-top: 0.5em; }
+        .copies { color: #9a9a9a; font-size: 0.85em; }
+        pre { background: #2d2d2d; padding: 0.5em; margin: 0.2em 0; white-space: pre-wrap; font-family: Consolas, monospace; }
+        mark { background: none; color: #ff5555; font-weight: bold; }
+        footer { margin-top: 2em; color: #9a9a9a; }
+    """
+
+    def begin(self):
+        title = html.escape(self.title)
+        self.stream.write(f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>{title}</title>\n"
+                          f"<style>{self.style}</style>\n</head>\n<body>\n<h1>{title}</h1>\n")
+
+    def write_entry(self, file_path, matches, copies):
+        write = self.stream.write
+        write(f"<section>\n<h2>📄 {html.escape(file_path)}</h2>\n")
+        if copies:
+            write(f"<div class=\"copies\">Identical copies: {html.escape(', '.join(copies))}</div>\n")
+        for block in context_blocks(matches):
+            write(f"<div class=\"label\">{html.escape(block_label(file_path, block))}</div>\n"
+                  f"<pre>{self._highlight(block.text, block.hits)}</pre>\n")
+        write("</section>\n")
+
+    def end(self):
+        self.stream.write(f"<footer>{self.matches} matches in {self.files} files</footer>\n</body>\n</html>\n")
+
+    @staticmethod
+    def _highlight(text, hits):
+        """text escaped for HTML, with the hits (merged where they overlap) in <mark>."""
+        out = []
+        pos = 0
+        for start, end in sorted((hit[1], hit[2]) for hit in hits):
+            start = max(start, pos)
+            if end <= start:
+                continue
+            out.append(html.escape(text[pos:start]))
+            out.append(f"<mark>{html.escape(text[start:end])}</mark>")
+            pos = end
+        out.append(html.escape(text[pos:]))
+        return "".join(out)
+
+EXPORT_FORMATS = {exporter.name: exporter for exporter in (TextExporter, JsonlExporter, CsvExporter, HtmlExporter)}
+
+def export_format_of(file_path):
+    """The export format a file name asks for ('.htm' is HTML too, '.json' JSON Lines); ValueError if none."""
+    ext = os.path.splitext(file_path)[1].lower()
+    ext = {".htm": ".html", ".json": ".jsonl", ".ndjson": ".jsonl"}.get(ext, ext)
+    for name, exporter in EXPORT_FORMATS.items():
+        if exporter.extension == ext:
+            return name
+    raise ValueError(f"Unknown export format for '{file_path}' (use {', '.join(e.extension for e in EXPORT_FORMATS.values())})")
+
+# ------------------------------
+# Streaming export
+# ------------------------------
+def export_results(results, output, export_format=None, title="Search results", stop_flag=None):
+    """
+    Write search results to output, streaming entry by entry.
+
+    - results: a ResultStore (read with iter_results()), or an iterable of
+      (path, matches) like searcher()'s list or iter_search() itself
+      (its SearchSummary is skipped; copies of a DuplicateResult are kept)
+    - output: a file path, or a text stream opened with newline=""
+    - export_format: "txt", "jsonl", "csv" or "html"; None guesses it from
+      the output file name
+    - title: heading of the HTML report
+    - stop_flag: optional {'stop': bool} dict (or CancelToken), checked
+      between entries; the file is still closed properly
+
+    Returns (entries, matches) written.
+    """
+    if export_format is None:
+        if not isinstance(output, (str, os.PathLike)):
+            raise ValueError("export_format is needed when output is a stream")
+        export_format = export_format_of(os.fspath(output))
+    exporter_class = EXPORT_FORMATS.get(export_format)
+    if exporter_class is None:
+        raise ValueError(f"Unknown export format '{export_format}' (choose from: {', '.join(EXPORT_FORMATS)})")
+    if hasattr(results, "iter_results"):
+        results = results.iter_results()
+
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, "w", encoding=exporter_class.encoding, newline="") as stream:
+            return _export(results, exporter_class(stream, title), stop_flag)
+    return _export(results, exporter_class(output, title), stop_flag)
+
+def _export(results, exporter, stop_flag):
+    exporter.begin()
+    for item in results:
+        if stop_flag and stop_flag.get('stop'):
+            break
+        if not isinstance(item, tuple):
+            continue  # SearchSummary and the like
+        file_path, matches = item
+        exporter.add(file_path, matches, getattr(item, "copies", None))
+    exporter.end()
+    return exporter.files, exporter.matches
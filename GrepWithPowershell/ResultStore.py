@@ -0,0 +1,346 @@
+import os
+import json
+import sqlite3
+import tempfile
+import threading
+from SearchMatch import Match, MatchFile
+from ContentHashes import DuplicateResult
+
+# Rows written between two commits
+COMMIT_ROWS = 50000
+# Match rows inserted per statement; the lock is released in between so readers are not held up
+ADD_BATCH = 5000
+# Matches of one entry read per query while iter_results() streams it
+MATCH_PAGE = 10000
+
+_encode_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+def default_store_folder():
+    """Temporary result stores live in the user cache dir, like the indexes."""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "GrepWithPowershell", "results")
+
+def _location_number(location):
+    """The line or page number of a match location, None for cells ('Sheet1!B4')."""
+    return location if isinstance(location, int) and not isinstance(location, bool) else None
+
+def _extension_of(path):
+    """'.log' for 'a/b.LOG' and for archive members like 'logs.zip!/app.log'."""
+    return os.path.splitext(path.replace("\\", "/").rsplit("/", 1)[-1])[1].lower()
+
+# ------------------------------
+# On-disk result store
+# ------------------------------
+class ResultStore:
+    """
+    Search results kept in SQLite instead of in memory, for result sets
+    bigger than RAM. Text file matches are stored as the compact records
+    of SearchMatch (line, byte offset, hit spans) and their context is
+    read back from the file when a page is loaded; other matches keep
+    their context, and the size and modification time of the file when it
+    was searched, so contexts of a file changed since are marked stale.
+
+    - add(path, matches) / remove(path) while searching
+    - count(), file_count(), files() and page() read it back, filtered by
+      exact path, extension(s) and/or a substring of the path
+    - file_matches(), file_position() and match_position() page through
+      one entry, for views that only show part of the results
+    - iter_results() streams (path, matches) file by file, for exports
+      (see ResultExport)
+
+    One thread may write while others read (the GUI searches in a thread
+    and pages in the Tk loop): an entry only becomes visible once all its
+    matches are stored. Without store_path the store is a temporary file,
+    deleted by close().
+    """
+
+    def __init__(self, store_path=None):
+        self.temporary = store_path is None
+        if self.temporary:
+            folder = default_store_folder()
+            os.makedirs(folder, exist_ok=True)
+            handle, store_path = tempfile.mkstemp(prefix="results-", suffix=".sqlite", dir=folder)
+            os.close(handle)
+        self.store_path = store_path
+        self.conn = sqlite3.connect(store_path, check_same_thread=False)
+        self.lock = threading.RLock()
+        if self.temporary:
+            # Nothing to recover after a crash: skip the journal
+            self.conn.execute("PRAGMA journal_mode=OFF")
+            self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL,
+                extension TEXT NOT NULL,
+                matches INTEGER NOT NULL,
+                lines_before INTEGER,
+                lines_after INTEGER,
+                file_size INTEGER,
+                file_mtime INTEGER,
+                copies TEXT
+            );
+            CREATE INDEX IF NOT EXISTS files_path ON files(path);
+            CREATE INDEX IF NOT EXISTS files_extension ON files(extension);
+            CREATE TABLE IF NOT EXISTS matches (
+                file_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                location,
+                number INTEGER,
+                byte_offset INTEGER,
+                hits TEXT NOT NULL,
+                context TEXT,
+                PRIMARY KEY (file_id, seq)
+            ) WITHOUT ROWID;
+        """)
+        self._pending = 0
+        self._next_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM files").fetchone()[0]
+        # Bumped by every change, so views know when to reload
+        self.changes = 0
+
+    def close(self):
+        with self.lock:
+            if self.conn is None:
+                return
+            if not self.temporary:
+                self.conn.commit()
+            self.conn.close()
+            self.conn = None
+        if self.temporary:
+            try:
+                os.remove(self.store_path)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------
+    # Writing
+    # ------------------------------
+    def add(self, path, matches, copies=None):
+        """
+        Store the matches of one result entry (a file or an archive member);
+        copies as in DuplicateResult. Returns the entry's id.
+        """
+        match_file = next((match.file for match in matches if isinstance(match, Match) and match.lazy), None)
+        with self.lock:
+            file_id = self._next_id
+            self._next_id += 1
+        rows = []
+        encoded = {}  # lines of a log often have their hits at the same columns
+        for seq, match in enumerate(matches):
+            if isinstance(match, Match) and match.lazy:
+                spans = encoded.get(match.spans)
+                if spans is None:
+                    spans = encoded[match.spans] = _encode_json(match.spans)
+                rows.append((file_id, seq, match.line, match.line, match.offset, spans, None))
+            else:
+                location, context, hits = match
+                rows.append((file_id, seq, location, _location_number(location), None, _encode_json(hits), context))
+        for start in range(0, len(rows), ADD_BATCH):
+            with self.lock:
+                self.conn.executemany("INSERT INTO matches (file_id, seq, location, number, byte_offset, hits, context) "
+                                      "VALUES (?, ?, ?, ?, ?, ?, ?)", rows[start:start + ADD_BATCH])
+        # The entry row goes in last: readers never see an entry with missing matches
+        stamp = (match_file.stamp if match_file else None) or (None, None)
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO files (id, path, extension, matches, lines_before, lines_after, file_size, file_mtime, "
+                "copies) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_id, path, _extension_of(path), len(matches),
+                 match_file.lines_before if match_file else None, match_file.lines_after if match_file else None,
+                 *stamp, _encode_json(copies) if copies else None))
+            self.changes += 1
+            self._pending += len(rows) + 1
+            if self._pending >= COMMIT_ROWS:
+                self.commit()
+        return file_id
+
+    def remove(self, path):
+        """
+        Drop the results of path, and of its members when it is an archive
+        (watch mode re-searches). Returns the number of matches dropped.
+        """
+        condition = "path = ? OR substr(path, 1, ?) = ?"
+        prefix = path + "!/"
+        params = (path, len(prefix), prefix)
+        with self.lock:
+            removed = self.conn.execute(f"SELECT COALESCE(SUM(matches), 0) FROM files WHERE {condition}",
+                                        params).fetchone()[0]
+            self.conn.execute(f"DELETE FROM matches WHERE file_id IN (SELECT id FROM files WHERE {condition})", params)
+            self.conn.execute(f"DELETE FROM files WHERE {condition}", params)
+            self.changes += 1
+        return removed
+
+    def commit(self):
+        with self.lock:
+            self.conn.commit()
+            self._pending = 0
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM matches")
+            self.conn.execute("DELETE FROM files")
+            self.changes += 1
+            self.commit()
+
+    # ------------------------------
+    # Reading
+    # ------------------------------
+    @staticmethod
+    def _where(path=None, extensions=None, contains=None):
+        """SQL condition on the files table and its parameters."""
+        clauses = []
+        params = []
+        if path is not None:
+            clauses.append("files.path = ?")
+            params.append(path)
+        if extensions:
+            if isinstance(extensions, str):
+                extensions = extensions.split(",")
+            extensions = [ext.strip().lower() for ext in extensions if ext.strip()]
+            extensions = [ext if ext.startswith(".") else f".{ext}" for ext in extensions]
+            clauses.append(f"files.extension IN ({', '.join('?' * len(extensions))})")
+            params += extensions
+        if contains:
+            clauses.append("instr(lower(files.path), ?) > 0")
+            params.append(contains.lower())
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def count(self, path=None, extensions=None, contains=None):
+        """Number of matches, optionally filtered."""
+        where, params = self._where(path, extensions, contains)
+        return self._query(f"SELECT COALESCE(SUM(matches), 0) FROM files{where}", params)[0][0]
+
+    def file_count(self, path=None, extensions=None, contains=None):
+        """Number of result entries (files and archive members), optionally filtered."""
+        where, params = self._where(path, extensions, contains)
+        return self._query(f"SELECT COUNT(*) FROM files{where}", params)[0][0]
+
+    def files(self, extensions=None, contains=None, offset=0, limit=None):
+        """[(id, path, match count, copies), ...] in the order they were added."""
+        where, params = self._where(None, extensions, contains)
+        rows = self._query(f"SELECT id, path, matches, copies FROM files{where} ORDER BY id LIMIT ? OFFSET ?",
+                           (*params, -1 if limit is None else limit, offset))
+        return [(file_id, path, count, json.loads(copies) if copies else None) for file_id, path, count, copies in rows]
+
+    def page(self, offset=0, limit=100, path=None, extensions=None, contains=None):
+        """[(path, match), ...]: limit matches from the offset-th one, in the order they were added."""
+        where, params = self._where(path, extensions, contains)
+        rows = self._query(
+            "SELECT files.path, files.lines_before, files.lines_after, files.file_size, files.file_mtime, "
+            "location, byte_offset, hits, context "
+            f"FROM matches JOIN files ON files.id = matches.file_id{where} "
+            "ORDER BY matches.file_id, matches.seq LIMIT ? OFFSET ?", (*params, limit, offset))
+        return self._matches(rows)
+
+    def file_matches(self, file_id, offset=0, limit=None):
+        """The matches of the entry file_id (an id from files()), limit of them from the offset-th one."""
+        return self._entry_matches(file_id, offset, limit, {})
+
+    def _entry_matches(self, file_id, offset, limit, match_files):
+        # seq numbers an entry's matches from 0, so a page starts at seq = offset without skipping rows
+        rows = self._query(
+            "SELECT files.path, files.lines_before, files.lines_after, files.file_size, files.file_mtime, "
+            "location, byte_offset, hits, context "
+            "FROM matches JOIN files ON files.id = matches.file_id WHERE file_id = ? AND seq >= ? "
+            "ORDER BY seq LIMIT ?", (file_id, offset, -1 if limit is None else limit))
+        return [match for _, match in self._matches(rows, match_files)]
+
+    def file_position(self, file_id, extensions=None, contains=None):
+        """Offset of the entry file_id in files() with the same filters, None if it is filtered out or gone."""
+        where, params = self._where(None, extensions, contains)
+        if not self._query(f"SELECT 1 FROM files{where}{' AND' if where else ' WHERE'} id = ?", (*params, file_id)):
+            return None
+        where += " AND files.id < ?" if where else " WHERE files.id < ?"
+        return self._query(f"SELECT COUNT(*) FROM files{where}", (*params, file_id))[0][0]
+
+    def match_position(self, file_id, line):
+        """
+        Offset of the first match of the entry file_id on line (or page) number
+        line or after it; past the last numbered match if there is none, 0 for
+        entries without line numbers (cells).
+        """
+        # Locations may be cell names: compare the separate integer number column, never location
+        seq = self._query("SELECT MIN(seq) FROM matches WHERE file_id = ? AND number >= ?", (file_id, line))[0][0]
+        if seq is not None:
+            return seq
+        return self._query("SELECT COALESCE(MAX(seq) + 1, 0) FROM matches WHERE file_id = ? AND number IS NOT NULL",
+                           (file_id,))[0][0]
+
+    def iter_results(self, extensions=None, contains=None):
+        """
+        Yield (path, matches) entry by entry (a DuplicateResult for entries
+        stored with copies). matches is a StoredMatches: it is read
+        MATCH_PAGE matches at a time while it is iterated, so even one huge
+        entry is never in memory at once.
+        """
+        where, params = self._where(None, extensions, contains)
+        where += " AND files.id > ?" if where else " WHERE files.id > ?"
+        last_id = 0
+        while True:
+            # Entries are read a batch at a time too, so millions of files are fine
+            entries = self._query(f"SELECT id, path, matches, copies FROM files{where} ORDER BY id LIMIT 1000",
+                                  (*params, last_id))
+            if not entries:
+                return
+            for file_id, path, count, copies in entries:
+                if copies:
+                    yield DuplicateResult(path, StoredMatches(self, file_id, count), json.loads(copies))
+                else:
+                    yield path, StoredMatches(self, file_id, count)
+            last_id = entries[-1][0]
+
+    @staticmethod
+    def _matches(rows, match_files=None):
+        # match_files: path -> MatchFile, shared between the pages of one entry
+        match_files = {} if match_files is None else match_files
+        found = []
+        for path, lines_before, lines_after, size, mtime, location, byte_offset, hits, context in rows:
+            hits = [tuple(hit) for hit in json.loads(hits)]
+            if context is None:
+                match_file = match_files.get(path)
+                if match_file is None:
+                    stamp = (size, mtime) if size is not None else None
+                    match_file = match_files[path] = MatchFile(path, lines_before, lines_after, stamp)
+                found.append((path, Match(match_file, location, byte_offset, hits)))
+            else:
+                found.append((path, Match(None, location, None, hits, context)))
+        return found
+
+class StoredMatches:
+    """
+    The matches of one ResultStore entry, as iter_results() yields them:
+    len() is the stored count, and iterating reads them MATCH_PAGE at a
+    time (one MatchFile for all pages, so a file is mapped once when
+    materialized).
+    """
+
+    def __init__(self, store, file_id, count):
+        self.store = store
+        self.file_id = file_id
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        match_files = {}
+        offset = 0
+        while offset < self.count:
+            page = self.store._entry_matches(self.file_id, offset, MATCH_PAGE, match_files)
+            if not page:
+                return  # removed while being read (watch mode)
+            yield from page
+            offset += len(page)
+
+    def __repr__(self):
+        return f"StoredMatches(file_id={self.file_id}, count={self.count})"
@@ -0,0 +1,352 @@
+import re
+import time
+import tkinter as tk
+from tkinter import ttk
+from SearchMatch import materialize
+
+# Rows materialized at once: a page of entries, and a page of matches under each open entry
+FILE_PAGE = 500
+MATCH_PAGE = 500
+SNIPPET_CHARS = 300
+FILTER_DELAY_MS = 300
+# Time the Tk loop spends adding rows before it handles events again; the rest follow on the next tick
+RENDER_SLICE_SECONDS = 0.03
+
+def location_label(location):
+    return f"Line {location}" if isinstance(location, int) else f"Cell {location}"
+
+def hit_line(context, hits):
+    """The line of context holding the first hit, trimmed to SNIPPET_CHARS around it."""
+    start = hits[0][1] if hits else 0
+    line_start = context.rfind("\n", 0, start) + 1
+    line_end = context.find("\n", start)
+    line = context[line_start:len(context) if line_end == -1 else line_end]
+    if len(line) > SNIPPET_CHARS:
+        cut = max(0, start - line_start - SNIPPET_CHARS // 3)
+        line = ("…" if cut else "") + line[cut:cut + SNIPPET_CHARS] + "…"
+    return line.strip()
+
+# ------------------------------
+# Virtualized results view
+# ------------------------------
+class ResultsView:
+    """
+    Results of a ResultStore as a tree: one row per file (or archive member)
+    and its matches underneath. Only one page of files is in the tree at a
+    time, and the matches of a file are only read, with their context, when
+    it is opened (again a page at a time); "show more" rows move the pages.
+    The selected match is shown with its context and highlighted hits below
+    the tree. The path filter and "go to" (path[:line]) run against the store,
+    so neither depends on what is currently loaded.
+
+    All methods run in the Tk loop; the store may be filled by another thread,
+    refresh() picks up what it added, RENDER_SLICE_SECONDS of rows at a time
+    so a fast search never freezes the window.
+    """
+
+    def __init__(self, parent, colors):
+        self.colors = colors
+        self.store = None
+        self.contains = ""
+        self.file_offset = 0
+        self.file_ids = []        # entries in the tree, in order
+        self.total_files = 0      # entries passing the filter, at the last refresh
+        self.match_offsets = {}   # entry id -> offset of its loaded page of matches
+        self.entry_counts = {}    # entry id -> number of matches
+        self.seen_changes = None
+        self._filter_job = None
+        self._refresh_job = None  # next slice of a page that refresh() did not finish
+
+        # Path filter and "go to"
+        toolbar = tk.Frame(parent, bg=colors['bg_card'])
+        toolbar.pack(fill="x", pady=(0, 8))
+        self.filter_var = tk.StringVar()
+        self.goto_var = tk.StringVar()
+        for label, var, width in (("Filter paths", self.filter_var, 30), ("Go to (path:line)", self.goto_var, 30)):
+            tk.Label(toolbar, text=label, bg=colors['bg_card'], fg=colors['text_secondary'],
+                     font=("Segoe UI", 9)).pack(side="left", padx=(0, 5))
+            entry = tk.Entry(toolbar, textvariable=var, width=width, bg=colors['bg_light'], fg=colors['text_primary'],
+                             font=("Segoe UI", 9), borderwidth=0, relief="flat",
+                             insertbackground=colors['text_primary'])
+            entry.pack(side="left", padx=(0, 15), ipady=4)
+            if var is self.filter_var:
+                entry.bind("<Return>", lambda e: self.apply_filter())
+            else:
+                entry.bind("<Return>", lambda e: self.go_to(self.goto_var.get()))
+        self.filter_var.trace_add("write", lambda *args: self.schedule_filter())
+        self.summary_var = tk.StringVar(value="")
+        tk.Label(toolbar, textvariable=self.summary_var, bg=colors['bg_card'], fg=colors['text_secondary'],
+                 font=("Segoe UI", 9)).pack(side="right")
+
+        # Tree on top, context of the selected match below
+        panes = tk.PanedWindow(parent, orient="vertical", bg=colors['bg_card'], sashwidth=6, borderwidth=0)
+        panes.pack(fill="both", expand=True)
+        tree_frame = tk.Frame(panes, bg=colors['bg_card'])
+        self.tree = ttk.Treeview(tree_frame, columns=("matches", "text"), style="Dark.Treeview")
+        self.tree.heading("#0", text="File / location", anchor="w")
+        self.tree.heading("matches", text="Matches", anchor="w")
+        self.tree.heading("text", text="Text", anchor="w")
+        self.tree.column("#0", width=420, stretch=False)
+        self.tree.column("matches", width=110, stretch=False)
+        self.tree.column("text", width=600)
+        v_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview,
+                                    style="Dark.Vertical.TScrollbar")
+        v_scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.tree.configure(yscrollcommand=v_scrollbar.set)
+        self.tree.tag_configure("file", foreground=colors['accent'])
+        self.tree.tag_configure("more", foreground=colors['text_secondary'])
+        self.tree.bind("<<TreeviewOpen>>", self.on_open)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        panes.add(tree_frame, stretch="always")
+
+        self.detail = tk.Text(panes, wrap=tk.NONE, height=8, bg=colors['bg_dark'], fg=colors['text_primary'],
+                              font=("Consolas", 10), borderwidth=0, relief="flat", padx=10, pady=10)
+        self.detail.tag_config("path", foreground=colors['accent'], font=("Consolas", 10, "bold"))
+        self.detail.tag_config("line", foreground=colors['success'])
+        self.detail.tag_config("highlight", foreground="#f44336", font=("Consolas", 10, "bold"))
+        self.detail.config(state="disabled")
+        panes.add(self.detail, stretch="never")
+
+    # ------------------------------
+    # Store and pages of entries
+    # ------------------------------
+    def set_store(self, store):
+        """Show another store (None to empty the view), from its first page."""
+        self.store = store
+        self.file_offset = 0
+        self.reload()
+
+    def reload(self):
+        """Rebuild the current page from the store (after entries were removed)."""
+        self.tree.delete(*self.tree.get_children())
+        self.file_ids = []
+        self.match_offsets = {}
+        self.entry_counts = {}
+        self.show_detail(None)
+        self.seen_changes = None
+        self.refresh()
+
+    def refresh(self, sliced=True):
+        """
+        Add what the store gained since the last call to the current page,
+        update the counts. Sliced, rows are only added for RENDER_SLICE_SECONDS
+        and the rest on the next tick; else the whole page is filled now.
+        """
+        if self._refresh_job is not None:
+            self.tree.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        if self.store is None:
+            self.summary_var.set("")
+            return
+        if self.store.changes == self.seen_changes:
+            return
+        self.seen_changes = self.store.changes
+        self.total_files = self.store.file_count(contains=self.contains)
+        if self.file_offset and self.file_offset >= self.total_files:
+            # The page emptied (filter or watch updates): back to the first one
+            self.file_offset = 0
+            self.tree.delete(*self.tree.get_children())
+            self.file_ids = []
+        loaded = len(self.file_ids)
+        if loaded < FILE_PAGE and self.file_offset + loaded < self.total_files:
+            deadline = time.perf_counter() + RENDER_SLICE_SECONDS if sliced else None
+            for entry in self.store.files(contains=self.contains, offset=self.file_offset + loaded,
+                                          limit=FILE_PAGE - loaded):
+                self.insert_entry(*entry)
+                if deadline is not None and time.perf_counter() >= deadline:
+                    # Page not full yet: handle events, then come back for the next slice
+                    self.seen_changes = None
+                    self._refresh_job = self.tree.after(1, self.refresh)
+                    break
+        self.update_more_rows()
+        matches = self.store.count(contains=self.contains)
+        shown = f" - files {self.file_offset + 1}-{self.file_offset + len(self.file_ids)}" if self.file_ids else ""
+        self.summary_var.set(f"{matches:,} matches in {self.total_files:,} files{shown}")
+
+    def insert_entry(self, file_id, path, count, copies):
+        item = f"file:{file_id}"
+        copies_note = f" + {len(copies)} copies" if copies else ""
+        index = self.tree.index("next:files") if self.tree.exists("next:files") else "end"
+        self.tree.insert("", index, item, text=path, values=(f"{count:,}{copies_note}", ", ".join(copies or ())),
+                         tags=("file",))
+        # Placeholder child, so the row can be opened before its matches are read
+        self.tree.insert(item, "end", f"wait:{file_id}", text="…")
+        self.file_ids.append(file_id)
+        self.entry_counts[file_id] = count
+
+    def update_more_rows(self):
+        """The "show previous/next files" rows at both ends of the page."""
+        after = self.total_files - self.file_offset - len(self.file_ids)
+        self.set_more_row("", "prev:files", 0, self.file_offset,
+                          f"▲ Show previous {min(FILE_PAGE, self.file_offset):,} files")
+        self.set_more_row("", "next:files", "end", after,
+                          f"▼ Show next {min(FILE_PAGE, after):,} files ({after:,} more)")
+
+    def set_more_row(self, parent, item, index, needed, text):
+        if not needed:
+            if self.tree.exists(item):
+                self.tree.delete(item)
+            return
+        if self.tree.exists(item):
+            self.tree.item(item, text=text)
+        else:
+            self.tree.insert(parent, index, item, text=text, tags=("more",))
+
+    def show_files(self, offset, sliced=True):
+        """Replace the page of entries with the one starting at offset."""
+        self.file_offset = max(0, offset)
+        self.tree.delete(*self.tree.get_children())
+        self.file_ids = []
+        self.match_offsets = {}
+        self.entry_counts = {}
+        self.seen_changes = None
+        self.refresh(sliced)
+        children = self.tree.get_children()
+        if children:
+            self.tree.see(children[0])
+
+    # ------------------------------
+    # Pages of matches under an entry
+    # ------------------------------
+    def on_open(self, event=None):
+        kind, _, file_id = self.tree.focus().partition(":")
+        if kind == "file":
+            file_id = int(file_id)
+            if file_id not in self.match_offsets:
+                self.show_matches(file_id, 0)
+
+    def show_matches(self, file_id, offset):
+        """Read one page of the entry's matches, with their context, into the tree."""
+        parent = f"file:{file_id}"
+        self.tree.delete(*self.tree.get_children(parent))
+        self.match_offsets[file_id] = offset
+        matches = self.store.file_matches(file_id, offset, MATCH_PAGE)
+        if offset:
+            self.tree.insert(parent, "end", f"prev:{file_id}", tags=("more",),
+                             text=f"▲ Show previous {min(MATCH_PAGE, offset):,} matches")
+        for seq, (location, context, hits) in enumerate(materialize(matches), offset):
+            label = location_label(location)
+            distances = sorted({hit[3] for hit in hits if len(hit) > 3})
+            if distances:
+                label += f" (edits: {', '.join(map(str, distances))})"
+            self.tree.insert(parent, "end", f"match:{file_id}:{seq}", text=label, values=("", hit_line(context, hits)))
+        after = self.entry_counts.get(file_id, 0) - offset - len(matches)
+        if after > 0:
+            self.tree.insert(parent, "end", f"next:{file_id}", tags=("more",),
+                             text=f"▼ Show next {min(MATCH_PAGE, after):,} matches ({after:,} more)")
+
+    # ------------------------------
+    # Selection
+    # ------------------------------
+    def on_select(self, event=None):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        kind, *ids = selection[0].split(":")
+        if ids == ["files"]:
+            if kind == "prev":
+                self.show_files(self.file_offset - FILE_PAGE)
+            elif kind == "next":
+                self.show_files(self.file_offset + len(self.file_ids))
+        elif kind in ("prev", "next"):
+            file_id = int(ids[0])
+            offset = self.match_offsets[file_id] + (MATCH_PAGE if kind == "next" else -MATCH_PAGE)
+            self.show_matches(file_id, max(0, offset))
+            children = self.tree.get_children(f"file:{file_id}")
+            if children:
+                self.tree.see(children[0])
+        elif kind == "match":
+            self.show_detail(int(ids[0]), int(ids[1]))
+        elif kind == "file":
+            self.show_detail(int(ids[0]))
+
+    def show_detail(self, file_id, seq=None):
+        """Context of one match (read again from the file) or the summary of an entry, below the tree."""
+        self.detail.config(state="normal")
+        self.detail.delete(1.0, tk.END)
+        if file_id is not None and self.store is not None:
+            item = self.tree.item(f"file:{file_id}")
+            self.detail.insert(tk.END, f"📄 {item['text']}\n", "path")
+            if seq is None:
+                self.detail.insert(tk.END, f"   {self.entry_counts.get(file_id, 0):,} matches\n", "line")
+                copies = item['values'][1] if len(item['values']) > 1 else ""
+                if copies:
+                    self.detail.insert(tk.END, f"   Identical copies: {copies}\n")
+            else:
+                for location, context, hits in materialize(self.store.file_matches(file_id, seq, 1)):
+                    self.detail.insert(tk.END, f"   {location_label(location)}:\n", "line")
+                    start = self.detail.index("end-1c")
+                    self.detail.insert(tk.END, f"{context}\n")
+                    ranges = []
+                    for hit in hits:
+                        ranges += [f"{start}+{hit[1]}c", f"{start}+{hit[2]}c"]
+                    if ranges:
+                        self.detail.tag_add("highlight", *ranges)
+        self.detail.config(state="disabled")
+
+    # ------------------------------
+    # Path filter and "go to"
+    # ------------------------------
+    def schedule_filter(self):
+        """Filter while typing, once the entry has been still for FILTER_DELAY_MS."""
+        if self._filter_job is not None:
+            self.tree.after_cancel(self._filter_job)
+        self._filter_job = self.tree.after(FILTER_DELAY_MS, self.apply_filter)
+
+    def apply_filter(self):
+        self._filter_job = None
+        contains = self.filter_var.get().strip()
+        if contains != self.contains:
+            self.contains = contains
+            self.show_files(0)
+
+    def go_to(self, target):
+        """
+        Select the first entry whose path contains the text before the last
+        ':', opened at the first match on or after the line number that
+        follows it. ':line' alone (or a bare number) moves inside the selected
+        entry. Returns False when nothing matches.
+        """
+        if self.store is None:
+            return False
+        target = target.strip()
+        found = re.fullmatch(r"(.*):(\d+)", target) or re.fullmatch(r"()(\d+)", target)
+        path, line = (found.group(1), int(found.group(2))) if found else (target, None)
+        if path:
+            entries = self.store.files(contains=path, limit=1)
+            if not entries:
+                return False
+            file_id = entries[0][0]
+        else:
+            selection = self.tree.selection()
+            kind, *ids = selection[0].split(":") if selection else ("",)
+            if kind not in ("file", "match"):
+                return False
+            file_id = int(ids[0])
+
+        position = self.store.file_position(file_id, contains=self.contains)
+        if position is None:
+            # Filtered out: drop the filter rather than jump nowhere
+            self.filter_var.set("")
+            self.apply_filter()
+            position = self.store.file_position(file_id)
+            if position is None:
+                return False
+        item = f"file:{file_id}"
+        if not self.tree.exists(item):
+            # The row is needed right away: the whole page, not a slice
+            self.show_files(position - position % FILE_PAGE, sliced=False)
+        if line is not None:
+            count = self.entry_counts.get(file_id, 0)
+            seq = min(self.store.match_position(file_id, line), max(0, count - 1))
+            page = seq - seq % MATCH_PAGE
+            if self.match_offsets.get(file_id) != page:
+                self.show_matches(file_id, page)
+            self.tree.item(item, open=True)
+            if self.tree.exists(f"match:{file_id}:{seq}"):
+                item = f"match:{file_id}:{seq}"
+        self.tree.selection_set(item)
+        self.tree.focus(item)
+        self.tree.see(item)
+        return True
@@ -0,0 +1,345 @@
+import os
+import sys
+import json
+import bisect
+import shutil
+import argparse
+import multiprocessing
+from SearchHelper import iter_search, SearchSummary, PDF_TIMEOUT
+from SearchQuery import SearchQuery
+from PdfBackends import PDF_BACKENDS
+from FileWatchers import WATCH_BACKENDS
+from SearchMatch import context_blocks
+from ResultExport import EXPORT_FORMATS, match_records, copies_record
+
+# ------------------------------
+# Headless search from the command line
+# ------------------------------
+# No Tk, and document libraries (PyPDF2, openpyxl, ...) are only imported
+# when a file of that type is met, so plain-text searches start fast:
+#   python SearchCli.py needle C:\docs --ext .txt,.log
+#   python SearchCli.py -e error -e warning logs --format jsonl > hits.jsonl
+#   python SearchCli.py --watch ERROR /var/log/myapp --ext .log
+#   python SearchCli.py --fuzzy 2 receive src --format jsonl
+#
+# Exit status is grep's: 0 if something matched, 1 if nothing did, 2 on errors.
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+def parse_size(value):
+    """'512', '64K', '10M', '1.5G' -> bytes."""
+    text = value.strip().upper().rstrip("B")
+    unit = text[-1:] if text[-1:] in SIZE_UNITS else ""
+    try:
+        return int(float(text[:len(text) - len(unit)]) * SIZE_UNITS[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size '{value}' (e.g. 500K, 10M)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="SearchCli.py",
+        description="Search text in text, PDF, DOCX and XLSX files, streaming results to stdout.")
+    parser.add_argument("pattern", nargs="?", help="text to search (or use -e, repeatable)")
+    parser.add_argument("folder", nargs="?", default=".", help="folder to search (default: current folder)")
+
+    query = parser.add_argument_group("query")
+    query.add_argument("-e", "--regexp", dest="patterns", action="append", metavar="PATTERN",
+                       help="search this pattern too; all patterns are searched in one pass")
+    query.add_argument("-s", "--case-sensitive", action="store_true")
+    query.add_argument("-E", "--regex", action="store_true", help="patterns are regular expressions")
+    query.add_argument("-w", "--whole-word", action="store_true")
+    query.add_argument("--fuzzy", type=int, default=0, metavar="N",
+                       help="approximate matching: allow up to N inserted, deleted or substituted characters")
+
+    files = parser.add_argument_group("files")
+    files.add_argument("--ext", default="*", help="comma-separated extensions, e.g. .txt,.pdf (default: all)")
+    files.add_argument("--exclude", action="append", metavar="GLOB",
+                       help=".gitignore-style glob to skip (repeatable or comma-separated)")
+    files.add_argument("--no-recursive", action="store_true", help="do not enter subfolders")
+    files.add_argument("--max-depth", type=int, help="subfolder levels to enter")
+    files.add_argument("--follow-symlinks", action="store_true")
+    files.add_argument("--max-size", type=parse_size, help="skip bigger files (e.g. 10M)")
+    files.add_argument("--modified-since", metavar="YYYY-MM-DD", help="skip files modified before this date")
+    files.add_argument("--index", action="store_true", help="update and use the folder's search index")
+    files.add_argument("--dedup", choices=("all", "group"),
+                       help="search byte-identical files once and print their matches under every copy (all) "
+                            "or once, followed by the list of copies (group)")
+
+    output = parser.add_argument_group("output")
+    output.add_argument("--format", choices=("grep", "jsonl", "csv", "html"), default="grep",
+                        help="csv: one row per hit; html: a static report (see ResultExport)")
+    output.add_argument("-B", "--before-context", type=int, default=0, metavar="N")
+    output.add_argument("-A", "--after-context", type=int, default=0, metavar="N")
+    output.add_argument("-C", "--context", type=int, metavar="N", help="same as -B N -A N")
+    output.add_argument("-l", "--files-with-matches", action="store_true", help="only print the matching file names")
+    output.add_argument("-m", "--max-count", type=int, metavar="N", help="stop each file after N matches")
+    output.add_argument("--max-results", type=int, metavar="N", help="stop the search after N matches")
+    output.add_argument("--stats", action="store_true", help="print the search statistics to stderr")
+    output.add_argument("--progress", action="store_true", help="show live progress (MB/s, files/s) on stderr")
+    output.add_argument("--eta", action="store_true",
+                        help="list the files before searching, for a percentage and ETA (implies --progress)")
+    output.add_argument("--store", metavar="FILE",
+                        help="also save the results to this SQLite result store (replacing its content)")
+
+    engine = parser.add_argument_group("engine")
+    engine.add_argument("-j", "--workers", type=int, help="worker processes (default: CPU count, 1 = in-process)")
+    engine.add_argument("--pdf-backend", choices=["auto", *PDF_BACKENDS], help="PDF engine (default: pypdf2)")
+    engine.add_argument("--pdf-timeout", type=float, default=PDF_TIMEOUT,
+                        help=f"seconds before a PDF is abandoned, 0 = no limit (default: {PDF_TIMEOUT}; "
+                             "with -j 1 only checked between pages)")
+    engine.add_argument("--profile", metavar="FILE", help="save cProfile stats of the search")
+
+    watch = parser.add_argument_group("watch")
+    watch.add_argument("--watch", action="store_true",
+                       help="after the search, keep watching and print new matches until Ctrl+C")
+    watch.add_argument("--watch-backend", choices=["auto", *WATCH_BACKENDS], default="auto",
+                       help="change notifications (default: inotify where available, else polling)")
+    watch.add_argument("--watch-interval", type=float, default=2.0, metavar="SECONDS",
+                       help="seconds between two polls with the poll backend (default: 2)")
+    return parser
+
+# ------------------------------
+# Output formats
+# ------------------------------
+def format_jsonl(file_path, matches, files_only):
+    if files_only:
+        return json.dumps({"type": "file", "path": file_path}, ensure_ascii=False) + "\n"
+    lines = [json.dumps(record, ensure_ascii=False) for record in match_records(file_path, matches)]
+    return "\n".join(lines) + "\n"
+
+def format_grep(file_path, matches, files_only, with_context, after_block=False):
+    """
+    path:location:line for lines with hits, path-location-line for context
+    lines, '--' between blocks; after_block (a block of an earlier file was
+    printed) puts one before the first block too, as grep does across files.
+    Like grep -C, the overlapping contexts of a
+    text file are merged into one block, so no line is printed twice.
+    Context lines of text files and DOCX get their own line/paragraph
+    number; PDF pages and XLSX cells keep the match location.
+    """
+    if files_only:
+        return file_path + "\n"
+    numbered = not file_path.lower().endswith(".pdf")
+    out = []
+    for block in context_blocks(matches):
+        location, hits = block.location, block.hits
+        if with_context and (out or after_block):
+            out.append("--")
+        lines = block.text.split("\n")
+        line_starts = []
+        offset = 0
+        for line in lines:
+            line_starts.append(offset)
+            offset += len(line) + 1
+        hit_rows = {bisect.bisect_right(line_starts, hit[1]) - 1 for hit in hits}
+        first_hit_row = min(hit_rows, default=0)
+        for row, line in enumerate(lines):
+            has_hit = row in hit_rows
+            if has_hit or with_context:
+                separator = ":" if has_hit else "-"
+                if block.first_line is not None:
+                    line_location = block.first_line + row
+                elif numbered and isinstance(location, int):
+                    line_location = location + row - first_hit_row
+                else:
+                    line_location = location
+                out.append(f"{file_path}{separator}{line_location}{separator}{line}")
+    return "\n".join(out) + "\n" if out else ""
+
+def format_copies(file_path, copies, output_format):
+    """--dedup group: name the identical copies of a file once, after its matches."""
+    if output_format == "jsonl":
+        return json.dumps(copies_record(file_path, copies), ensure_ascii=False) + "\n"
+    noun = "copy" if len(copies) == 1 else "copies"
+    return f"{file_path}: {len(copies)} identical {noun}: {', '.join(copies)}\n"
+
+def update_jsonl(update):
+    """Watch mode: an 'update' record for the changed file, then its new matches."""
+    return json.dumps({
+        "type": "update",
+        "reason": update.reason,
+        "path": update.file_path,
+        "matches": sum(len(matches) for _, matches in update.entries),
+    }, ensure_ascii=False) + "\n"
+
+def summary_json(summary):
+    return json.dumps({
+        "type": "summary",
+        "files": summary.total_files,
+        "files_with_matches": summary.files_with_matches,
+        "matches": summary.total_matches,
+        "stopped": summary.stopped,
+        "limit_reached": summary.limit_reached,
+        "duplicate_files": summary.duplicate_files,
+        "errors": summary.stats.error_count,
+        "seconds": round(summary.stats.wall_seconds, 3),
+    }) + "\n"
+
+def progress_line(stream):
+    """--progress: a progress callback that keeps rewriting one line of stream."""
+    width = max(20, shutil.get_terminal_size().columns - 1)
+
+    def show(progress):
+        line = progress.summary()
+        if progress.current_file:
+            line += f" - {os.path.basename(progress.current_file)}"
+        stream.write("\r" + line[:width].ljust(width))
+        if progress.phase == "done":
+            stream.write("\n")
+        stream.flush()
+    return show
+
+# ------------------------------
+# Entry point
+# ------------------------------
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.patterns:
+        # Like grep: with -e the first positional argument is the folder
+        if args.pattern is not None and args.folder != ".":
+            parser.error("give the patterns either with -e or as the first argument, not both")
+        patterns = args.patterns
+        folder = args.pattern if args.pattern is not None else "."
+    elif args.pattern is not None:
+        patterns = [args.pattern]
+        folder = args.folder
+    else:
+        parser.error("no pattern given")
+    if not os.path.isdir(folder):
+        parser.error(f"folder not found: {folder}")
+    if args.watch and args.max_results:
+        parser.error("--max-results cannot be combined with --watch")
+
+    lines_before = args.context if args.context is not None else args.before_context
+    lines_after = args.context if args.context is not None else args.after_context
+    try:
+        query = SearchQuery(patterns, args.case_sensitive, args.regex, args.whole_word, args.fuzzy)
+    except Exception as e:
+        parser.error(f"invalid pattern: {e}")
+
+    # Results go to stdout unchanged on every platform; undecodable names are replaced
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace", newline="\n")
+    store = None
+    if args.store:
+        from ResultStore import ResultStore
+        store = ResultStore(args.store)
+        store.clear()
+    exclude = ",".join(args.exclude) if args.exclude else None
+    index = None
+    if args.index:
+        from SearchIndex import SearchIndex
+        index = SearchIndex(folder)
+        # Only what this search will look at: excluded folders are not read
+        index.update(extensions=args.ext, recursive=not args.no_recursive, exclude=exclude, max_size=args.max_size,
+                     modified_since=args.modified_since, max_depth=args.max_depth, follow_symlinks=args.follow_symlinks)
+
+    options = dict(
+        workers=args.workers, index=index, exclude=exclude,
+        max_size=args.max_size, modified_since=args.modified_since, max_depth=args.max_depth,
+        follow_symlinks=args.follow_symlinks, pdf_backend=args.pdf_backend, pdf_timeout=args.pdf_timeout or None,
+        files_with_matches_only=args.files_with_matches, max_matches_per_file=args.max_count, profile=args.profile,
+        dedup=args.dedup, progress=progress_line(sys.stderr) if args.progress or args.eta else None,
+        precount=args.eta)
+    if args.watch:
+        from SearchWatcher import SearchWatcher, WatchUpdate
+        watcher = SearchWatcher(folder, query, args.ext, args.case_sensitive, not args.no_recursive,
+                                lines_before, lines_after, backend=args.watch_backend,
+                                interval=args.watch_interval, **options)
+        results = watcher.run()
+    else:
+        results = iter_search(folder, query, args.ext, args.case_sensitive, not args.no_recursive,
+                              lines_before, lines_after, max_total_results=args.max_results, **options)
+
+    exporter = None
+    if args.format in ("csv", "html"):
+        # Structured reports, written as the results come like the other formats
+        exporter = EXPORT_FORMATS[args.format](sys.stdout, f"Search results for {', '.join(patterns)} in {folder}")
+        exporter.begin()
+
+    printed_block = False  # grep output: a context block was printed, the next file's starts with '--'
+
+    def write(file_path, matches, copies=None):
+        nonlocal printed_block
+        if exporter is not None:
+            exporter.add(file_path, matches, copies)
+            return
+        if args.format == "jsonl":
+            sys.stdout.write(format_jsonl(file_path, matches, args.files_with_matches))
+        else:
+            text = format_grep(file_path, matches, args.files_with_matches, lines_before or lines_after, printed_block)
+            printed_block = printed_block or bool(text)
+            sys.stdout.write(text)
+        if copies:
+            sys.stdout.write(format_copies(file_path, copies, args.format))
+
+    summary = None
+    matched = False
+    try:
+        for item in results:
+            if isinstance(item, SearchSummary):
+                summary = item
+                matched = summary.total_matches > 0
+                if store is not None:
+                    store.commit()
+                if not args.watch:
+                    break
+                if args.format == "jsonl":
+                    sys.stdout.write(summary_json(summary))
+                if args.stats:
+                    print(summary.stats.report(), file=sys.stderr)
+                sys.stdout.flush()
+                continue
+            if args.watch and isinstance(item, WatchUpdate):
+                # Only what was not printed before: new lines of a log, a new or rewritten file
+                if args.format == "jsonl":
+                    sys.stdout.write(update_jsonl(item))
+                if store is not None:
+                    # The store keeps the current results of the file, not only the new ones
+                    store.remove(item.file_path)
+                    for file_path, matches in item.entries:
+                        store.add(file_path, matches)
+                    store.commit()
+                for file_path, matches in item.new_entries:
+                    write(file_path, matches)
+                    matched = True
+            else:
+                write(*item, getattr(item, "copies", None))
+                if store is not None:
+                    store.add(*item, getattr(item, "copies", None))
+            sys.stdout.flush()  # stream each file as soon as it is done
+    except KeyboardInterrupt:
+        results.close()
+        if args.watch and summary is not None:
+            if exporter is not None:
+                exporter.end()
+            return 0 if matched else 1  # Ctrl+C is how watch mode ends
+        return 130
+    except BrokenPipeError:
+        # Output closed early (e.g. piped into head): stop quietly
+        results.close()
+        sys.stdout = open(os.devnull, "w")
+        return 0
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if index is not None:
+            index.close()
+        if store is not None:
+            store.close()
+
+    if args.format == "jsonl":
+        sys.stdout.write(summary_json(summary))
+    elif exporter is not None:
+        exporter.end()
+    if args.stats:
+        print(summary.stats.report(), file=sys.stderr)
+    if summary.stats.error_count:
+        return 2
+    return 0 if summary.total_matches else 1
+
+if __name__ == "__main__":
+    # Needed by the searcher process pool in frozen (pyinstaller) builds
+    multiprocessing.freeze_support()
+    sys.exit(main())
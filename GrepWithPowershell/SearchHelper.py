@@ -1,130 +1,967 @@
+import io
 import os
-import PyPDF2
-from docx import Document
-import openpyxl
+import re
+import mmap
+import time
+import cProfile
+import multiprocessing
+from multiprocessing.util import Finalize
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from TextCache import get_text_cache
+from SearchQuery import SearchQuery, as_query
+from FileWalker import walk_files, parse_extensions
+from OfficeReaders import xlsx_could_match, iter_xlsx_cells, iter_docx_paragraphs
+from PdfBackends import PdfBackend, get_pdf_backend
+from SearchStats import FileStats, SearchStats, SearchProgress, report_error, timed_extract, file_type_of
+from ArchiveReaders import is_archive, iter_archive, read_member
+from SearchMatch import Match, MatchFile, file_stamp, shift_hits, for_copy
+from ContentHashes import unique_files, open_hash_cache, DuplicateResult
+from SearchJobs import CancelToken, until_cancelled
+
+# ------------------------------
+# Text extraction
+# ------------------------------
+def _iter_cached(file_path, kind, reader, prefilter=None):
+    """
+    Lazily yield the units of file_path through the text cache, so only the
+    first full read of a file pays for extraction. On a miss the units go to
+    a CacheWriter as they are read, which keeps one chunk of them in memory,
+    and are only stored once they have been read to the end, so stopping
+    early never leaves a partial entry behind. On a cache miss, prefilter()
+    returning False skips the file. In-memory archive members (not paths)
+    bypass the cache.
+    """
+    cache = get_text_cache() if isinstance(file_path, str) else None
+    units = cache.iter_units(file_path, kind) if cache else None
+    if units is not None:
+        yield from units
+        return
+    if prefilter is not None and not prefilter():
+        return
+    writer = cache.writer(file_path, kind) if cache else None
+    if writer is None:
+        yield from reader(file_path)
+        return
+    try:
+        for unit in reader(file_path):
+            writer.add(unit)
+            yield unit
+        writer.commit()
+    finally:
+        writer.discard()
+
+def _pdf_cache_kind(backend, pages=None):
+    kind = f"pdf-pages-{backend.name}"
+    return f"{kind}-{pages[0]}-{pages[1]}" if pages else kind
+
+def iter_pdf_pages(file_path, backend=None, pages=None):
+    """
+    Lazily yield (page_num, text) for the PDF pages that have text, through the text cache.
+
+    - backend: PdfBackend instance or name (default PyPDF2, see PdfBackends)
+    - pages: optional (first, last) page range, 1-based and inclusive
+    """
+    if not isinstance(backend, PdfBackend):
+        backend = get_pdf_backend(backend)
+    first, last = pages or (1, None)
+    return _iter_cached(file_path, _pdf_cache_kind(backend, pages),
+                        lambda path: backend.iter_pages(path, first, last))
+
+def iter_docx_paragraph_texts(file_path):
+    """Lazily yield the text of every DOCX paragraph (body, tables, headers, footers, notes), in order."""
+    return _iter_cached(file_path, "docx-parts", iter_docx_paragraphs)
+
+def iter_xlsx_cell_values(file_path, query=None, cancel=None):
+    """
+    Lazily yield (sheet_title, coordinate, cell_str) for every non-empty XLSX cell.
+    With a query, a workbook that is not cached yet and cannot match it
+    (see xlsx_could_match) is skipped without being loaded.
+    """
+    prefilter = (lambda: xlsx_could_match(file_path, query, cancel)) if query is not None else None
+    return _iter_cached(file_path, "xlsx-cells", iter_xlsx_cells, prefilter)
+
+def extract_pdf_pages(file_path, backend=None):
+    """Return [(page_num, text), ...] for every PDF page that has text."""
+    return list(iter_pdf_pages(file_path, backend))
+
+def extract_docx_paragraphs(file_path):
+    """Return the text of every DOCX paragraph, in order."""
+    return list(iter_docx_paragraph_texts(file_path))
+
+def extract_xlsx_cells(file_path):
+    """Return [(sheet_title, coordinate, cell_str), ...] for every non-empty XLSX cell."""
+    return list(iter_xlsx_cell_values(file_path))
+
+# Plain files are read for the index in blocks of this many characters
+TEXT_BLOCK_CHARS = 1024 * 1024
+
+def iter_text(file_path):
+    """
+    Lazily yield the searchable text of a file in consecutive pieces: every
+    page / paragraph / cell of a document followed by a newline, or blocks of
+    TEXT_BLOCK_CHARS characters of a plain file. Binary files (a NUL byte in
+    their first block, as the search checks) give nothing. Used to build the
+    search index.
+    """
+    lower_path = file_path.lower()
+    if lower_path.endswith('.pdf'):
+        for _, text in iter_pdf_pages(file_path):
+            yield text + "\n"
+        return
+    if lower_path.endswith('.docx'):
+        for text in iter_docx_paragraph_texts(file_path):
+            yield text + "\n"
+        return
+    if lower_path.endswith('.xlsx'):
+        for _, _, cell_str in iter_xlsx_cell_values(file_path):
+            yield cell_str + "\n"
+        return
+    with open(file_path, "rb") as raw:
+        if b"\0" in raw.read(BINARY_SNIFF_BYTES):
+            return
+        raw.seek(0)
+        f = io.TextIOWrapper(raw, encoding="utf-8", errors="ignore")
+        while True:
+            block = f.read(TEXT_BLOCK_CHARS)
+            if not block:
+                return
+            yield block
+
+def extract_text(file_path):
+    """Return the whole searchable text of a file as one string (see iter_text)."""
+    return "".join(iter_text(file_path))
+
+# ------------------------------
+# Match context
+# ------------------------------
+def _line_context(lines, i, lines_before, lines_after, hits):
+    """
+    Join the lines around lines[i] with newlines and move the hit spans
+    from line offsets to context offsets.
+    """
+    start = max(0, i - lines_before)
+    end = min(len(lines), i + lines_after + 1)
+    context = "\n".join(lines[start:end])
+    offset = sum(len(line) + 1 for line in lines[start:i])
+    return context, [(hit[0], offset + hit[1], offset + hit[2], *hit[3:]) for hit in hits]
+
+def _iter_line_matches(lines, query, lines_before, lines_after):
+    """
+    Lazy version of the line loop over any iterable of lines: yields
+    (index, context, hits) while keeping only lines_before + lines_after + 1
+    lines in memory. A match is emitted once its lines_after lines are read.
+    """
+    window = deque(maxlen=lines_before + lines_after + 1)  # (index, line)
+    pending = deque()  # (index, hits) waiting for their lines after
+
+    def emit(match_index, hits):
+        window_lines = [line for _, line in window]
+        context, hits = _line_context(window_lines, match_index - window[0][0], lines_before, lines_after, hits)
+        return match_index, context, hits
+
+    for index, line in enumerate(lines):
+        window.append((index, line))
+        while pending and pending[0][0] + lines_after <= index:
+            yield emit(*pending.popleft())
+        hits = query.search_line(line)
+        if hits:
+            if lines_after == 0:
+                yield emit(index, hits)
+            else:
+                pending.append((index, hits))
+    while pending:
+        yield emit(*pending.popleft())
 
 # ------------------------------
 # File-specific search functions
 # ------------------------------
-def search_pdf(file_path, search_text, case_sensitive, lines_before=2, lines_after=2):
+# Every handler returns [(line_or_page, context, hits), ...] where hits is
+# [(pattern, start, end), ...] with offsets into context.
+# Plain text files return SearchMatch.Match records instead, which index
+# the same way but only build their context when it is read.
+# search_text is a plain string or a SearchQuery.
+# cancel is an optional SearchJobs.CancelToken, checked as the file is read;
+# a cancelled handler returns what it found so far.
+
+def search_pdf(file_path, search_text, case_sensitive, lines_before=2, lines_after=2,
+               backend=None, pages=None, max_matches=None, timeout=None, cancel=None):
+    """
+    Pages are extracted lazily, so the search stops as soon as max_matches
+    hits are found or timeout seconds have been spent on the document
+    (checked between pages). pages=(first, last) limits it to a page range.
+    """
     matches = []
+    query = as_query(search_text, case_sensitive)
+    deadline = time.monotonic() + timeout if timeout else None
     try:
-        with open(file_path, "rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            for page_num, page in enumerate(reader.pages, start=1):
-                text = page.extract_text()
-                if not text:
-                    continue
-                lines = text.replace("\r", "\n").split("\n")
-                if len(lines) < 3:
-                    lines = text.split(". ")
-                for i, line in enumerate(lines):
-                    line_to_search = line if case_sensitive else line.lower()
-                    search_to_find = search_text if case_sensitive else search_text.lower()
-                    if search_to_find in line_to_search:
-                        start = max(0, i - lines_before)
-                        end = min(len(lines), i + lines_after + 1)
-                        context = "\n".join(lines[start:end])
-                        matches.append((page_num, context))
+        for page_num, text in until_cancelled(timed_extract(iter_pdf_pages(file_path, backend, pages)), cancel):
+            lines = text.split("\n")
+            if len(lines) < 3:
+                lines = text.split(". ")
+            for i, line in enumerate(lines):
+                hits = query.search_line(line)
+                if hits:
+                    context, hits = _line_context(lines, i, lines_before, lines_after, hits)
+                    matches.append((page_num, context, hits))
+                    if max_matches and len(matches) >= max_matches:
+                        return matches
+            if deadline and time.monotonic() > deadline:
+                report_error("timeout", file_path, f"stopped at page {page_num} after {timeout}s",
+                             log=f"PDF timeout after {timeout}s, stopped at page {page_num}: {file_path}")
+                break
     except Exception as e:
-        print(f"Error reading PDF {file_path}: {e}")
+        report_error("pdf", file_path, e)
     return matches
 
-def search_docx(file_path, search_text, case_sensitive, lines_before=2, lines_after=2):
+def search_docx(file_path, search_text, case_sensitive, lines_before=2, lines_after=2, max_matches=None,
+                cancel=None):
+    """Paragraphs are read lazily, so the search stops once max_matches hits are found."""
     matches = []
+    query = as_query(search_text, case_sensitive)
     try:
-        doc = Document(file_path)
-        all_lines = [para.text for para in doc.paragraphs]
-        for i, line in enumerate(all_lines):
-            line_to_search = line if case_sensitive else line.lower()
-            search_to_find = search_text if case_sensitive else search_text.lower()
-            if search_to_find in line_to_search:
-                start = max(0, i - lines_before)
-                end = min(len(all_lines), i + lines_after + 1)
-                context = "\n".join(all_lines[start:end])
-                matches.append((i + 1, context))
+        paragraphs = until_cancelled(timed_extract(iter_docx_paragraph_texts(file_path)), cancel)
+        for i, context, hits in _iter_line_matches(paragraphs, query, lines_before, lines_after):
+            matches.append((i + 1, context, hits))
+            if max_matches and len(matches) >= max_matches:
+                break
     except Exception as e:
-        print(f"Error reading DOCX {file_path}: {e}")
+        report_error("docx", file_path, e)
     return matches
 
-def search_xlsx(file_path, search_text, case_sensitive):
+def search_xlsx(file_path, search_text, case_sensitive, max_matches=None, cancel=None):
+    """
+    Matches are reported at 'Sheet!B7' locations, with the cell value as context.
+    Cells are streamed, so the search stops once max_matches hits are found.
+    """
     matches = []
+    query = as_query(search_text, case_sensitive)
     try:
-        wb = openpyxl.load_workbook(file_path, data_only=True)
-        for sheet in wb.worksheets:
-            for row in sheet.iter_rows(values_only=True):
-                for cell in row:
-                    if cell is None:
-                        continue
-                    cell_str = str(cell)
-                    cell_to_search = cell_str if case_sensitive else cell_str.lower()
-                    search_to_find = search_text if case_sensitive else search_text.lower()
-                    if search_to_find in cell_to_search:
-                        matches.append((sheet.title, cell_str))
+        cells = until_cancelled(timed_extract(iter_xlsx_cell_values(file_path, query, cancel)), cancel)
+        for sheet_title, coordinate, cell_str in cells:
+            hits = query.search_line(cell_str)
+            if hits:
+                matches.append((f"{sheet_title}!{coordinate}", cell_str, hits))
+                if max_matches and len(matches) >= max_matches:
+                    break
     except Exception as e:
-        print(f"Error reading XLSX {file_path}: {e}")
+        report_error("xlsx", file_path, e)
     return matches
 
 # ------------------------------
-# Generic searcher function
+# Plain text search
 # ------------------------------
-def searcher(folder, search_text, extensions="*", case_sensitive=False, recursive=True, lines_before=2, lines_after=2, stop_flag=None):
+BINARY_SNIFF_BYTES = 8192
+NEWLINE_COUNT_CHUNK = 1024 * 1024
+# Bytes looked through between two checks of the cancel token
+SCAN_SLICE = 16 * 1024 * 1024
+
+def _count_newlines(buf, start, end):
+    """Count newlines in buf[start:end] without copying the whole range at once."""
+    count = 0
+    for chunk_start in range(start, end, NEWLINE_COUNT_CHUNK):
+        count += buf[chunk_start:min(end, chunk_start + NEWLINE_COUNT_CHUNK)].count(b"\n")
+    return count
+
+def _scan_buffer(buf, query, source, max_matches=None, start=0, first_line=1, cancel=None):
     """
-    Search text in multiple file types inside a folder (with optional recursion).
-    Returns a list of results:
-        [(file_path, [(line_or_page, context), ...]), ...]
-    
-    - extensions: comma-separated list (e.g. ".txt,.py,.pdf,.docx,.xlsx") or "*" for all
-    - stop_flag: optional mutable object (e.g. dict) to stop search externally: {'stop': True}
+    Byte-level scan of a mapped file from byte start (the beginning of line
+    first_line); one lazy Match per hit line, like the line loop. Only the
+    hit lines are decoded: contexts are read back from source when shown.
+    Regex queries have no byte finder, so every line is a candidate.
+    Stops as soon as max_matches lines matched, or when cancel is cancelled
+    (checked every SCAN_SLICE bytes, even where there are no hits).
     """
-    if extensions == "*" or extensions == "":
-        ext_list = None
-    else:
-        ext_list = [("." + ext.strip().lstrip(".")).lower() for ext in extensions.split(",") if ext.strip()]
+    matches = []
+    finder = query.byte_finder(buf)
+    size = len(buf)
+    line_no = first_line
+    counted_to = start
+    pos = start
+    while pos < size:
+        if cancel is not None and cancel.cancelled:
+            break
+        if finder:
+            slice_end = min(size, pos + SCAN_SLICE)
+            hit = finder.find(pos, slice_end)
+            if hit == -1:
+                pos = slice_end
+                continue
+        else:
+            hit = pos
+        line_start = buf.rfind(b"\n", 0, hit) + 1
+        line_end = buf.find(b"\n", hit)
+        line_end = size if line_end == -1 else line_end + 1
+        line_no += _count_newlines(buf, counted_to, line_start)
+        counted_to = line_start
 
-    results = []
-    total_files = 0
-    total_matches = 0
+        hits = query.search_line(buf[line_start:line_end].decode("utf-8", errors="ignore"))
+        if hits:
+            matches.append(Match(source, line_no, line_start, hits))
+            if max_matches and len(matches) >= max_matches:
+                break
+        pos = line_end
+    return matches
+
+def _search_text_lines(file_path, query, lines_before, lines_after, max_matches=None, cancel=None):
+    """Line-by-line fallback for files that cannot be memory-mapped."""
+    matches = []
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        lines = f.readlines()
+        for i, line in until_cancelled(enumerate(lines), cancel):
+            hits = query.search_line(line)
+            if hits:
+                start = max(0, i - lines_before)
+                end = min(len(lines), i + lines_after + 1)
+                full = "".join(lines[start:end])
+                offset = sum(len(prev) for prev in lines[start:i]) - (len(full) - len(full.lstrip()))
+                matches.append((i + 1, full.strip(), shift_hits(hits, offset)))
+                if max_matches and len(matches) >= max_matches:
+                    break
+    return matches
+
+def search_text_file(file_path, search_text, case_sensitive, lines_before=2, lines_after=2, max_matches=None,
+                     cancel=None):
+    """
+    Memory-map the file and search its bytes, decoding only the lines with
+    hits; their context is read back from the file when shown (see
+    SearchMatch.Match). Files with a NUL byte in their first block are treated as
+    binary and skipped. The scan stops once max_matches lines matched.
+    """
+    matches = []
+    query = as_query(search_text, case_sensitive)
+    try:
+        with open(file_path, "rb") as f:
+            if b"\0" in f.read(BINARY_SNIFF_BYTES):
+                return matches
+            st = os.fstat(f.fileno())
+            if st.st_size == 0:
+                return matches
+            try:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                buf = None
+            if buf is not None:
+                with buf:
+                    return _scan_buffer(buf, query, MatchFile(file_path, lines_before, lines_after, file_stamp(st)),
+                                        max_matches, cancel=cancel)
+        matches = _search_text_lines(file_path, query, lines_before, lines_after, max_matches, cancel)
+    except Exception as e:
+        report_error("text", file_path, e, log=f"Cannot open {file_path}: {e}")
+    return matches
 
-    for root_dir, _, files in os.walk(folder):
-        if stop_flag and stop_flag.get('stop'):
+def search_text_range(file_path, search_text, case_sensitive, lines_before=2, lines_after=2,
+                      start=0, first_line=1, max_matches=None):
+    """
+    Search a text file from byte offset start (the beginning of line
+    first_line) to its end, e.g. the part of a log appended since the last
+    search. Contexts can still reach above start.
+    """
+    query = as_query(search_text, case_sensitive)
+    try:
+        with open(file_path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if st.st_size <= start:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return _scan_buffer(buf, query, MatchFile(file_path, lines_before, lines_after, file_stamp(st)),
+                                    max_matches, start, first_line)
+    except Exception as e:
+        report_error("text", file_path, e, log=f"Cannot open {file_path}: {e}")
+        return []
+
+# ------------------------------
+# Archives and compressed files
+# ------------------------------
+def _search_text_stream(stream, query, lines_before, lines_after, max_matches=None, cancel=None):
+    """
+    Line-by-line search of a binary stream (decompressed archive member),
+    keeping only the context window in memory. Binary members are skipped.
+    """
+    matches = []
+    if not hasattr(stream, "peek"):
+        stream = io.BufferedReader(stream)
+    if b"\0" in stream.peek(BINARY_SNIFF_BYTES)[:BINARY_SNIFF_BYTES]:
+        return matches
+    lines = until_cancelled((line.decode("utf-8", errors="ignore").rstrip("\r\n") for line in stream), cancel)
+    for i, context, hits in _iter_line_matches(lines, query, lines_before, lines_after):
+        matches.append((i + 1, context.strip(), shift_hits(hits, len(context.lstrip()) - len(context))))
+        if max_matches and len(matches) >= max_matches:
             break
-        for filename in files:
-            if stop_flag and stop_flag.get('stop'):
-                break
-            if ext_list and not any(filename.lower().endswith(ext) for ext in ext_list):
+    return matches
+
+def search_member(member_path, inner_name, stream, search_text, case_sensitive, lines_before=2, lines_after=2,
+                  max_matches=None, pdf_backend=None, pdf_timeout=None, cancel=None):
+    """
+    Search one archive member with the handler of its own type. Text is
+    streamed; PDF, DOCX and XLSX members are read into memory first (see
+    ArchiveReaders.MAX_MEMBER_IN_MEMORY) since their readers need to seek.
+    """
+    lower_name = inner_name.lower()
+    if lower_name.endswith(('.pdf', '.docx', '.xlsx')):
+        member = read_member(stream, member_path)
+        if lower_name.endswith('.pdf'):
+            return search_pdf(member, search_text, case_sensitive, lines_before, lines_after,
+                              backend=pdf_backend, max_matches=max_matches, timeout=pdf_timeout, cancel=cancel)
+        if lower_name.endswith('.docx'):
+            return search_docx(member, search_text, case_sensitive, lines_before, lines_after, max_matches, cancel)
+        return search_xlsx(member, search_text, case_sensitive, max_matches, cancel)
+    query = as_query(search_text, case_sensitive)
+    return _search_text_stream(stream, query, lines_before, lines_after, max_matches, cancel)
+
+def search_archive(file_path, search_text, case_sensitive, lines_before=2, lines_after=2,
+                   max_matches=None, pdf_backend=None, pdf_timeout=None, cancel=None):
+    """
+    Search every member of a .zip / .tar(.gz/.bz2/.xz) archive or a single
+    .gz / .bz2 / .xz file, one member at a time and without extracting to disk.
+    Returns [(member_path, matches), ...] for the members with matches,
+    where member_path looks like 'archive.zip!/inner/path.txt'.
+    max_matches applies to each member.
+    """
+    results = []
+    query = as_query(search_text, case_sensitive)
+
+    def member_error(member_path, error):
+        report_error("archive", member_path, error)
+
+    try:
+        # A broken nested archive is reported on its own; the members after it are still searched
+        for member_path, inner_name, stream in until_cancelled(iter_archive(file_path, member_error), cancel):
+            try:
+                matches = search_member(member_path, inner_name, stream, query, case_sensitive,
+                                        lines_before, lines_after, max_matches, pdf_backend, pdf_timeout, cancel)
+            except Exception as e:
+                report_error("archive", member_path, e)
                 continue
-            file_path = os.path.join(root_dir, filename)
-            total_files += 1
-            matches = []
-
-            if filename.lower().endswith('.pdf'):
-                matches = search_pdf(file_path, search_text, case_sensitive, lines_before, lines_after)
-            elif filename.lower().endswith('.docx'):
-                matches = search_docx(file_path, search_text, case_sensitive, lines_before, lines_after)
-            elif filename.lower().endswith('.xlsx'):
-                matches = search_xlsx(file_path, search_text, case_sensitive)
+            if matches:
+                results.append((member_path, matches))
+    except Exception as e:
+        report_error("archive", file_path, e)
+    return results
+
+# ------------------------------
+# Single file dispatcher
+# ------------------------------
+def search_file(file_path, search_text, case_sensitive, lines_before=2, lines_after=2,
+                max_matches=None, pdf_backend=None, pdf_timeout=None, pdf_pages=None, cancel=None):
+    """
+    Search a single file, picking the handler from its extension.
+    Module-level so it can be pickled and sent to worker processes.
+    max_matches stops the handler as soon as that many matches are found.
+    """
+    lower_path = file_path.lower()
+    if lower_path.endswith('.pdf'):
+        return search_pdf(file_path, search_text, case_sensitive, lines_before, lines_after, backend=pdf_backend,
+                          pages=pdf_pages, max_matches=max_matches, timeout=pdf_timeout, cancel=cancel)
+    if lower_path.endswith('.docx'):
+        return search_docx(file_path, search_text, case_sensitive, lines_before, lines_after, max_matches, cancel)
+    if lower_path.endswith('.xlsx'):
+        return search_xlsx(file_path, search_text, case_sensitive, max_matches, cancel)
+    return search_text_file(file_path, search_text, case_sensitive, lines_before, lines_after, max_matches, cancel)
+
+_worker_profiler = None  # in worker processes of a profiled search
+_worker_cancel = None    # the pool's CancelToken, in worker processes
+
+def _init_worker(shared_cancel, profile=None):
+    """
+    Pool initializer. With profile (a path), the worker profiles every file
+    it searches and writes its stats once, to '<profile>.worker-<pid>',
+    when it exits at pool shutdown (a worker killed for a stuck PDF writes none).
+    """
+    global _worker_cancel, _worker_profiler
+    _worker_cancel = CancelToken(shared=shared_cancel)
+    if profile:
+        _worker_profiler = cProfile.Profile()
+        # Run by multiprocessing as the worker exits; atexit is not, in forked workers
+        Finalize(None, _worker_profiler.dump_stats, args=(f"{profile}.worker-{os.getpid()}",), exitpriority=0)
+
+def search_file_timed(file_path, *args, cancel=None, **kwargs):
+    """
+    Search one file and return ([(path, matches), ...], file_stats).
+    A plain file gives one (file_path, matches) entry; an archive gives
+    one entry per member with matches (see search_archive).
+    In worker processes cancel defaults to the token of the pool, and the
+    search is profiled when the pool was started with a profile path.
+    """
+    if cancel is None:
+        cancel = _worker_cancel
+    file_stats = FileStats(file_path)
+    if _worker_profiler:
+        _worker_profiler.enable()
+    try:
+        with file_stats.active():
+            if is_archive(file_path):
+                entries = search_archive(file_path, *args, cancel=cancel, **kwargs)
             else:
-                # Plain text files
-                try:
-                    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                        lines = f.readlines()
-                        for i, line in enumerate(lines):
-                            line_to_search = line if case_sensitive else line.lower()
-                            search_to_find = search_text if case_sensitive else search_text.lower()
-                            if search_to_find in line_to_search:
-                                start = max(0, i - lines_before)
-                                end = min(len(lines), i + lines_after + 1)
-                                context = "".join(lines[start:end]).strip()
-                                matches.append((i + 1, context))
-                except Exception as e:
-                    print(f"Cannot open {file_path}: {e}")
+                entries = [(file_path, search_file(file_path, *args, cancel=cancel, **kwargs))]
+    finally:
+        if _worker_profiler:
+            _worker_profiler.disable()
+    return entries, file_stats
 
-            if matches:
-                total_matches += len(matches)
-                results.append((file_path, matches))
+# ------------------------------
+# Parallel execution
+# ------------------------------
+# PDFs at least this big are split into page ranges searched by several workers
+PDF_SPLIT_MIN_BYTES = 8 * 1024 * 1024
+PDF_PAGES_PER_TASK = 16
+# How often the main process looks at the stop flag while waiting for a worker
+COLLECT_POLL_SECONDS = 0.02
 
-        if not recursive:
-            break
+def _pdf_page_ranges(file_path, pdf_backend):
+    """Page ranges to search a big PDF in parallel, or None to search it as one task."""
+    if not file_path.lower().endswith('.pdf'):
+        return None
+    try:
+        if os.path.getsize(file_path) < PDF_SPLIT_MIN_BYTES:
+            return None
+        backend = get_pdf_backend(pdf_backend)
+        cache = get_text_cache()
+        if cache and cache.has(file_path, _pdf_cache_kind(backend)):
+            return None  # the whole text is cached, splitting would only re-extract it
+        page_count = backend.page_count(file_path)
+    except Exception:
+        return None
+    if page_count <= PDF_PAGES_PER_TASK:
+        return None
+    return [(first, min(first + PDF_PAGES_PER_TASK - 1, page_count))
+            for first in range(1, page_count + 1, PDF_PAGES_PER_TASK)]
+
+# A PDF task still running this long after its pdf_timeout is stuck inside one page
+# (the timeout itself is checked between pages, in the worker)
+PDF_TIMEOUT_GRACE = 5.0
+
+class _PoolContext:
+    """
+    The multiprocessing context given to a search's ProcessPoolExecutor
+    (mp_context): it keeps the worker processes it starts, so the pool can
+    be killed with a task stuck in a PDF page (a running task cannot be
+    cancelled, and the executor has no public way to kill its workers).
+    """
+
+    def __init__(self):
+        self._context = multiprocessing.get_context()
+        self.processes = []
+
+    def Process(self, *args, **kwargs):
+        process = self._context.Process(*args, **kwargs)
+        self.processes.append(process)
+        return process
+
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+
+def _terminate_pool(executor, context):
+    """Kill the worker processes of an executor started with context (a _PoolContext), running tasks included."""
+    for process in context.processes:
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def _iter_parallel(file_paths, search_args, file_options, workers, stop_flag, progress=None, profile=None):
+    """
+    Run search_file_timed over a process pool and yield (file_path, entries,
+    file_stats) in submission order. Only a bounded window of files is in flight, so a
+    stop request cancels everything that has not started yet; the files being
+    searched see the pool's cancel token (in shared memory) and stop too.
+    Big PDFs are submitted as several page-range tasks and merged back in page order.
+    progress (a SearchProgress) is kept reporting while a slow file is awaited.
+    With profile (a path), each worker saves its cProfile stats when the pool shuts down.
+
+    A PDF task still running PDF_TIMEOUT_GRACE seconds past pdf_timeout is
+    stuck in a page: it is abandoned with a 'timeout' error and, since a
+    running task cannot be stopped otherwise, the pool is replaced and the
+    other files in flight are submitted again.
+    """
+    window = workers * 4
+    pending = deque()
+    # Set when stop_flag is, or when the results are no longer wanted (limit reached, generator closed)
+    cancel = CancelToken(stop_flag)
+    pdf_timeout = file_options.get('pdf_timeout')
+    stuck_after = pdf_timeout + PDF_TIMEOUT_GRACE if pdf_timeout else None
+
+    def new_pool():
+        context = _PoolContext()
+        return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                   initargs=(cancel.shared, profile)), context
+
+    def submit(file_path):
+        page_ranges = _pdf_page_ranges(file_path, file_options.get('pdf_backend'))
+        if page_ranges:
+            return [executor.submit(search_file_timed, file_path, *search_args, **file_options, pdf_pages=pages)
+                    for pages in page_ranges]
+        return [executor.submit(search_file_timed, file_path, *search_args, **file_options)]
+
+    def next_result():
+        nonlocal executor, context
+        file_path = pending[0][0]
+        result = _collect(pending.popleft(), cancel, progress,
+                          stuck_after if file_type_of(file_path) == "pdf" else None)
+        if result is None:
+            return None
+        *result, stuck = result
+        if stuck:
+            _terminate_pool(executor, context)
+            executor, context = new_pool()
+            for i, (pending_path, _) in enumerate(pending):
+                pending[i] = (pending_path, submit(pending_path))
+        return tuple(result)
+
+    executor, context = new_pool()
+    try:
+        for file_path in file_paths:
+            pending.append((file_path, submit(file_path)))
+            while len(pending) >= window:
+                result = next_result()
+                if result is None:
+                    return
+                yield result
+        while pending:
+            result = next_result()
+            if result is None:
+                return
+            yield result
+    finally:
+        if pending:
+            cancel.cancel()
+        for _, futures in pending:
+            for future in futures:
+                future.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def _collect(item, cancel, progress=None, stuck_after=None):
+    """
+    Wait for the futures of one file while still honouring the cancel token.
+    Returns None if stopped, else (file_path, entries, file_stats, stuck):
+    stuck when a task ran stuck_after seconds and was given up. A task that
+    was given up or whose worker failed is not printed but returned as an
+    error in file_stats, so it reaches the search statistics like any
+    other file error.
+    """
+    file_path, futures = item
+    if progress is not None:
+        progress.current_file = file_path
+    entries = {}  # path -> matches; page-range parts of one PDF share a path
+    file_stats = FileStats(file_path)
+    for future in futures:
+        started = None  # when the task was first seen running
+        while True:
+            if cancel.cancelled:
+                for pending_future in futures:
+                    pending_future.cancel()
+                return None
+            if stuck_after is not None and future.running():
+                now = time.monotonic()
+                if started is None:
+                    started = now
+                elif now - started > stuck_after:
+                    file_stats.errors.append(("timeout", f"stuck in a page for over {stuck_after:.0f}s, abandoned"))
+                    return file_path, list(entries.items()), file_stats, True
+            try:
+                part_entries, part_stats = future.result(timeout=COLLECT_POLL_SECONDS)
+                for path, matches in part_entries:
+                    entries.setdefault(path, []).extend(matches)
+                file_stats.merge(part_stats)
+                break
+            except FuturesTimeout:
+                if progress is not None:
+                    progress.report()
+                continue
+            except Exception as e:
+                file_stats.errors.append(("worker", f"{type(e).__name__}: {e}"))
+                break
+    return file_path, list(entries.items()), file_stats, False
+
+# ------------------------------
+# Search summary
+# ------------------------------
+class SearchSummary:
+    """Totals of a search, yielded as the last item of iter_search()."""
+
+    def __init__(self, total_files=0, total_matches=0, files_with_matches=0, stopped=False, limit_reached=False,
+                 stats=None, duplicate_files=0):
+        self.total_files = total_files
+        self.total_matches = total_matches
+        self.files_with_matches = files_with_matches
+        self.stopped = stopped
+        self.limit_reached = limit_reached
+        self.stats = stats if stats is not None else SearchStats()
+        self.duplicate_files = duplicate_files  # copies of other files, not searched themselves
+
+    def __repr__(self):
+        return (f"SearchSummary(total_files={self.total_files}, total_matches={self.total_matches}, "
+                f"files_with_matches={self.files_with_matches}, stopped={self.stopped}, "
+                f"limit_reached={self.limit_reached})")
+
+# ------------------------------
+# Streaming search
+# ------------------------------
+PDF_TIMEOUT = 60
+
+def iter_search(folder, search_text, extensions="*", case_sensitive=False, recursive=True, lines_before=2, lines_after=2, stop_flag=None, workers=None, index=None, regex=False, whole_word=False,
+             exclude=None, max_size=None, modified_since=None, max_depth=None, follow_symlinks=False,
+             pdf_backend=None, pdf_timeout=PDF_TIMEOUT,
+             files_with_matches_only=False, max_matches_per_file=None, max_total_results=None,
+             profile=None, max_errors=0, dedup=None, progress=None, precount=False):
+    """
+    Generator version of searcher(). Yields (file_path, [(line_or_page, context, hits), ...])
+    as soon as each file with matches is done, then a final SearchSummary.
+    Nothing is accumulated, so memory stays flat however big the tree is.
+    summary.stats holds the SearchStats of the search.
+
+    Arguments are the same as searcher().
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    start = time.perf_counter()
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+
+    # Compile the query once; workers receive it ready to use
+    query = search_text if isinstance(search_text, SearchQuery) else SearchQuery(search_text, case_sensitive, regex, whole_word, max_errors)
+    # Checked by the walk, between files and inside them; a plain stop_flag dict is followed too
+    cancel = CancelToken.of(stop_flag)
+    summary = SearchSummary()
+    stats = summary.stats
+    # Live counters, passed to the progress callback every PROGRESS_INTERVAL seconds
+    tracker = None
+    if progress is not None:
+        tracker = progress if isinstance(progress, SearchProgress) else SearchProgress(progress)
+
+    def counted(entries):
+        entries = iter(entries)
+        while True:
+            walk_start = time.perf_counter()
+            entry = next(entries, None)
+            stats.stages['walk'] += time.perf_counter() - walk_start
+            if entry is None:
+                return
+            summary.total_files += 1
+            if tracker:
+                tracker.files_found += 1
+                tracker.report()
+            yield entry.path
+
+    def timed_matcher(may_match):
+        def matcher(file_path):
+            index_start = time.perf_counter()
+            try:
+                return may_match(file_path)
+            finally:
+                stats.stages['index'] += time.perf_counter() - index_start
+        return matcher
+
+    def counted_first(entries):
+        """The pre-count: walk the whole tree once, up front, for the totals behind the percentage and ETA."""
+        tracker.total_files = tracker.total_bytes = 0
+        tracker.set_phase("counting")
+        listed = []
+        for entry in entries:
+            try:
+                tracker.total_bytes += entry.stat().st_size
+            except OSError:
+                pass
+            tracker.total_files += 1
+            tracker.files_found = tracker.total_files
+            tracker.report()
+            listed.append(entry)
+        tracker.files_found = 0  # found again as the search goes through the list
+        tracker.set_phase("searching")
+        return listed
+
+    def skipped(file_paths, may_match):
+        for file_path in file_paths:
+            if may_match(file_path):
+                yield file_path
+            elif tracker:
+                tracker.skipped(file_path)
+
+    entries = walk_files(folder, parse_extensions(extensions), recursive, exclude, max_size,
+                         modified_since, max_depth, follow_symlinks, cancel)
+    if tracker and precount:
+        # Listing only (no file is opened), timed as part of the walk
+        walk_start = time.perf_counter()
+        entries = counted_first(entries)
+        stats.stages['walk'] += time.perf_counter() - walk_start
+    file_paths = counted(entries)
+    if index is not None:
+        # Files the index proves cannot match are counted but never opened
+        file_paths = skipped(file_paths, timed_matcher(index.matcher(query)))
+    if files_with_matches_only:
+        # One match is enough to list the file, and its context is never shown
+        max_matches_per_file = 1
+        lines_before = lines_after = 0
+    if dedup not in (None, False, "all", "group"):
+        raise ValueError(f"Unknown dedup mode '{dedup}' (choose from: all, group)")
+    copies = {}
+    if dedup:
+        # The walk has to finish before files can be compared, then each content is searched once
+        hash_start = time.perf_counter()
+        walk_and_index = stats.stages['walk'] + stats.stages['index']
+        hash_cache = open_hash_cache()
+        try:
+            file_paths, copies = unique_files(file_paths, hash_cache, cancel)
+        finally:
+            if hash_cache is not None:
+                hash_cache.close()
+        stats.stages['hash'] += (time.perf_counter() - hash_start
+                                 - (stats.stages['walk'] + stats.stages['index'] - walk_and_index))
+        summary.duplicate_files = sum(len(group) for group in copies.values())
+        if tracker:
+            for group in copies.values():
+                for copy in group:
+                    tracker.skipped(copy)
+    search_args = (query, case_sensitive, lines_before, lines_after)
+    get_pdf_backend(pdf_backend)  # fail fast on an unknown or missing engine
+    file_options = {'max_matches': max_matches_per_file, 'pdf_backend': pdf_backend, 'pdf_timeout': pdf_timeout}
+
+    def in_process(file_paths):
+        for file_path in file_paths:
+            if tracker:
+                tracker.current_file = file_path
+            yield (file_path, *search_file_timed(file_path, *search_args, cancel=cancel, **file_options))
+
+    if workers > 1:
+        # In-process work is already covered by the main profiler
+        file_results = _iter_parallel(file_paths, search_args, file_options, workers, cancel, tracker, profile)
+    else:
+        file_results = in_process(file_paths)
+
+    try:
+        for file_path, entries, file_stats in file_results:
+            if cancel.cancelled:
+                # The file may have been cut short when the search was stopped
+                file_results.close()
+                break
+            group = copies.get(file_path, ())
+            if dedup == "all" and group:
+                # Every copy is reported with the matches of the one that was searched
+                entries = [(copy + entry_path[len(file_path):], for_copy(matches, copy))
+                           for copy in (file_path, *group) for entry_path, matches in entries]
+            # Archives give one entry per member with matches
+            found = []
+            for entry_path, matches in entries:
+                if max_matches_per_file:
+                    matches = matches[:max_matches_per_file]  # page-range tasks are capped one by one
+                if max_total_results:
+                    matches = matches[:max_total_results - summary.total_matches]
+                if not matches:
+                    continue
+                summary.total_matches += len(matches)
+                summary.files_with_matches += 1
+                found.append((entry_path, matches))
+            found_matches = sum(len(matches) for _, matches in found)
+            stats.add_file(file_stats, found_matches)
+            if tracker:
+                tracker.scanned(file_stats, found_matches)
+            if profiler:
+                profiler.disable()  # the consumer's work is not part of the search
+            for entry_path, matches in found:
+                if dedup == "group" and group:
+                    yield DuplicateResult(entry_path, matches, [copy + entry_path[len(file_path):] for copy in group])
+                else:
+                    yield entry_path, matches
+            if profiler:
+                profiler.enable()
+            if max_total_results and summary.total_matches >= max_total_results:
+                # Closing file_results stops the walk and cancels pending workers
+                summary.limit_reached = True
+                file_results.close()
+                break
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile)
+
+    summary.stopped = cancel.cancelled
+    stats.wall_seconds = time.perf_counter() - start
+    if tracker:
+        tracker.current_file = None
+        tracker.set_phase("done")
+    yield summary
+
+# ------------------------------
+# Generic searcher function
+# ------------------------------
+def searcher(folder, search_text, extensions="*", case_sensitive=False, recursive=True, lines_before=2, lines_after=2, stop_flag=None, workers=None, index=None, regex=False, whole_word=False,
+             exclude=None, max_size=None, modified_since=None, max_depth=None, follow_symlinks=False,
+             pdf_backend=None, pdf_timeout=PDF_TIMEOUT,
+             files_with_matches_only=False, max_matches_per_file=None, max_total_results=None,
+             profile=None, return_stats=False, max_errors=0, dedup=None, store=None, progress=None, precount=False):
+    """
+    Search text in multiple file types inside a folder (with optional recursion).
+    Archives (.zip, .tar, .tar.gz/.bz2/.xz) and compressed files (.gz, .bz2, .xz)
+    are searched member by member, reported as 'archive.zip!/inner/path.txt'.
+    Returns a list of results:
+        [(file_path, [(line_or_page, context, hits), ...]), ...]
+    where hits is [(pattern, start, end), ...], offsets into context
+    (fuzzy searches add the edit distance: (pattern, start, end, distance)).
+    
+    - search_text: a string, a list of strings (all searched in one pass) or a SearchQuery
+    - extensions: comma-separated list (e.g. ".txt,.py,.pdf,.docx,.xlsx") or "*" for all
+    - stop_flag: optional mutable object (e.g. dict) to stop search externally: {'stop': True},
+      or a SearchJobs.CancelToken (cancel()); either is checked inside files too
+      (between PDF pages, XLSX cells, slices of big text files), also by worker processes
+    - workers: number of worker processes (default: CPU count). 1 searches in-process.
+      Results come back in walk order whatever the worker count.
+    - index: optional SearchIndex for the folder, only its candidate files are opened
+    - regex: treat search_text as regular expression(s)
+    - whole_word: only match whole words
+    - exclude: .gitignore-style globs (list or comma-separated), e.g. ".git/, node_modules/, *.min.js".
+      Excluded folders are never entered.
+    - max_size: skip files bigger than this many bytes
+    - modified_since: skip files modified before this (timestamp, datetime or ISO date)
+    - max_depth: how many subfolder levels to enter (None = unlimited)
+    - follow_symlinks: enter symlinked folders, with loop protection
+    - pdf_backend: PDF engine, "pypdf2" (default), "pymupdf", "pdfium" or "auto" (fastest installed)
+    - pdf_timeout: seconds after which a single PDF is abandoned (None = no limit). It is
+      checked between pages; with workers > 1 a PDF stuck inside one page is also
+      abandoned PDF_TIMEOUT_GRACE seconds later (its worker is replaced), while
+      with workers=1 such a page still has to finish
+    - files_with_matches_only: like grep -l, stop each file at its first match (no context)
+    - max_matches_per_file: like grep -m, stop each file after that many matches
+    - max_total_results: stop the whole search after that many matches
+      (members of archives count as files for these three limits)
+    - profile: path where the cProfile stats of the search are saved (load them with pstats).
+      With several workers each one also writes '<profile>.worker-<pid>'.
+    - return_stats: also return the SearchStats (files and bytes per type, time
+      per stage, slowest files, errors) as a fourth value
+    - max_errors: fuzzy matching, a hit may differ from the search text by up to this
+      many inserted, deleted or substituted characters (0 = exact; not with regex)
+    - dedup: search byte-identical files once (grouped by size, then content hash,
+      hashes cached by path, size and mtime). "all" reports the matches under every
+      copy, right after the file that was searched; "group" reports them once, as a
+      ContentHashes.DuplicateResult whose copies lists the other paths. The walk is
+      completed before the first file is searched.
+    - store: a ResultStore to spill the results to instead of a list; it is then
+      returned in place of the list (read it back with count(), page(), iter_results()).
+    - progress: callable(SearchStats.SearchProgress), called every PROGRESS_INTERVAL
+      seconds with files found / scanned, bytes, current file, matches, MB/s and files/s
+      (or a SearchProgress built with another callback or interval)
+    - precount: with progress, list the whole tree before searching so the progress
+      also has totals, a percentage and an ETA (files are only listed, not opened;
+      the first result comes after the listing)
+
+    Thin wrapper that collects iter_search() into a list (or a store).
+    """
+    results = []
+    summary = None
+    for item in iter_search(folder, search_text, extensions, case_sensitive, recursive,
+                            lines_before, lines_after, stop_flag, workers, index, regex, whole_word,
+                            exclude, max_size, modified_since, max_depth, follow_symlinks,
+                            pdf_backend, pdf_timeout,
+                            files_with_matches_only, max_matches_per_file, max_total_results, profile,
+                            max_errors, dedup, progress=progress, precount=precount):
+        if isinstance(item, SearchSummary):
+            summary = item
+        elif store is not None:
+            store.add(*item, getattr(item, "copies", None))
+        else:
+            results.append(item)
+    if store is not None:
+        store.commit()
+        results = store
 
-    return results, total_files, total_matches
+    if return_stats:
+        return results, summary.total_files, summary.total_matches, summary.stats
+    return results, summary.total_files, summary.total_matches
@@ -0,0 +1,215 @@
+import os
+import sys
+import sqlite3
+import hashlib
+from SearchHelper import iter_text
+from SearchQuery import as_query
+from FileWalker import walk_files, parse_extensions, IgnoreRules
+from ArchiveReaders import is_archive
+
+# ------------------------------
+# Trigram helpers
+# ------------------------------
+def _trigram_key(trigram):
+    """Pack a 3-char string into one 63-bit integer (21 bits per code point)."""
+    return (ord(trigram[0]) << 42) | (ord(trigram[1]) << 21) | ord(trigram[2])
+
+def text_trigrams(text):
+    """Return the set of trigram keys of the lowercased text."""
+    text = text.lower()
+    return {_trigram_key(text[i:i + 3]) for i in range(len(text) - 2)}
+
+def iter_text_trigrams(pieces):
+    """
+    Return the trigram keys of a text given in consecutive pieces (see
+    SearchHelper.iter_text), holding one piece at a time: each piece is
+    read with the last 2 characters of the one before it, so the trigrams
+    that straddle two pieces are not lost.
+    """
+    trigrams = set()
+    tail = ""
+    for piece in pieces:
+        text = tail + piece
+        trigrams.update(text_trigrams(text))
+        tail = text[-2:]
+    return trigrams
+
+def _full_walk(walk_options):
+    """True when walk_files() options leave every file in, so files it does not list are really gone."""
+    exclude = walk_options.get('exclude')
+    if exclude and not isinstance(exclude, IgnoreRules):
+        exclude = IgnoreRules(exclude)
+    return (parse_extensions(walk_options.get('extensions')) is None and walk_options.get('recursive', True)
+            and not exclude and walk_options.get('max_size') is None
+            and not walk_options.get('modified_since') and walk_options.get('max_depth') is None)
+
+def default_index_path(folder):
+    """Index files live in the user cache dir, one per root folder."""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    digest = hashlib.sha1(os.path.abspath(folder).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(base, "GrepWithPowershell", f"index-{digest}.sqlite")
+
+# ------------------------------
+# Persistent trigram index
+# ------------------------------
+class SearchIndex:
+    """
+    On-disk trigram index of every file under a root folder, stored in SQLite.
+
+    The index only narrows down which files can contain a text: the caller
+    still opens the candidates to find the actual lines. Files that are not
+    indexed yet, or changed since (size/mtime), are always candidates, so a
+    stale index is slower but never wrong.
+    """
+
+    def __init__(self, folder, index_path=None):
+        self.folder = os.path.abspath(folder)
+        self.index_path = index_path or default_index_path(self.folder)
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.index_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                trigram INTEGER NOT NULL,
+                file_id INTEGER NOT NULL,
+                PRIMARY KEY (trigram, file_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_file ON postings(file_id);
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------
+    # Build / update
+    # ------------------------------
+    def update(self, stop_flag=None, **walk_options):
+        """
+        Bring the index up to date: (re)index new or changed files and drop
+        deleted ones. Returns the number of files that were (re)indexed.
+
+        walk_options are the ones of walk_files() (extensions, recursive,
+        exclude, max_size, modified_since, max_depth, follow_symlinks): pass
+        a search's options to only index what that search will look at, not
+        excluded folders like node_modules. Files outside them are kept as
+        they are, so only an update without options drops deleted files.
+        """
+        known = {path: (file_id, size, mtime) for file_id, path, size, mtime
+                 in self.conn.execute("SELECT id, path, size, mtime FROM files")}
+        seen = set()
+        indexed = 0
+
+        for dir_entry in walk_files(self.folder, stop_flag=stop_flag, **walk_options):
+            file_path = dir_entry.path
+            try:
+                st = dir_entry.stat()
+            except OSError:
+                continue
+            seen.add(file_path)
+            if is_archive(file_path):
+                continue  # not indexed, so archives are always searched
+            entry = known.get(file_path)
+            if entry and entry[1] == st.st_size and entry[2] == st.st_mtime:
+                continue
+            self._index_file(file_path, st, entry[0] if entry else None)
+            indexed += 1
+            if indexed % 200 == 0:
+                self.conn.commit()
+
+        if (stop_flag and stop_flag.get('stop')) or not _full_walk(walk_options):
+            # Partial walk (stopped or filtered): keep what was indexed, but do not drop unseen files
+            self.conn.commit()
+            return indexed
+
+        gone = [(entry[0],) for path, entry in known.items() if path not in seen]
+        self.conn.executemany("DELETE FROM postings WHERE file_id = ?", gone)
+        self.conn.executemany("DELETE FROM files WHERE id = ?", gone)
+        self.conn.commit()
+        return indexed
+
+    def rebuild(self, stop_flag=None):
+        """Drop everything and index the whole folder again."""
+        self.conn.execute("DELETE FROM postings")
+        self.conn.execute("DELETE FROM files")
+        self.conn.commit()
+        return self.update(stop_flag)
+
+    def _index_file(self, file_path, st, file_id):
+        try:
+            trigrams = iter_text_trigrams(iter_text(file_path))
+        except Exception as e:
+            print(f"Cannot index {file_path}: {e}", file=sys.stderr)
+            return
+        if file_id is None:
+            file_id = self.conn.execute("INSERT INTO files (path, size, mtime) VALUES (?, ?, ?)",
+                                        (file_path, st.st_size, st.st_mtime)).lastrowid
+        else:
+            self.conn.execute("UPDATE files SET size = ?, mtime = ? WHERE id = ?",
+                              (st.st_size, st.st_mtime, file_id))
+            self.conn.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+        self.conn.executemany("INSERT INTO postings (trigram, file_id) VALUES (?, ?)",
+                              ((trigram, file_id) for trigram in trigrams))
+
+    # ------------------------------
+    # Query
+    # ------------------------------
+    def candidates(self, search_text):
+        """
+        Return {path: (size, mtime)} of indexed files containing every trigram
+        of search_text, or None when the text is too short to use the index.
+        """
+        trigrams = text_trigrams(search_text)
+        if not trigrams:
+            return None
+        placeholders = ",".join("?" * len(trigrams))
+        rows = self.conn.execute(f"""
+            SELECT f.path, f.size, f.mtime FROM files f
+            WHERE f.id IN (
+                SELECT file_id FROM postings WHERE trigram IN ({placeholders})
+                GROUP BY file_id HAVING COUNT(*) = ?
+            )""", (*trigrams, len(trigrams)))
+        return {path: (size, mtime) for path, size, mtime in rows}
+
+    def matcher(self, search_text):
+        """
+        Return a may_match(file_path) predicate for search_text (a string or a
+        SearchQuery). It is False only for files the index knows, unchanged,
+        and proves cannot match. Regex queries cannot use the index.
+        """
+        literals = as_query(search_text).literals
+        if literals is None:
+            return lambda file_path: True
+        hits = {}
+        for literal in literals:
+            found = self.candidates(literal)
+            if found is None:
+                return lambda file_path: True
+            hits.update(found)
+        known = {path: (size, mtime) for path, size, mtime
+                 in self.conn.execute("SELECT path, size, mtime FROM files")}
+
+        def may_match(file_path):
+            file_path = os.path.abspath(file_path)
+            if file_path in hits:
+                return True
+            entry = known.get(file_path)
+            if entry is None:
+                return True
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                return True
+            return entry != (st.st_size, st.st_mtime)
+
+        return may_match
@@ -0,0 +1,127 @@
+import ctypes
+import threading
+import multiprocessing
+
+# ------------------------------
+# Cancellation token
+# ------------------------------
+class CancelToken:
+    """
+    Tells a running search to stop. The flag lives in shared memory, so
+    worker processes see it as soon as it is set and the file handlers
+    check it between PDF pages, XLSX cells, DOCX paragraphs and slices of
+    text files: a search stops within milliseconds, not at the end of
+    the file it is on.
+
+    It reads and writes like the {'stop': bool} dicts taken as stop_flag
+    (token.get('stop'), token['stop'] = True), so it can be passed anywhere
+    a stop_flag goes. Built around such a dict (stop_flag), it also counts
+    as cancelled once the dict says so.
+    """
+
+    def __init__(self, stop_flag=None, shared=None):
+        self.shared = shared if shared is not None else multiprocessing.RawValue(ctypes.c_bool, False)
+        self.stop_flag = stop_flag
+
+    @classmethod
+    def of(cls, stop_flag):
+        """stop_flag itself if it is a token, else a token following it (None gives a fresh token)."""
+        return stop_flag if isinstance(stop_flag, cls) else cls(stop_flag)
+
+    def cancel(self):
+        self.shared.value = True
+
+    @property
+    def cancelled(self):
+        if self.shared.value:
+            return True
+        if self.stop_flag is not None and self.stop_flag.get('stop'):
+            self.shared.value = True  # seen once, passed on to the workers
+            return True
+        return False
+
+    def get(self, key, default=None):
+        return self.cancelled if key == 'stop' else default
+
+    def __getitem__(self, key):
+        if key != 'stop':
+            raise KeyError(key)
+        return self.cancelled
+
+    def __setitem__(self, key, value):
+        if key != 'stop':
+            raise KeyError(key)
+        if value:
+            self.cancel()
+
+    def __repr__(self):
+        return f"CancelToken(cancelled={self.cancelled})"
+
+def until_cancelled(items, cancel):
+    """
+    Iterate over items until cancel (a CancelToken or None) is cancelled.
+    The token is checked after each item, before the next one is read.
+    """
+    if cancel is None:
+        return items
+    return _until_cancelled(items, cancel)
+
+def _until_cancelled(items, cancel):
+    for item in items:
+        yield item
+        if cancel.cancelled:
+            return
+
+# ------------------------------
+# One search at a time
+# ------------------------------
+class SearchJob:
+    """A search running on its own thread, with the token that stops it."""
+
+    def __init__(self, target, args=()):
+        self.token = CancelToken()
+        self.thread = threading.Thread(target=target, args=(self.token, *args), daemon=True)
+
+    @property
+    def running(self):
+        return self.thread.is_alive()
+
+    def cancel(self):
+        self.token.cancel()
+
+    def join(self, timeout=None):
+        self.thread.join(timeout)
+        return not self.thread.is_alive()
+
+class SearchJobs:
+    """
+    Runs searches one at a time, each on exactly one thread. start() cancels
+    the search still running (it winds down on its own, within milliseconds)
+    and starts the new one right away; is_current() tells a search that
+    finishes late that it was replaced, so it leaves the UI alone.
+    """
+
+    def __init__(self):
+        self.current = None
+
+    def start(self, target, *args):
+        """Cancel the running search, run target(token, *args) on a new thread and return its SearchJob."""
+        self.cancel()
+        job = SearchJob(target, args)
+        self.current = job
+        job.thread.start()
+        return job
+
+    def cancel(self):
+        if self.current is not None:
+            self.current.cancel()
+
+    def is_current(self, token):
+        return self.current is not None and self.current.token is token
+
+    @property
+    def running(self):
+        return self.current is not None and self.current.running
+
+    def join(self, timeout=None):
+        return self.current is None or self.current.join(timeout)
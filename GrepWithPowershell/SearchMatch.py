@@ -0,0 +1,298 @@
+import os
+import mmap
+from contextlib import contextmanager, ExitStack
+
+# ------------------------------
+# Context helpers
+# ------------------------------
+def shift_hits(hits, offset):
+    """Move hit spans by offset; anything after (pattern, start, end), like a fuzzy distance, is kept."""
+    return [(hit[0], max(0, offset + hit[1]), max(0, offset + hit[2]), *hit[3:]) for hit in hits]
+
+def line_bounds(buf, line_start, lines_before, lines_after):
+    """Byte range [start, end) of the line at line_start with lines_before lines above and lines_after below."""
+    start = line_start
+    for _ in range(lines_before):
+        if start == 0:
+            break
+        start = buf.rfind(b"\n", 0, start - 1) + 1
+    end = buf.find(b"\n", line_start)
+    end = len(buf) if end == -1 else end + 1
+    for _ in range(lines_after):
+        if end >= len(buf):
+            break
+        next_newline = buf.find(b"\n", end)
+        end = len(buf) if next_newline == -1 else next_newline + 1
+    return start, end
+
+def context_range(buf, line_start, lines_before, lines_after):
+    """
+    Decode only the lines around a hit: lines_before above, lines_after below.
+    Returns (context, offset of the hit line inside context).
+    """
+    start, end = line_bounds(buf, line_start, lines_before, lines_after)
+    full = buf[start:end].decode("utf-8", errors="ignore").replace("\r\n", "\n")
+    prefix = buf[start:line_start].decode("utf-8", errors="ignore").replace("\r\n", "\n")
+    context = full.strip()
+    return context, len(prefix) - (len(full) - len(full.lstrip()))
+
+# ------------------------------
+# Compact match records
+# ------------------------------
+# Context of a lazy match whose file changed after the search: its line and offsets may point elsewhere now
+STALE_CONTEXT = "[file changed since the search]"
+
+def file_stamp(st):
+    """(size, mtime in ns) of an os.stat() result: tells whether a file changed since it was searched."""
+    return st.st_size, st.st_mtime_ns
+
+class MatchFile:
+    """
+    The text file a group of lazy matches points to, shared by all of them
+    (and pickled once per result list), with the context size to rebuild
+    and the file_stamp() of the file when it was searched (None: not checked).
+    """
+
+    __slots__ = ("path", "lines_before", "lines_after", "stamp")
+
+    def __init__(self, path, lines_before=2, lines_after=2, stamp=None):
+        self.path = path
+        self.lines_before = lines_before
+        self.lines_after = lines_after
+        self.stamp = tuple(stamp) if stamp is not None else None
+
+    def __reduce__(self):
+        return MatchFile, (self.path, self.lines_before, self.lines_after, self.stamp)
+
+    def __repr__(self):
+        return f"MatchFile({self.path!r})"
+
+    @contextmanager
+    def open(self):
+        """
+        Map the file for reading; an empty buffer if it is gone or empty,
+        None if its size or modification time differ from stamp.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                st = os.fstat(f.fileno())
+                if self.stamp is not None and file_stamp(st) != self.stamp:
+                    yield None
+                    return
+                if st.st_size == 0:
+                    yield b""
+                    return
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    yield buf
+        except (OSError, ValueError):
+            yield b""
+
+class Match:
+    """
+    One matching line, indexable like the (line_or_page, context, hits)
+    tuples the handlers return: match[0] is the location, match[1] the
+    context and match[2] the hits with offsets into the context.
+
+    Lazy matches (plain text files) only keep the line number, the byte
+    offset of the line in the file and the hit spans inside that line;
+    the context is read back from the file each time it is asked for.
+    If the file changed since the search, the offsets may point into other
+    text: the context is then STALE_CONTEXT, without hits. Eager matches (archive members,
+    files that cannot be mapped) carry their context and context-relative
+    hits like a tuple does.
+    """
+
+    __slots__ = ("file", "line", "offset", "spans", "_context")
+
+    def __init__(self, file, line, offset, spans, context=None):
+        self.file = file
+        self.line = line
+        self.offset = offset
+        self.spans = tuple(spans)
+        self._context = context
+
+    @property
+    def lazy(self):
+        return self._context is None
+
+    @property
+    def location(self):
+        return self.line
+
+    def materialize(self, buf=None):
+        """(context, hits); buf is the mapped file, to share one opening between many matches."""
+        if buf is None and self.lazy:
+            with self.file.open() as buf:
+                return self._read(buf)
+        return self._read(buf)
+
+    def _read(self, buf):
+        """materialize() from what file.open() gave: None if the file changed."""
+        if not self.lazy:
+            return self._context, list(self.spans)
+        if buf is None:
+            return STALE_CONTEXT, []
+        if self.offset >= len(buf):
+            return "", []
+        context, offset = context_range(buf, self.offset, self.file.lines_before, self.file.lines_after)
+        return context, shift_hits(self.spans, offset)
+
+    @property
+    def context(self):
+        return self.materialize()[0]
+
+    @property
+    def hits(self):
+        return self.materialize()[1]
+
+    def __getitem__(self, index):
+        if index == 0 or index == -3:
+            return self.line
+        return (self.line, *self.materialize())[index]
+
+    def __iter__(self):
+        yield self.line
+        yield from self.materialize()
+
+    def __len__(self):
+        return 3
+
+    def _key(self):
+        return (self.file.path if self.file is not None else None, self.line, self.offset, self.spans, self._context)
+
+    def __eq__(self, other):
+        if isinstance(other, Match):
+            return self._key() == other._key()
+        if isinstance(other, tuple):
+            return tuple(self) == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __reduce__(self):
+        return Match, (self.file, self.line, self.offset, self.spans, self._context)
+
+    def __repr__(self):
+        return f"Match(line={self.line!r}, offset={self.offset!r}, spans={self.spans!r})"
+
+def with_file(matches, match_file):
+    """The matches with their lazy contexts read from match_file instead."""
+    return [Match(match_file, match.line, match.offset, match.spans) if isinstance(match, Match) and match.lazy
+            else match for match in matches]
+
+def for_copy(matches, file_path):
+    """The matches of one file, for an identical copy at file_path: lazy contexts are read from the copy."""
+    lazy_file = next((match.file for match in matches if isinstance(match, Match) and match.lazy), None)
+    if lazy_file is None:
+        return list(matches)
+    try:
+        stamp = file_stamp(os.stat(file_path))
+    except OSError:
+        stamp = None
+    return with_file(matches, MatchFile(file_path, lazy_file.lines_before, lazy_file.lines_after, stamp))
+
+def materialize(matches):
+    """
+    Yield (location, context, hits) for matches (Match objects or plain
+    tuples), mapping the file of the first lazy match once for all its
+    matches. matches is read as it goes, so it can be a stream.
+    """
+    with ExitStack() as stack:
+        lazy_file = buf = None
+        for match in matches:
+            if not isinstance(match, Match):
+                yield tuple(match)
+                continue
+            if lazy_file is None and match.lazy:
+                lazy_file = match.file
+                buf = stack.enter_context(lazy_file.open())
+            yield (match.line, *(match._read(buf) if match.lazy and match.file is lazy_file else match.materialize()))
+
+# ------------------------------
+# grep -C style context blocks
+# ------------------------------
+class ContextBlock:
+    """
+    Consecutive lines shown together: the contexts of matches that overlap
+    or touch are merged into one block, so no line is shown twice.
+
+    - location: location of the first match in the block
+    - first_line: line number of the first line of text, None when the
+      lines are not numbered one by one (PDF pages, cells, eager contexts)
+    - text: the lines, joined with newlines
+    - hits: [(pattern, start, end), ...] offsets into text (plus the
+      distance for fuzzy queries)
+    - count: number of matches in the block
+    """
+
+    __slots__ = ("location", "first_line", "text", "hits", "count")
+
+    def __init__(self, location, first_line, text, hits, count=1):
+        self.location = location
+        self.first_line = first_line
+        self.text = text
+        self.hits = hits
+        self.count = count
+
+    @property
+    def last_line(self):
+        return None if self.first_line is None else self.first_line + self.text.count("\n")
+
+    def __repr__(self):
+        return f"ContextBlock({self.location!r}, lines={self.first_line}-{self.last_line}, matches={self.count})"
+
+def context_blocks(matches):
+    """
+    Turn a file's matches into ContextBlocks, like grep -C: lazy matches
+    whose context windows overlap or are adjacent become one block.
+    Other matches give one block each, with their own context. matches
+    is read as it goes, so it can be a stream.
+    """
+    with ExitStack() as stack:
+        lazy_file = buf = None  # the file of the first lazy match, mapped when it comes
+        group = []  # lazy matches of the current block
+        block_start = block_end = 0
+
+        def flush():
+            text = buf[block_start:block_end].decode("utf-8", errors="ignore").replace("\r\n", "\n")
+            # Line number of the block's first line, from its first match and the lines above it
+            first_line = group[0].line - buf[block_start:group[0].offset].count(b"\n")
+            hits = []
+            pos = block_start
+            chars = 0  # characters of text before match.offset
+            for match in group:
+                chars += len(buf[pos:match.offset].decode("utf-8", errors="ignore").replace("\r\n", "\n"))
+                pos = match.offset
+                hits += shift_hits(match.spans, chars)
+            if text.endswith("\n"):
+                text = text[:-1]
+            return ContextBlock(group[0].line, first_line, text, hits, len(group))
+
+        for match in matches:
+            if lazy_file is None and isinstance(match, Match) and match.lazy:
+                lazy_file = match.file
+                buf = stack.enter_context(lazy_file.open())
+            from_buffer = isinstance(match, Match) and match.lazy and match.file is lazy_file
+            if not (from_buffer and buf is not None and match.offset < len(buf)):
+                if group:
+                    yield flush()
+                    group = []
+                if isinstance(match, Match):
+                    location, context, hits = match.line, *(match._read(buf) if from_buffer else match.materialize())
+                else:
+                    location, context, hits = match
+                yield ContextBlock(location, None, context, hits)
+                continue
+            start, end = line_bounds(buf, match.offset, lazy_file.lines_before, lazy_file.lines_after)
+            if group and start <= block_end:
+                # Overlapping or adjacent windows: one block, like grep -C
+                group.append(match)
+                block_end = max(block_end, end)
+                continue
+            if group:
+                yield flush()
+            group = [match]
+            block_start, block_end = start, end
+        if group:
+            yield flush()
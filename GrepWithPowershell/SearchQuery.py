@@ -0,0 +1,397 @@
+import re
+from collections import deque
+
+# ------------------------------
+# Aho-Corasick automaton
+# ------------------------------
+class AhoCorasick:
+    """
+    Multi-literal matcher: finds every occurrence of every pattern in one pass
+    over the text, whatever the number of patterns.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for pattern_idx, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                next_state = self.goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][ch] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = next_state
+            self.out[state].append(pattern_idx)
+
+        # Breadth-first pass to fill failure links
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(ch, 0)
+                if self.fail[next_state] == next_state:
+                    self.fail[next_state] = 0
+                self.out[next_state] = self.out[next_state] + self.out[self.fail[next_state]]
+
+    def iter_matches(self, text):
+        """Yield (pattern_idx, start, end) for every occurrence, in order of end position."""
+        goto, fail, out, patterns = self.goto, self.fail, self.out, self.patterns
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pattern_idx in out[state]:
+                yield pattern_idx, i + 1 - len(patterns[pattern_idx]), i + 1
+
+# ------------------------------
+# Approximate matcher
+# ------------------------------
+def _char_masks(pattern):
+    masks = {}
+    for i, ch in enumerate(pattern):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    return masks
+
+def split_pattern(pattern, parts):
+    """Cut pattern into parts pieces of near-equal length: [(offset, piece), ...]."""
+    size, extra = divmod(len(pattern), parts)
+    pieces = []
+    offset = 0
+    for i in range(parts):
+        length = size + (1 if i < extra else 0)
+        pieces.append((offset, pattern[offset:offset + length]))
+        offset += length
+    return pieces
+
+class FuzzyMatcher:
+    """
+    Finds the substrings of a text within max_errors edits (insertions,
+    deletions, substitutions) of one pattern, with Myers' bit-parallel
+    algorithm: the whole column of the edit-distance table is kept in two
+    bit vectors, so each text character costs a handful of integer operations
+    whatever the pattern length.
+
+    A hit with k errors contains at least one of k + 1 pieces of the pattern
+    unchanged, so the table is only computed in windows around exact
+    occurrences of the pieces, found with str.find.
+    """
+
+    def __init__(self, pattern, max_errors):
+        if max_errors < 1:
+            raise ValueError(f"fuzzy matching needs at least 1 error, not {max_errors}")
+        if max_errors >= len(pattern):
+            raise ValueError(f"'{pattern}' is too short for {max_errors} errors: use a longer pattern or fewer errors")
+        self.pattern = pattern
+        self.max_errors = max_errors
+        self.pieces = split_pattern(pattern, max_errors + 1)
+        self.mask = (1 << len(pattern)) - 1
+        self._forward = _char_masks(pattern)
+        self._backward = _char_masks(pattern[::-1])
+
+    def _windows(self, text):
+        """Merged [start, end) ranges of text that can hold a hit."""
+        length, errors = len(self.pattern), self.max_errors
+        ranges = []
+        for offset, piece in self.pieces:
+            pos = text.find(piece)
+            while pos != -1:
+                ranges.append((max(0, pos - offset - errors), min(len(text), pos - offset + length + errors)))
+                pos = text.find(piece, pos + 1)
+        ranges.sort()
+        merged = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return merged
+
+    def _ends(self, text, start, end):
+        """Yield (end, distance) for every position where a hit with at most max_errors ends (Myers, search mode)."""
+        masks, mask, errors = self._forward, self.mask, self.max_errors
+        high = 1 << (len(self.pattern) - 1)
+        pv, mv, score = mask, 0, len(self.pattern)
+        for j in range(start, end):
+            eq = masks.get(text[j], 0)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | (~(xh | pv) & mask)
+            mh = pv & xh
+            if ph & high:
+                score += 1
+            elif mh & high:
+                score -= 1
+            ph = (ph << 1) & mask
+            mh = (mh << 1) & mask
+            pv = mh | (~(xv | ph) & mask)
+            mv = ph & xv
+            if score <= errors:
+                yield j + 1, score
+
+    def _start(self, text, end, lower_bound):
+        """
+        Start of the best hit ending at end, and its distance: the pattern is
+        run backwards, anchored at end (Myers, global mode). Among equally
+        close starts the earliest wins, so 'xeedle' is found whole.
+        """
+        masks, mask = self._backward, self.mask
+        length = len(self.pattern)
+        high = 1 << (length - 1)
+        pv, mv, score = mask, 0, length
+        best_distance, best_start = score, end
+        for j in range(end - 1, max(lower_bound, end - length - self.max_errors) - 1, -1):
+            eq = masks.get(text[j], 0)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | (~(xh | pv) & mask)
+            mh = pv & xh
+            if ph & high:
+                score += 1
+            elif mh & high:
+                score -= 1
+            ph = ((ph << 1) | 1) & mask
+            mh = (mh << 1) & mask
+            pv = mh | (~(xv | ph) & mask)
+            mv = ph & xv
+            if score <= best_distance:
+                best_distance, best_start = score, j
+        return best_start, best_distance
+
+    def _best_ends(self, text, start, end):
+        """A hit ends at several neighbouring positions: keep the closest (and then longest) one of each run."""
+        run = None  # (distance, end) of the best end in the current run
+        previous = None
+        for hit_end, distance in self._ends(text, start, end):
+            if run is not None and hit_end != previous + 1:
+                yield run[1]
+                run = None
+            if run is None or distance <= run[0]:
+                run = (distance, hit_end)
+            previous = hit_end
+        if run is not None:
+            yield run[1]
+
+    def iter_matches(self, text):
+        """Yield (start, end, distance) for the best non-overlapping hits, in text order."""
+        for window_start, window_end in self._windows(text):
+            candidates = []
+            for end in self._best_ends(text, window_start, window_end):
+                start, distance = self._start(text, end, window_start)
+                candidates.append((distance, start, end))
+            # Overlapping candidates: the closest one wins, then the longest
+            chosen = []
+            for distance, start, end in sorted(candidates, key=lambda c: (c[0], c[1] - c[2], c[1])):
+                if all(end <= other_start or start >= other_end for other_start, other_end, _ in chosen):
+                    chosen.append((start, end, distance))
+            yield from sorted(chosen)
+
+# ------------------------------
+# Compiled search query
+# ------------------------------
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+def _lowered(line):
+    """
+    line.lower() and, when lowering changed its length ('İ' becomes 'i' plus
+    a combining dot), the index in line of each of its characters; else None.
+    """
+    text = line.lower()
+    if len(text) == len(line):
+        return text, None
+    return text, [i for i, ch in enumerate(line) for _ in ch.lower()]
+
+class SearchQuery:
+    """
+    A search compiled once and shared by every file handler.
+
+    - patterns: one string or a list of strings, all searched in one pass
+    - regex: treat the patterns as regular expressions
+    - whole_word: only match at word boundaries
+    - max_errors: above 0, fuzzy matching: hits may differ from a pattern by
+      up to this many inserted, deleted or substituted characters
+
+    search_line(line) returns [(pattern, start, end), ...] for every hit;
+    fuzzy hits are (pattern, start, end, distance).
+    """
+
+    def __init__(self, patterns, case_sensitive=False, regex=False, whole_word=False, max_errors=0):
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        self.patterns = [p for p in patterns if p] or list(patterns[:1])
+        self.case_sensitive = case_sensitive
+        self.regex = regex
+        self.whole_word = whole_word
+        self.max_errors = max_errors
+        self._regexes = None
+        self._automaton = None
+        self._literal = None
+        self._fuzzy = None
+
+        if max_errors:
+            if regex:
+                raise ValueError("fuzzy matching cannot be combined with regular expressions")
+            self._fuzzy = [FuzzyMatcher(p if case_sensitive else p.lower(), max_errors) for p in self.patterns]
+        elif regex:
+            flags = 0 if case_sensitive else re.IGNORECASE
+            # One regex per pattern: joined in one alternation, their numbered groups (and backreferences) would shift
+            self._regexes = [re.compile(rf"\b(?:{pattern})\b" if whole_word else pattern, flags)
+                             for pattern in self.patterns]
+        elif len(self.patterns) == 1:
+            self._literal = self.patterns[0] if case_sensitive else self.patterns[0].lower()
+        else:
+            self._automaton = AhoCorasick(p if case_sensitive else p.lower() for p in self.patterns)
+
+    @property
+    def literals(self):
+        """
+        Plain strings one of which every hit contains, or None for regex
+        queries. For fuzzy queries these are the pieces of the patterns
+        that a hit has to contain unchanged.
+        """
+        if self._fuzzy is not None:
+            return [piece for matcher in self._fuzzy for _offset, piece in matcher.pieces]
+        return None if self.regex else self.patterns
+
+    def __str__(self):
+        text = " | ".join(self.patterns)
+        return f"{text} (~{self.max_errors})" if self.max_errors else text
+
+    def search_line(self, line):
+        """Return [(pattern, start, end), ...] (plus distance for fuzzy queries) for the hits in line."""
+        if self._regexes is not None:
+            hits = [(pattern, m.start(), m.end()) for pattern, regex in zip(self.patterns, self._regexes)
+                    for m in regex.finditer(line)]
+            if len(self._regexes) > 1:
+                hits.sort(key=lambda hit: (hit[1], hit[2]))
+            return hits
+
+        text, positions = (line, None) if self.case_sensitive else _lowered(line)
+        if self._fuzzy is not None:
+            hits = [(pattern, start, end, distance) for pattern, matcher in zip(self.patterns, self._fuzzy)
+                    for start, end, distance in matcher.iter_matches(text)]
+            hits.sort(key=lambda hit: (hit[1], hit[2]))
+        elif self._literal is not None:
+            hits = []
+            needle = self._literal
+            if not needle:
+                return [(self.patterns[0], 0, 0)]
+            pos = text.find(needle)
+            while pos != -1:
+                hits.append((self.patterns[0], pos, pos + len(needle)))
+                pos = text.find(needle, pos + len(needle))
+        else:
+            hits = [(self.patterns[idx], start, end) for idx, start, end in self._automaton.iter_matches(text)]
+            hits.sort(key=lambda hit: (hit[1], hit[2]))
+
+        if self.whole_word:
+            hits = [hit for hit in hits
+                    if (hit[1] == 0 or not _is_word_char(text[hit[1] - 1]))
+                    and (hit[2] >= len(text) or not _is_word_char(text[hit[2]]))]
+        if positions is not None:
+            # Spans into the lowered text: move them back onto line
+            positions.append(len(line))
+            hits = [(hit[0], positions[hit[1]], positions[hit[2] - 1] + 1 if hit[2] > hit[1] else positions[hit[1]],
+                     *hit[3:]) for hit in hits]
+        return hits
+
+    def byte_finder(self, buf):
+        """Return a ByteFinder locating candidate hits in a UTF-8 buffer, or None for regex queries."""
+        literals = self.literals
+        if literals is None:
+            return None
+        return ByteFinder(buf, literals, self.case_sensitive)
+
+def as_query(search_text, case_sensitive=False):
+    """Wrap a plain search text (or list of texts) in a SearchQuery; queries pass through."""
+    if isinstance(search_text, SearchQuery):
+        return search_text
+    return SearchQuery(search_text, case_sensitive)
+
+# ------------------------------
+# Byte-level candidate finder
+# ------------------------------
+class ByteFinder:
+    """
+    Finds literals in a UTF-8 buffer. find(pos) returns the offset of the
+    next candidate hit at or after pos, or -1. Candidates are a superset of
+    the real hits, which the caller re-checks on the decoded line.
+
+    - case sensitive, one literal: plain buffer find
+    - case insensitive, one ASCII literal: find in lowercased chunks (bytes.lower only touches ASCII)
+    - anything else: one bytes regex alternating the literals (and for non-ASCII
+      case-insensitive text, the lower/upper encodings of each character)
+    """
+
+    CHUNK = 4 * 1024 * 1024
+
+    def __init__(self, buf, literals, case_sensitive):
+        self.buf = buf
+        self.pattern = None
+        self.chunk_start = 0
+        self.chunk = None
+        # Longest run of bytes a candidate can span, so find() with an end misses nothing that starts before it
+        self.max_len = max(len(text.encode("utf-8")) for text in literals)
+        if len(literals) == 1 and case_sensitive:
+            self.mode = "exact"
+            self.needle = literals[0].encode("utf-8")
+        elif len(literals) == 1 and literals[0].isascii():
+            self.mode = "lower"
+            self.needle = literals[0].encode("utf-8").lower()
+        else:
+            self.mode = "regex"
+            if case_sensitive:
+                alternatives = [re.escape(text.encode("utf-8")) for text in literals]
+                self.pattern = re.compile(b"|".join(alternatives))
+            elif all(text.isascii() for text in literals):
+                alternatives = [re.escape(text.encode("utf-8")) for text in literals]
+                self.pattern = re.compile(b"|".join(alternatives), re.IGNORECASE)
+            else:
+                self.pattern = re.compile(b"|".join(self._any_case(text) for text in literals))
+                self.max_len = max(sum(max(len(v.encode("utf-8")) for v in (ch, ch.lower(), ch.upper())) for ch in text)
+                                   for text in literals)
+
+    @staticmethod
+    def _any_case(text):
+        parts = []
+        for ch in text:
+            variants = sorted({re.escape(v.encode("utf-8")) for v in (ch, ch.lower(), ch.upper())})
+            parts.append(variants[0] if len(variants) == 1 else b"(?:" + b"|".join(variants) + b")")
+        return b"".join(parts)
+
+    def find(self, pos, end=None):
+        """
+        Offset of the next candidate at or after pos, or -1. With end, only
+        candidates starting before end are looked for (later ones may still
+        be returned), so a long scan can be split into slices.
+        """
+        size = len(self.buf)
+        limit = size if end is None else min(size, end + self.max_len - 1)
+        if self.mode == "exact":
+            return self.buf.find(self.needle, pos, limit)
+        if self.mode == "regex":
+            hit = self.pattern.search(self.buf, pos, limit)
+            return hit.start() if hit else -1
+
+        overlap = max(len(self.needle) - 1, 0)
+        while pos < limit:
+            if self.chunk is None or not (self.chunk_start <= pos < self.chunk_start + len(self.chunk) - overlap):
+                self.chunk_start = pos
+                self.chunk = self.buf[pos:pos + self.CHUNK].lower()
+            idx = self.chunk.find(self.needle, pos - self.chunk_start, limit - self.chunk_start)
+            if idx != -1:
+                return self.chunk_start + idx
+            if self.chunk_start + len(self.chunk) >= size:
+                return -1
+            pos = self.chunk_start + len(self.chunk) - overlap
+        return -1
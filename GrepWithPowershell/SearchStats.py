@@ -0,0 +1,313 @@
+import os
+import sys
+import time
+import heapq
+import threading
+from contextlib import contextmanager
+from ArchiveReaders import is_archive
+
+STAGES = ("walk", "index", "hash", "extract", "match")
+MAX_ERROR_SAMPLES = 50
+
+def file_type_of(file_path):
+    """'pdf', 'docx', 'xlsx', 'archive' or 'text', the handler a file goes to."""
+    if is_archive(file_path):
+        return "archive"
+    ext = os.path.splitext(file_path)[1].lower()
+    return ext[1:] if ext in (".pdf", ".docx", ".xlsx") else "text"
+
+# ------------------------------
+# Per-file stats
+# ------------------------------
+_local = threading.local()
+
+class FileStats:
+    """
+    Timing and errors of one search_file() call. Plain attributes so it
+    can be pickled back from worker processes.
+
+    - seconds: time spent in the handler
+    - extract_seconds: part of it spent extracting text (PDF pages, DOCX
+      paragraphs, XLSX cells, text cache included); the rest is matching
+    - errors: [(kind, message), ...]
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.file_type = file_type_of(file_path)
+        try:
+            self.bytes = os.path.getsize(file_path)
+        except OSError:
+            self.bytes = 0
+        self.seconds = 0.0
+        self.extract_seconds = 0.0
+        self.errors = []
+
+    @contextmanager
+    def active(self):
+        """Time the block and make these the stats that report_error() and timed_extract() feed."""
+        previous = getattr(_local, "file_stats", None)
+        _local.file_stats = self
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.seconds += time.perf_counter() - start
+            _local.file_stats = previous
+
+    def merge(self, other):
+        """Add the stats of another part (page range) of the same file."""
+        self.seconds += other.seconds
+        self.extract_seconds += other.extract_seconds
+        self.errors += other.errors
+
+def report_error(kind, file_path, error, log=None):
+    """
+    Print a handler error (log, or 'Error reading KIND path: error') to
+    stderr, keeping stdout for results, and count it in the active FileStats.
+    """
+    print(log or f"Error reading {kind.upper()} {file_path}: {error}", file=sys.stderr)
+    file_stats = getattr(_local, "file_stats", None)
+    if file_stats is not None:
+        file_stats.errors.append((kind, str(error)))
+
+def timed_extract(units):
+    """Wrap a lazy text extractor so the time spent producing units counts as extraction."""
+    file_stats = getattr(_local, "file_stats", None)
+    if file_stats is None:
+        yield from units
+        return
+    units = iter(units)
+    while True:
+        start = time.perf_counter()
+        try:
+            unit = next(units)
+        except StopIteration:
+            return
+        finally:
+            file_stats.extract_seconds += time.perf_counter() - start
+        yield unit
+
+# ------------------------------
+# Search-wide stats
+# ------------------------------
+class SearchStats:
+    """
+    Structured statistics of one search, attached to the final SearchSummary.
+
+    - by_type: {file_type: {'files', 'bytes', 'matches', 'errors', 'seconds', 'extract_seconds'}}
+    - stages: seconds per stage: walk, index and hash (finding identical
+      copies) run in the main process;
+      extract and match are summed over all workers, so with several
+      workers they can add up to more than the wall time
+    - slowest(): the N slowest files as (seconds, file_path, file_type)
+    - errors: {kind: count}, with the first MAX_ERROR_SAMPLES messages in error_samples
+    """
+
+    def __init__(self, slowest_count=10):
+        self.slowest_count = slowest_count
+        self.by_type = {}
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.errors = {}
+        self.error_samples = []
+        self.wall_seconds = 0.0
+        self._slowest = []  # min-heap of (seconds, file_path, file_type)
+
+    def add_file(self, file_stats, matches=0):
+        totals = self.by_type.setdefault(file_stats.file_type, {
+            'files': 0, 'bytes': 0, 'matches': 0, 'errors': 0, 'seconds': 0.0, 'extract_seconds': 0.0})
+        totals['files'] += 1
+        totals['bytes'] += file_stats.bytes
+        totals['matches'] += matches
+        totals['errors'] += len(file_stats.errors)
+        totals['seconds'] += file_stats.seconds
+        totals['extract_seconds'] += file_stats.extract_seconds
+        self.stages['extract'] += file_stats.extract_seconds
+        self.stages['match'] += max(0.0, file_stats.seconds - file_stats.extract_seconds)
+        for kind, message in file_stats.errors:
+            self.add_error(kind, file_stats.file_path, message)
+
+        entry = (file_stats.seconds, file_stats.file_path, file_stats.file_type)
+        if len(self._slowest) < self.slowest_count:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def add_error(self, kind, file_path, message):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+        if len(self.error_samples) < MAX_ERROR_SAMPLES:
+            self.error_samples.append((kind, file_path, message))
+
+    @property
+    def error_count(self):
+        return sum(self.errors.values())
+
+    def slowest(self):
+        return sorted(self._slowest, reverse=True)
+
+    def summary(self):
+        """One line for a status bar."""
+        stages = ", ".join(f"{stage} {self.stages[stage]:.2f}s" for stage in STAGES if self.stages[stage] >= 0.005)
+        text = f"{self.wall_seconds:.2f}s ({stages or 'no work'})"
+        if self.errors:
+            text += f" - {self.error_count} errors"
+        return text
+
+    def report(self):
+        """Multi-line plain-text report: per type, per stage, slowest files and errors."""
+        lines = [f"Total time: {self.wall_seconds:.3f}s", "", "Per file type:"]
+        lines.append(f"  {'type':<6} {'files':>7} {'MB':>9} {'matches':>8} {'errors':>7} {'seconds':>9} {'extract':>9}")
+        for file_type, totals in sorted(self.by_type.items()):
+            lines.append(f"  {file_type:<6} {totals['files']:>7} {totals['bytes'] / 2 ** 20:>9.2f} {totals['matches']:>8} "
+                         f"{totals['errors']:>7} {totals['seconds']:>9.3f} {totals['extract_seconds']:>9.3f}")
+        lines += ["", "Per stage (extract and match summed over workers):"]
+        lines += [f"  {stage:<8} {self.stages[stage]:.3f}s" for stage in STAGES]
+        lines += ["", f"Slowest {self.slowest_count} files:"]
+        lines += [f"  {seconds:8.3f}s  {file_type:<5} {file_path}" for seconds, file_path, file_type in self.slowest()]
+        if self.errors:
+            lines += ["", "Errors: " + ", ".join(f"{kind} {count}" for kind, count in sorted(self.errors.items()))]
+            lines += [f"  [{kind}] {file_path}: {message}" for kind, file_path, message in self.error_samples]
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            'wall_seconds': self.wall_seconds,
+            'by_type': self.by_type,
+            'stages': self.stages,
+            'slowest': [{'seconds': seconds, 'file_path': file_path, 'file_type': file_type}
+                        for seconds, file_path, file_type in self.slowest()],
+            'errors': self.errors,
+            'error_samples': [{'kind': kind, 'file_path': file_path, 'message': message}
+                              for kind, file_path, message in self.error_samples],
+        }
+
+# ------------------------------
+# Live progress
+# ------------------------------
+# Seconds between two progress callbacks
+PROGRESS_INTERVAL = 0.25
+
+def _format_duration(seconds):
+    seconds = int(seconds + 0.5)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds // 60 % 60:02}:{seconds % 60:02}"
+    return f"{seconds // 60}:{seconds % 60:02}"
+
+class SearchProgress:
+    """
+    Live counters of a running search, handed to the progress callback of
+    searcher() / iter_search() at most every interval seconds (and once
+    more when the search ends). The same object is updated all along:
+    copy what you keep beyond the call.
+
+    - phase: 'counting' (pre-count walk), 'searching' or 'done'
+    - files_found: files the walk has listed so far
+    - files_scanned, bytes_scanned: files searched so far and their size
+    - files_skipped, bytes_skipped: files ruled out by the index or
+      identical to one already searched
+    - current_file: the file being searched (with workers, the one the
+      results wait for)
+    - matches: matches found so far
+    - total_files, total_bytes: what the pre-count walk found, else None
+    - elapsed: seconds since the search started
+    - search_seconds: the part of it spent searching (after the pre-count)
+
+    files_per_second, mb_per_second, fraction and eta_seconds are derived
+    from them; summary() puts it all on one line.
+    """
+
+    def __init__(self, callback, interval=PROGRESS_INTERVAL):
+        self.callback = callback
+        self.interval = interval
+        self.phase = "searching"
+        self.files_found = 0
+        self.files_scanned = 0
+        self.bytes_scanned = 0
+        self.files_skipped = 0
+        self.bytes_skipped = 0
+        self.current_file = None
+        self.matches = 0
+        self.total_files = None
+        self.total_bytes = None
+        self.elapsed = 0.0
+        self.search_seconds = 0.0
+        self._start = self._search_start = time.perf_counter()
+        self._last_report = None
+
+    def set_phase(self, phase):
+        now = time.perf_counter()
+        if self.phase == "searching":
+            self.search_seconds = now - self._search_start
+        if phase == "searching":
+            self._search_start = now
+        self.phase = phase
+        self.report(force=True)
+
+    def report(self, force=False):
+        """Call the callback if interval seconds went by since the last call (or force)."""
+        now = time.perf_counter()
+        if not force and self._last_report is not None and now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        self.elapsed = now - self._start
+        if self.phase == "searching":
+            self.search_seconds = now - self._search_start
+        self.callback(self)
+
+    def scanned(self, file_stats, matches=0):
+        """Count a searched file (its FileStats) and its matches."""
+        self.files_scanned += 1
+        self.bytes_scanned += file_stats.bytes
+        self.matches += matches
+        self.report()
+
+    def skipped(self, file_path):
+        """Count a file that is not searched; its size only matters for the percentage."""
+        self.files_skipped += 1
+        if self.total_bytes is not None:
+            try:
+                self.bytes_skipped += os.path.getsize(file_path)
+            except OSError:
+                pass
+
+    @property
+    def files_per_second(self):
+        return self.files_scanned / self.search_seconds if self.search_seconds > 0 else 0.0
+
+    @property
+    def mb_per_second(self):
+        return self.bytes_scanned / 2 ** 20 / self.search_seconds if self.search_seconds > 0 else 0.0
+
+    @property
+    def fraction(self):
+        """Share of the work done (0 to 1), by bytes; None without a pre-count."""
+        if self.total_bytes is None:
+            return None
+        if self.phase == "done":
+            return 1.0
+        if self.total_bytes:
+            return min(1.0, (self.bytes_scanned + self.bytes_skipped) / self.total_bytes)
+        return min(1.0, (self.files_scanned + self.files_skipped) / self.total_files) if self.total_files else 1.0
+
+    @property
+    def eta_seconds(self):
+        """Seconds left at the current pace; None without a pre-count or before anything was done."""
+        fraction = self.fraction
+        if fraction is None or fraction <= 0 or self.phase != "searching":
+            return None
+        return self.search_seconds * (1 - fraction) / fraction
+
+    def summary(self):
+        """One line for a status bar."""
+        if self.phase == "counting":
+            return f"Counting files: {self.files_found:,} so far"
+        done = self.files_scanned + self.files_skipped
+        if self.total_files is not None:
+            parts = [f"{done:,}/{self.total_files:,} files ({self.fraction:.0%})"]
+        else:
+            parts = [f"{done:,}/{self.files_found:,} files"]
+        parts += [f"{self.mb_per_second:.1f} MB/s", f"{self.files_per_second:.0f} files/s", f"{self.matches:,} matches"]
+        eta = self.eta_seconds
+        if eta is not None:
+            parts.append(f"ETA {_format_duration(eta)}")
+        return " - ".join(parts)
@@ -0,0 +1,286 @@
+import os
+from SearchQuery import SearchQuery
+from FileWalker import walk_files, parse_extensions, file_filter
+from FileWatchers import get_watch_backend
+from SearchStats import file_type_of
+from ArchiveReaders import MEMBER_SEPARATOR
+from SearchMatch import Match, MatchFile, file_stamp, with_file
+from SearchHelper import (iter_search, search_file_timed, search_text_range, SearchSummary,
+                          BINARY_SNIFF_BYTES, PDF_TIMEOUT)
+
+# ------------------------------
+# Watch mode
+# ------------------------------
+TAIL_CHUNK = 64 * 1024
+
+def _rewritten_key(match):
+    """
+    What tells a match apart after its file was rewritten: its location and
+    context. None for lazy text matches, whose context is read from the file
+    as it is now, so an old one cannot be compared with a new one.
+    """
+    if isinstance(match, Match) and match.lazy:
+        return None
+    return match[0], match[1]
+
+class WatchUpdate:
+    """
+    One change pushed by SearchWatcher.run():
+
+    - reason: 'created', 'modified', 'appended', 'truncated' or 'deleted'
+    - file_path: the file on disk that changed
+    - entries: its current results [(path, matches), ...] (empty when it no
+      longer matches); archives have one entry per member
+    - new_entries: the matches that were not reported before, same shape
+    """
+
+    def __init__(self, reason, file_path, entries, new_entries):
+        self.reason = reason
+        self.file_path = file_path
+        self.entries = entries
+        self.new_entries = new_entries
+
+    def __repr__(self):
+        return f"WatchUpdate({self.reason!r}, {self.file_path!r}, {sum(len(m) for _, m in self.new_entries)} new)"
+
+class SearchWatcher:
+    """
+    Runs a search once, keeps its results, then re-searches only the files
+    that are created, modified or truncated while it watches. Text files
+    that grow (logs) are only read from where the last search stopped,
+    so following a big log costs the size of what was appended.
+
+    Arguments are the ones of iter_search() (without max_total_results), plus:
+    - backend: "inotify", "poll" or "auto" (inotify where it works, else polling)
+    - interval: seconds between two polls with the polling backend
+
+    dedup, progress and precount only apply to the first search; changed files are searched on their own.
+    """
+
+    def __init__(self, folder, search_text, extensions="*", case_sensitive=False, recursive=True,
+                 lines_before=2, lines_after=2, workers=None, index=None, regex=False, whole_word=False,
+                 exclude=None, max_size=None, modified_since=None, max_depth=None, follow_symlinks=False,
+                 pdf_backend=None, pdf_timeout=PDF_TIMEOUT,
+                 files_with_matches_only=False, max_matches_per_file=None, profile=None, max_errors=0,
+                 dedup=None, progress=None, precount=False, backend="auto", interval=2.0):
+        self.folder = folder
+        self.query = search_text if isinstance(search_text, SearchQuery) else SearchQuery(search_text, case_sensitive, regex, whole_word, max_errors)
+        self.case_sensitive = case_sensitive
+        self.walk_options = {'extensions': parse_extensions(extensions), 'recursive': recursive, 'exclude': exclude,
+                             'max_size': max_size, 'modified_since': modified_since, 'max_depth': max_depth}
+        self.follow_symlinks = follow_symlinks
+        # The first search is a plain iter_search()
+        self.search_kwargs = dict(extensions=extensions, case_sensitive=case_sensitive, recursive=recursive,
+                                  lines_before=lines_before, lines_after=lines_after, workers=workers, index=index,
+                                  exclude=exclude, max_size=max_size, modified_since=modified_since,
+                                  max_depth=max_depth, follow_symlinks=follow_symlinks, pdf_backend=pdf_backend,
+                                  pdf_timeout=pdf_timeout, files_with_matches_only=files_with_matches_only,
+                                  max_matches_per_file=max_matches_per_file, profile=profile, dedup=dedup,
+                                  progress=progress, precount=precount)
+        if files_with_matches_only:
+            max_matches_per_file = 1
+            lines_before = lines_after = 0
+        self.lines_before = lines_before
+        self.lines_after = lines_after
+        self.max_matches = max_matches_per_file
+        self.file_options = {'max_matches': max_matches_per_file, 'pdf_backend': pdf_backend, 'pdf_timeout': pdf_timeout}
+        self.backend = backend
+        self.interval = interval
+        self.wanted = file_filter(folder, **self.walk_options)
+
+        self.results = {}    # file path -> [(path, matches), ...], the current result set
+        self._snapshot = {}  # file path -> (size, mtime_ns, inode) of every watched file
+        self._tails = {}     # text file path -> (size searched, newlines before it), or None for binary files
+
+    # ------------------------------
+    # File states
+    # ------------------------------
+    def _scan(self):
+        snapshot = {}
+        for entry in walk_files(self.folder, follow_symlinks=self.follow_symlinks, **self.walk_options):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            snapshot[entry.path] = (st.st_size, st.st_mtime_ns, st.st_ino)
+        return snapshot
+
+    def _state(self, file_path):
+        """(size, mtime_ns, inode) if file_path is a file this search covers, else None."""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        if not os.path.isfile(file_path) or not self.wanted(file_path, st):
+            return None
+        return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+    def _tail_state(self, file_path, size):
+        """(size, newlines in the first size bytes) of a text file, None if it is binary."""
+        if file_path not in self._tails:
+            newlines = 0
+            with open(file_path, "rb") as f:
+                if b"\0" in f.read(BINARY_SNIFF_BYTES):
+                    self._tails[file_path] = None
+                    return None
+                f.seek(0)
+                remaining = size
+                while remaining > 0:
+                    chunk = f.read(min(remaining, 1024 * 1024))
+                    if not chunk:
+                        break
+                    newlines += chunk.count(b"\n")
+                    remaining -= len(chunk)
+            self._tails[file_path] = (size, newlines)
+        return self._tails[file_path]
+
+    # ------------------------------
+    # Re-searching changed files
+    # ------------------------------
+    def _search_whole(self, file_path):
+        self._tails.pop(file_path, None)
+        entries, _file_stats = search_file_timed(file_path, self.query, self.case_sensitive,
+                                                 self.lines_before, self.lines_after, **self.file_options)
+        if self.max_matches:
+            entries = [(path, matches[:self.max_matches]) for path, matches in entries]
+        return [(path, matches) for path, matches in entries if matches]
+
+    def _search_appended(self, file_path, old_size, new_size):
+        """
+        Search only what was appended to a text file since old_size, from
+        the start of the line that held its last byte (which may have been
+        completed since). Contexts of earlier matches are read from the file
+        when shown, so they already include the new lines; all matches are
+        stamped with the grown file, as their text did not change.
+        """
+        tail = self._tail_state(file_path, old_size)
+        if tail is None:
+            return []
+        _, newlines = tail
+        first_changed = newlines + 1  # line that holds byte old_size
+        start = self._line_start(file_path, old_size, 1)
+
+        matches = search_text_range(file_path, self.query, self.case_sensitive, self.lines_before,
+                                    self.lines_after, start=start, first_line=first_changed)
+        old_matches = self.results.get(file_path, [(file_path, [])])[0][1]
+        matches = [match for match in old_matches if match[0] < first_changed] + matches
+        matches = with_file(matches, MatchFile(file_path, self.lines_before, self.lines_after,
+                                               file_stamp(os.stat(file_path))))
+        if self.max_matches:
+            matches = matches[:self.max_matches]
+
+        with open(file_path, "rb") as f:
+            f.seek(old_size)
+            appended = f.read(new_size - old_size)
+        self._tails[file_path] = (old_size + len(appended), newlines + appended.count(b"\n"))
+        return [(file_path, matches)] if matches else []
+
+    @staticmethod
+    def _line_start(file_path, end, lines):
+        """Byte offset where the lines-th last line before offset end starts (the line holding end counts as 1)."""
+        with open(file_path, "rb") as f:
+            size = TAIL_CHUNK
+            while True:
+                start = max(0, end - size)
+                f.seek(start)
+                data = f.read(end - start)
+                pos = len(data)
+                for _ in range(lines):
+                    pos = data.rfind(b"\n", 0, pos)
+                    if pos == -1:
+                        break
+                if pos != -1:
+                    return start + pos + 1
+                if start == 0:
+                    return 0
+                size *= 2
+
+    def _check(self, file_path):
+        """Compare a path with its last known state; re-search it and return a WatchUpdate if its results changed."""
+        old = self._snapshot.get(file_path)
+        new = self._state(file_path)
+        if old == new:
+            return None
+        if new is None:
+            reason = "deleted"
+            del self._snapshot[file_path]
+            self._tails.pop(file_path, None)
+            entries = []
+        else:
+            self._snapshot[file_path] = new
+            if old is None:
+                reason = "created"
+            elif new[2] != old[2] or new[0] < old[0]:
+                reason = "truncated"  # rewritten, truncated or rotated
+            elif new[0] > old[0] and file_type_of(file_path) == "text":
+                reason = "appended"
+            else:
+                reason = "modified"
+            try:
+                if reason == "appended":
+                    entries = self._search_appended(file_path, old[0], new[0])
+                else:
+                    entries = self._search_whole(file_path)
+            except OSError:
+                return self._check(file_path)  # vanished while being read
+
+        previous = self.results.pop(file_path, [])
+        if entries:
+            self.results[file_path] = entries
+        if not entries and not previous:
+            return None
+        new_entries = []
+        if reason == "appended":
+            # Lines before the old end of the file were reported already; only later line numbers are new
+            seen = {path: {match[0] for match in matches} for path, matches in previous}
+            key = lambda match: match[0]
+        else:
+            # Rewritten: line N may now hold other text, so only an identical location and context is old
+            seen = {path: {_rewritten_key(match) for match in matches} - {None} for path, matches in previous}
+            key = _rewritten_key
+        for path, matches in entries:
+            old_keys = seen.get(path, ())
+            fresh = [match for match in matches if key(match) is None or key(match) not in old_keys]
+            if fresh:
+                new_entries.append((path, fresh))
+        if entries == previous:
+            return None
+        return WatchUpdate(reason, file_path, entries, new_entries)
+
+    # ------------------------------
+    # Main loop
+    # ------------------------------
+    def run(self, stop_flag=None):
+        """
+        Yield what iter_search() yields for the first search: (path, matches)
+        for each file with matches, then a SearchSummary. Then keep watching
+        and yield a WatchUpdate for every file whose results changed, until
+        stop_flag['stop'] is set or the generator is closed.
+        """
+        self._snapshot = self._scan()
+        for item in iter_search(self.folder, self.query, stop_flag=stop_flag, **self.search_kwargs):
+            if not isinstance(item, SearchSummary):
+                path, matches = item
+                self.results.setdefault(path.split(MEMBER_SEPARATOR, 1)[0], []).append((path, matches))
+            yield item
+
+        watcher = get_watch_backend(self.backend, self.folder, self.walk_options['recursive'],
+                                    self.walk_options['exclude'], self.walk_options['max_depth'],
+                                    self.follow_symlinks, self.interval)
+        try:
+            # Catch what changed while the first search ran
+            changed = None
+            while not (stop_flag and stop_flag.get('stop')):
+                if changed is None:
+                    current = self._scan()
+                    changed = [path for path in set(current) | set(self._snapshot)
+                               if current.get(path) != self._snapshot.get(path)]
+                for file_path in sorted(changed):
+                    if stop_flag and stop_flag.get('stop'):
+                        break
+                    update = self._check(file_path)
+                    if update is not None:
+                        yield update
+                changed = watcher.wait(0.5)
+        finally:
+            watcher.close()
@@ -0,0 +1,274 @@
+import os
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import tempfile
+import threading
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# A hit on an entry used less than this many seconds ago leaves its last_used alone
+LRU_RESOLUTION = 60.0
+# Eviction frees space down to this share of max_bytes, so it does not run again on the next put
+EVICT_TO = 0.9
+# The running total of cached bytes is recounted from the database every this many puts
+# (other processes share the cache and replaced entries are not subtracted)
+RECOUNT_PUTS = 64
+# Units are compressed and stored in chunks of about this many characters of JSON
+CHUNK_CHARS = 1024 * 1024
+
+def default_cache_path():
+    """The cache lives next to the search indexes, in the user cache dir."""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "GrepWithPowershell", "text-cache.sqlite")
+
+# ------------------------------
+# Persistent extracted-text cache
+# ------------------------------
+class TextCache:
+    """
+    Persistent cache of text extracted from PDF, DOCX and XLSX files.
+
+    Entries are keyed by (path, kind) and only valid while the file keeps the
+    same size and mtime. kind names the reader that produced the units, so a
+    reader that changes its output just uses a new kind. Each entry stores the
+    extracted units (pages, paragraphs or cells) as chunks of compressed JSON,
+    written and read back one chunk at a time, so neither caching nor
+    reading a big document holds all of its text. When the cache grows past max_bytes the
+    least recently used entries are evicted.
+
+    Hits only write last_used once per LRU_RESOLUTION seconds per entry, and
+    puts keep a running total of the cached bytes instead of summing the
+    table every time.
+    """
+
+    def __init__(self, cache_path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_path = cache_path or default_cache_path()
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._total = None  # bytes cached, as far as this object knows; None until counted
+        self._puts = 0
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        self._connect().executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                nbytes INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (path, kind)
+            );
+            CREATE INDEX IF NOT EXISTS files_lru ON files(last_used);
+            CREATE TABLE IF NOT EXISTS chunks (
+                path TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (path, kind, seq)
+            );
+        """)
+
+    def _connect(self):
+        # SQLite connections are per thread; worker processes get their own cache object
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.cache_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, file_path, kind):
+        """Return the cached units of file_path as a list, or None if missing or stale."""
+        units = self.iter_units(file_path, kind)
+        return None if units is None else list(units)
+
+    def iter_units(self, file_path, kind):
+        """
+        Return an iterator over the cached units of file_path, or None if
+        missing or stale. Only one chunk of units is in memory at a time.
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        conn = self._connect()
+        key = (os.path.abspath(file_path), kind)
+        row = conn.execute("SELECT size, mtime, last_used FROM files WHERE path = ? AND kind = ?", key).fetchone()
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime:
+            return None
+        now = time.time()
+        if now - row[2] >= LRU_RESOLUTION:
+            try:
+                conn.execute("UPDATE files SET last_used = ? WHERE path = ? AND kind = ?", (now, *key))
+                conn.commit()
+            except sqlite3.OperationalError:
+                pass  # another process holds the write lock, LRU order can lag a bit
+        return self._iter_chunks(key)
+
+    def _iter_chunks(self, key):
+        # Own connection: its one SELECT reads a consistent snapshot however long the caller takes,
+        # while the thread's connection keeps writing
+        conn = sqlite3.connect(self.cache_path, timeout=30)
+        try:
+            for data, in conn.execute("SELECT data FROM chunks WHERE path = ? AND kind = ? ORDER BY seq", key):
+                yield from json.loads(zlib.decompress(data))
+        finally:
+            conn.close()
+
+    def has(self, file_path, kind):
+        """Cheap freshness check, without loading the entry."""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return False
+        row = self._connect().execute("SELECT size, mtime FROM files WHERE path = ? AND kind = ?",
+                                      (os.path.abspath(file_path), kind)).fetchone()
+        return row is not None and row[0] == st.st_size and row[1] == st.st_mtime
+
+    def put(self, file_path, kind, units):
+        """Store the extracted units (any iterable) of file_path, then evict down to max_bytes."""
+        writer = self.writer(file_path, kind)
+        if writer is None:
+            return
+        try:
+            for unit in units:
+                writer.add(unit)
+            writer.commit()
+        finally:
+            writer.discard()
+
+    def writer(self, file_path, kind):
+        """A CacheWriter to store the units of file_path while they are read, or None if it is gone."""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return CacheWriter(self, file_path, kind, st)
+
+    def _store(self, file_path, kind, st, spill, chunk_sizes, nbytes):
+        """Replace the entry of file_path with the chunks spilled by a CacheWriter, in one transaction."""
+        conn = self._connect()
+        key = (os.path.abspath(file_path), kind)
+        try:
+            conn.execute("DELETE FROM chunks WHERE path = ? AND kind = ?", key)
+            for seq, size in enumerate(chunk_sizes):
+                conn.execute("INSERT INTO chunks (path, kind, seq, data) VALUES (?, ?, ?, ?)",
+                             (*key, seq, spill.read(size)))
+            conn.execute("INSERT OR REPLACE INTO files (path, kind, size, mtime, nbytes, last_used) "
+                         "VALUES (?, ?, ?, ?, ?, ?)",
+                         (*key, st.st_size, st.st_mtime, nbytes, time.time()))
+            self._evict(conn, nbytes)
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            self._total = None
+            print(f"Cannot cache text of {file_path}: {e}", file=sys.stderr)
+
+    def _evict(self, conn, added):
+        """Evict the least recently used entries down to EVICT_TO of max_bytes once the cache is over max_bytes."""
+        self._puts += 1
+        if self._total is not None and self._puts % RECOUNT_PUTS:
+            self._total += added
+            if self._total <= self.max_bytes:
+                return
+        # Unknown, due for a recount or over the limit: count what is really there
+        total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM files").fetchone()[0]
+        if total > self.max_bytes:
+            target = max(self.max_bytes * EVICT_TO, added)  # never the entry just stored
+            for path, kind, nbytes in conn.execute("SELECT path, kind, nbytes FROM files ORDER BY last_used").fetchall():
+                conn.execute("DELETE FROM files WHERE path = ? AND kind = ?", (path, kind))
+                conn.execute("DELETE FROM chunks WHERE path = ? AND kind = ?", (path, kind))
+                total -= nbytes
+                if total <= target:
+                    break
+        self._total = total
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM files")
+        conn.execute("DELETE FROM chunks")
+        conn.commit()
+        self._total = 0
+
+class CacheWriter:
+    """
+    Collects the units of one file for the cache while they are read:
+    add() them one by one, then commit() once the file was read to the end,
+    or discard() to drop them. Units are compressed in chunks of about
+    CHUNK_CHARS and spilled to a temporary file, so only one chunk is held
+    in memory; the cache is only written, in one go, by commit(). A file
+    whose chunks outgrow max_bytes, or that changed while it was read, is not cached.
+    """
+
+    def __init__(self, cache, file_path, kind, st):
+        self.cache = cache
+        self.file_path = file_path
+        self.kind = kind
+        self.st = st
+        self._spill = tempfile.TemporaryFile()
+        self._chunk_sizes = []
+        self._nbytes = 0
+        self._pending = []  # JSON of the units of the current chunk
+        self._pending_chars = 0
+
+    def add(self, unit):
+        if self._spill is None:
+            return
+        text = json.dumps(unit, ensure_ascii=False)
+        self._pending.append(text)
+        self._pending_chars += len(text)
+        if self._pending_chars >= CHUNK_CHARS:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        data = zlib.compress(("[" + ",".join(self._pending) + "]").encode("utf-8"))
+        self._pending = []
+        self._pending_chars = 0
+        self._nbytes += len(data)
+        if self._nbytes > self.cache.max_bytes:
+            self.discard()
+            return
+        self._spill.write(data)
+        self._chunk_sizes.append(len(data))
+
+    def commit(self):
+        """Store what was added, unless the file changed since the writer was made."""
+        if self._spill is None:
+            return
+        self._flush()
+        if self._spill is None:
+            return
+        try:
+            st = os.stat(self.file_path)
+        except OSError:
+            st = None
+        if st is not None and st.st_size == self.st.st_size and st.st_mtime == self.st.st_mtime:
+            self._spill.seek(0)
+            self.cache._store(self.file_path, self.kind, self.st, self._spill, self._chunk_sizes, self._nbytes)
+        self.discard()
+
+    def discard(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        self._pending = []
+
+# ------------------------------
+# Per-process default cache
+# ------------------------------
+_default_cache = None
+
+def get_text_cache():
+    """Return the process-wide TextCache, or None if it cannot be opened."""
+    global _default_cache
+    if _default_cache is None:
+        try:
+            _default_cache = TextCache()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Text cache disabled: {e}", file=sys.stderr)
+            _default_cache = False
+    return _default_cache or None
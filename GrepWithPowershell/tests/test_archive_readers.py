@@ -0,0 +1,48 @@
+import io
+import zipfile
+from ArchiveReaders import iter_archive
+from SearchHelper import search_archive
+from SearchStats import FileStats
+
+def _make_outer_zip(path):
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("a.txt", "first needle\n")
+        zf.writestr("bad.zip", b"this is not a zip file")
+        zf.writestr("z.txt", "last needle\n")
+
+def test_corrupt_nested_zip_is_skipped_not_the_rest(tmp_path):
+    outer = str(tmp_path / "outer.zip")
+    _make_outer_zip(outer)
+    errors = []
+    members = [member_path for member_path, _, _ in iter_archive(outer, lambda path, e: errors.append(path))]
+    assert members == [f"{outer}!/a.txt", f"{outer}!/z.txt"]
+    assert errors == [f"{outer}!/bad.zip"]
+
+def test_corrupt_nested_zip_raises_without_on_error(tmp_path):
+    outer = str(tmp_path / "outer.zip")
+    _make_outer_zip(outer)
+    try:
+        list(iter_archive(outer))
+    except zipfile.BadZipFile:
+        return
+    raise AssertionError("BadZipFile not raised")
+
+def test_search_archive_reports_the_nested_member(tmp_path):
+    outer = str(tmp_path / "outer.zip")
+    _make_outer_zip(outer)
+    file_stats = FileStats(outer)
+    with file_stats.active():
+        results = search_archive(outer, "needle", False, 0, 0)
+    assert [member_path for member_path, _ in results] == [f"{outer}!/a.txt", f"{outer}!/z.txt"]
+    assert len(file_stats.errors) == 1
+    assert file_stats.errors[0][0] == "archive"
+
+def test_nested_zip_is_searched(tmp_path):
+    inner = io.BytesIO()
+    with zipfile.ZipFile(inner, "w") as zf:
+        zf.writestr("deep.txt", "a needle\n")
+    outer = str(tmp_path / "outer.zip")
+    with zipfile.ZipFile(outer, "w") as zf:
+        zf.writestr("inner.zip", inner.getvalue())
+    results = search_archive(outer, "needle", False, 0, 0)
+    assert [member_path for member_path, _ in results] == [f"{outer}!/inner.zip!/deep.txt"]
@@ -0,0 +1,71 @@
+import ContentHashes
+from ContentHashes import DuplicateResult, HashCache, unique_files
+from SearchHelper import iter_search, SearchSummary
+
+def _files(folder, contents):
+    paths = []
+    for name, data in contents.items():
+        path = folder / name
+        path.write_bytes(data)
+        paths.append(str(path))
+    return paths
+
+def test_unique_files_groups_identical_content(tmp_path):
+    head = b"x" * ContentHashes.HEAD_BYTES
+    a, b, c, d, e, f = _files(tmp_path, {
+        "a": b"same", "b": b"diff", "c": b"same",    # same size, one different
+        "d": head + b"1", "e": head + b"2", "f": head + b"1",  # same first block, different tails
+    })
+    unique, copies = unique_files([a, b, c, d, e, f])
+    assert unique == [a, b, d, e]
+    assert copies == {a: [c], d: [f]}
+
+def test_hashes_are_reused_while_the_file_is_unchanged(tmp_path, monkeypatch):
+    a, b = _files(tmp_path, {"a": b"same", "b": b"same"})
+    cache = HashCache(str(tmp_path / "hashes.sqlite"))
+    try:
+        unique_files([a, b], cache)
+
+        def no_reading(*args):
+            raise AssertionError("hashed again")
+        monkeypatch.setattr(ContentHashes, "content_hash", no_reading)
+        assert unique_files([a, b], cache) == ([a], {a: [b]})
+    finally:
+        cache.close()
+
+def _search(folder, dedup):
+    items = list(iter_search(str(folder), "needle", lines_before=0, lines_after=0, workers=1, dedup=dedup))
+    assert isinstance(items[-1], SearchSummary)
+    return items[:-1], items[-1]
+
+def test_dedup_all_reports_every_copy(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+    folder = tmp_path / "docs"
+    folder.mkdir()
+    (folder / "a.txt").write_text("a needle\n")
+    (folder / "b.txt").write_text("a needle\n")
+    (folder / "c.txt").write_text("c needle\n")
+
+    results, summary = _search(folder, "all")
+    assert summary.duplicate_files == 1
+    assert sorted((path, [tuple(match) for match in matches]) for path, matches in results) == [
+        (str(folder / "a.txt"), [(1, "a needle", [("needle", 2, 8)])]),
+        (str(folder / "b.txt"), [(1, "a needle", [("needle", 2, 8)])]),
+        (str(folder / "c.txt"), [(1, "c needle", [("needle", 2, 8)])]),
+    ]
+    # A copy's lazy context is read from the copy itself
+    copy_matches = dict(results)[str(folder / "b.txt")]
+    assert copy_matches[0].file.path == str(folder / "b.txt")
+
+def test_dedup_group_lists_the_copies(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+    folder = tmp_path / "docs"
+    folder.mkdir()
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (folder / name).write_text("needle\n")
+
+    results, summary = _search(folder, "group")
+    [result] = results
+    assert isinstance(result, DuplicateResult)
+    assert summary.total_matches == 1
+    assert sorted([result[0], *result.copies]) == [str(folder / name) for name in ("a.txt", "b.txt", "c.txt")]
@@ -0,0 +1,31 @@
+from FileWalker import IgnoreRules
+
+def test_unanchored_patterns_match_at_any_depth():
+    rules = IgnoreRules("*.log, node_modules/")
+    assert rules.is_excluded("app.log", False)
+    assert rules.is_excluded("a/b/app.log", False)
+    assert rules.is_excluded("node_modules", True)
+    assert rules.is_excluded("web/node_modules", True)
+    assert not rules.is_excluded("web/node_modules", False)  # a file with that name
+
+def test_anchored_files_only_match_at_the_root():
+    rules = IgnoreRules("/dist")
+    assert rules.is_excluded("dist", True)
+    assert rules.is_excluded("dist", False)
+    assert not rules.is_excluded("a/dist", True)
+
+def test_anchored_dirs_only_match_at_the_root():
+    rules = IgnoreRules("/build/")
+    assert rules.is_excluded("build", True)
+    assert not rules.is_excluded("a/build", True)
+    assert not rules.is_excluded("build", False)
+
+def test_patterns_with_a_slash_are_anchored():
+    rules = IgnoreRules("docs/tmp/")
+    assert rules.is_excluded("docs/tmp", True)
+    assert not rules.is_excluded("x/docs/tmp", True)
+
+def test_negation_re_includes():
+    rules = IgnoreRules("*.log, !keep.log")
+    assert rules.is_excluded("a.log", False)
+    assert not rules.is_excluded("sub/keep.log", False)
@@ -0,0 +1,59 @@
+import time
+import pstats
+import multiprocessing
+import pytest
+import SearchHelper
+from SearchHelper import iter_search, SearchSummary
+
+def _stuck_pdf(file_path, *args, **kwargs):
+    time.sleep(60)  # a page the PDF library never gets out of
+    return []
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="the workers must inherit the patched PDF handler")
+def test_pdf_stuck_in_a_page_is_abandoned(tmp_path, monkeypatch):
+    monkeypatch.setattr(SearchHelper, "search_pdf", _stuck_pdf)
+    monkeypatch.setattr(SearchHelper, "PDF_TIMEOUT_GRACE", 0.2)
+    (tmp_path / "a.txt").write_text("a needle\n")
+    (tmp_path / "b.pdf").write_bytes(b"%PDF-1.4 not really\n")
+    (tmp_path / "c.txt").write_text("c needle\n")
+
+    start = time.monotonic()
+    items = list(iter_search(str(tmp_path), "needle", workers=2, pdf_timeout=0.3))
+    assert time.monotonic() - start < 20
+
+    summary = items[-1]
+    assert isinstance(summary, SearchSummary)
+    assert sorted(path for path, _ in items[:-1]) == [str(tmp_path / "a.txt"), str(tmp_path / "c.txt")]
+    assert summary.stats.errors == {"timeout": 1}
+
+def test_workers_write_their_profile_once_at_shutdown(tmp_path):
+    folder = tmp_path / "files"
+    folder.mkdir()
+    for i in range(20):
+        (folder / f"{i}.txt").write_text(f"{i} needle\n")
+    profile = tmp_path / "search.prof"
+
+    items = list(iter_search(str(folder), "needle", workers=2, profile=str(profile)))
+
+    assert len(items) == 21
+    worker_stats = list(tmp_path.glob("search.prof.worker-*"))
+    assert 1 <= len(worker_stats) <= 2
+    calls = sum(pstats.Stats(str(path)).total_calls for path in worker_stats)
+    assert calls > 0
+
+def _crashing_text_search(file_path, *args, **kwargs):
+    raise MemoryError("worker ran out of memory")
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="the workers must inherit the patched text handler")
+def test_worker_failure_is_an_error_result_not_a_print(tmp_path, monkeypatch, capfd):
+    monkeypatch.setattr(SearchHelper, "search_text_file", _crashing_text_search)
+    (tmp_path / "a.txt").write_text("a needle\n")
+    (tmp_path / "b.txt").write_text("b needle\n")
+
+    summary = list(iter_search(str(tmp_path), "needle", workers=2))[-1]
+
+    assert summary.stats.errors == {"worker": 2}
+    assert summary.stats.error_samples[0][2] == "MemoryError: worker ran out of memory"
+    assert capfd.readouterr().err == ""
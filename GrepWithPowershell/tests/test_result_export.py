@@ -0,0 +1,64 @@
+import io
+import csv
+import json
+import pytest
+from ContentHashes import DuplicateResult
+from ResultExport import export_results, export_format_of
+from ResultStore import ResultStore
+from SearchHelper import search_text_file, SearchSummary
+
+def _results(tmp_path):
+    log = tmp_path / "a.log"
+    log.write_text("one\nneedle 1\nthree\nneedle <2>\nfive\n")
+    return [(str(log), search_text_file(str(log), "needle", False, lines_before=1, lines_after=1)),
+            DuplicateResult("b.xlsx", [("Sheet1!B4", "x needle", [("needle", 2, 8)])], ["c.xlsx"])]
+
+def _export(results, export_format):
+    out = io.StringIO(newline="")
+    assert export_results(results, out, export_format) == (2, 3)
+    return out.getvalue()
+
+def test_text_merges_context_blocks(tmp_path):
+    text = _export(_results(tmp_path), "txt")
+    assert text == (f"📄 {tmp_path / 'a.log'}\n   Lines 1-5:\none\nneedle 1\nthree\nneedle <2>\nfive\n\n"
+                    "📄 b.xlsx\n   Identical copies: c.xlsx\n   Cell Sheet1!B4:\nx needle\n\n")
+
+def test_jsonl_records(tmp_path):
+    records = [json.loads(line) for line in _export(_results(tmp_path), "jsonl").splitlines()]
+    assert [record["type"] for record in records] == ["match", "match", "match", "copies", "summary"]
+    assert records[1] == {"type": "match", "path": str(tmp_path / "a.log"), "location": 4,
+                          "context": "three\nneedle <2>\nfive", "hits": [{"pattern": "needle", "start": 6, "end": 12}]}
+    assert records[3]["copies"] == ["c.xlsx"]
+    assert records[4] == {"type": "summary", "files_with_matches": 2, "matches": 3}
+
+def test_csv_has_one_row_per_hit(tmp_path):
+    rows = list(csv.reader(io.StringIO(_export(_results(tmp_path), "csv"), newline="")))
+    assert rows[0] == ["path", "line_or_page", "column", "match", "context"]
+    assert rows[1:] == [[str(tmp_path / "a.log"), "2", "1", "needle", "one\nneedle 1\nthree"],
+                        [str(tmp_path / "a.log"), "4", "1", "needle", "three\nneedle <2>\nfive"],
+                        ["b.xlsx", "Sheet1!B4", "3", "needle", "x needle"]]
+
+def test_html_escapes_and_highlights(tmp_path):
+    report = _export(_results(tmp_path), "html")
+    assert "<pre>one\n<mark>needle</mark> 1\nthree\n<mark>needle</mark> &lt;2&gt;\nfive</pre>" in report
+    assert '<div class="copies">Identical copies: c.xlsx</div>' in report
+    assert report.endswith("<footer>3 matches in 2 files</footer>\n</body>\n</html>\n")
+
+def test_store_exports_like_the_results_it_holds(tmp_path):
+    results = _results(tmp_path)
+    with ResultStore() as store:
+        for item in results:
+            store.add(*item, getattr(item, "copies", None))
+        for export_format in ("txt", "jsonl", "csv", "html"):
+            assert _export(store, export_format) == _export(results, export_format)
+
+def test_export_to_a_file_skips_the_summary(tmp_path):
+    output = tmp_path / "hits.csv"
+    assert export_results([*_results(tmp_path), SearchSummary()], str(output)) == (2, 3)
+    assert output.read_bytes().startswith(b"\xef\xbb\xbfpath,")
+
+def test_export_format_of():
+    assert export_format_of("report.HTM") == "html"
+    assert export_format_of("hits.ndjson") == "jsonl"
+    with pytest.raises(ValueError):
+        export_format_of("hits.xml")
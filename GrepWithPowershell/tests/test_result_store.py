@@ -0,0 +1,78 @@
+import ResultStore as result_store
+from ResultStore import ResultStore
+from SearchMatch import Match, MatchFile, materialize
+
+def _lazy_matches(path, lines):
+    match_file = MatchFile(str(path), 0, 0)
+    return [Match(match_file, line, 0, [("x", 0, 1)]) for line in lines]
+
+def test_match_position_by_line_number(tmp_path):
+    with ResultStore() as store:
+        file_id = store.add(str(tmp_path / "a.log"), _lazy_matches(tmp_path / "a.log", [3, 10, 10, 42]))
+
+        assert store.match_position(file_id, 1) == 0
+        assert store.match_position(file_id, 10) == 1
+        assert store.match_position(file_id, 11) == 3
+        assert store.match_position(file_id, 100) == 4
+
+def test_match_position_with_cell_locations(tmp_path):
+    with ResultStore() as store:
+        text_id = store.add(str(tmp_path / "a.log"), _lazy_matches(tmp_path / "a.log", [5, 20]))
+        cells_id = store.add(str(tmp_path / "b.xlsx"), [("Sheet1!A1", "x", [("x", 0, 1)]),
+                                                        ("Sheet1!B7", "x", [("x", 0, 1)])])
+        pages_id = store.add(str(tmp_path / "c.pdf"), [(2, "x", [("x", 0, 1)]), (9, "x", [("x", 0, 1)])])
+
+        assert store.match_position(cells_id, 1) == 0
+        assert store.match_position(cells_id, 1000) == 0
+        assert store.match_position(text_id, 6) == 1
+        assert store.match_position(pages_id, 3) == 1
+        assert [match[0] for match in store.file_matches(cells_id)] == ["Sheet1!A1", "Sheet1!B7"]
+
+def test_match_position_skips_cells_in_a_mixed_entry(tmp_path):
+    with ResultStore() as store:
+        file_id = store.add(str(tmp_path / "a.txt"), [(1, "x", []), ("Sheet1!A1", "x", []), (5, "x", [])])
+
+        assert store.match_position(file_id, 3) == 2
+
+def test_remove_returns_the_matches_it_dropped(tmp_path):
+    with ResultStore() as store:
+        store.add("a.zip!/x.txt", [(1, "x", []), (2, "x", [])])
+        store.add("a.zip!/y.txt", [(3, "x", [])])
+        store.add("b.txt", [(4, "x", [])])
+
+        assert store.remove("a.zip") == 3
+        assert store.remove("a.zip") == 0
+        assert store.count() == 1
+
+def test_page_and_counts_with_filters(tmp_path):
+    with ResultStore() as store:
+        store.add("logs/a.log", [(1, "x", []), (2, "x", [])])
+        store.add("docs/b.TXT", [(3, "x", [])])
+        store.add("logs.zip!/c.log", [(4, "x", [])])
+
+        assert store.count() == 4
+        assert store.count(extensions=".log") == 3
+        assert store.file_count(extensions="txt,log", contains="LOGS") == 2
+        assert [path for _, path, _, _ in store.files(extensions=".log")] == ["logs/a.log", "logs.zip!/c.log"]
+        assert [(path, match[0]) for path, match in store.page(1, 2)] == [("logs/a.log", 2), ("docs/b.TXT", 3)]
+
+def test_iter_results_reads_an_entry_page_by_page(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_store, "MATCH_PAGE", 2)
+    path = tmp_path / "a.log"
+    path.write_text("".join(f"x {line}\n" for line in range(1, 6)))
+    offsets = [0, 4, 8, 12, 16]
+    match_file = MatchFile(str(path), 0, 0)
+    with ResultStore() as store:
+        store.add(str(path), [Match(match_file, line, offset, [("x", 0, 1)])
+                              for line, offset in zip(range(1, 6), offsets)])
+        reads = []
+        read_page = store._entry_matches
+        monkeypatch.setattr(store, "_entry_matches", lambda *args: reads.append(args[1]) or read_page(*args))
+
+        [(entry_path, matches)] = store.iter_results()
+        assert entry_path == str(path) and len(matches) == 5
+        records = materialize(matches)
+        assert next(records) == (1, "x 1", [("x", 0, 1)])
+        assert reads == [0]
+        assert [record[1] for record in records] == ["x 2", "x 3", "x 4", "x 5"]
+        assert reads == [0, 2, 4]
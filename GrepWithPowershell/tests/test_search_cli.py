@@ -0,0 +1,25 @@
+from SearchCli import main
+
+def test_context_groups_of_different_files_are_separated(tmp_path, capsys, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+    folder = tmp_path / "docs"
+    folder.mkdir()
+    (folder / "a.txt").write_text("one\nneedle a\ntwo\n")
+    (folder / "b.txt").write_text("three\nneedle b\nfour\n")
+    assert main(["-C", "1", "-j", "1", "needle", str(folder)]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    # Like grep: one '--' between the two groups, none before the first
+    assert len(lines) == 7
+    assert lines[3] == "--"
+    first, second = sorted([str(folder / "a.txt"), str(folder / "b.txt")], key=lines[0].startswith, reverse=True)
+    assert all(line.startswith(first) for line in lines[:3])
+    assert all(line.startswith(second) for line in lines[4:])
+
+def test_no_separator_without_context(tmp_path, capsys, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+    folder = tmp_path / "docs"
+    folder.mkdir()
+    (folder / "a.txt").write_text("needle a\n")
+    (folder / "b.txt").write_text("needle b\n")
+    assert main(["-j", "1", "needle", str(folder)]) == 0
+    assert "--" not in capsys.readouterr().out.splitlines()
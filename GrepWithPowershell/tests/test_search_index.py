@@ -0,0 +1,27 @@
+import SearchHelper
+from SearchIndex import SearchIndex, text_trigrams, iter_text_trigrams
+
+def test_trigrams_straddling_two_pieces_are_kept():
+    assert iter_text_trigrams(["hello wo", "rld"]) == text_trigrams("hello world")
+    assert iter_text_trigrams(["a", "b", "c", "d"]) == text_trigrams("abcd")
+
+def test_plain_files_are_indexed_block_by_block(tmp_path, monkeypatch):
+    monkeypatch.setattr(SearchHelper, "TEXT_BLOCK_CHARS", 4)
+    folder = tmp_path / "files"
+    folder.mkdir()
+    (folder / "a.txt").write_text("some needle in a log\n")
+    (folder / "b.txt").write_text("nothing here\n")
+    index = SearchIndex(str(folder), str(tmp_path / "index.sqlite"))
+
+    assert index.update() == 2
+    assert list(index.candidates("needle")) == [str(folder / "a.txt")]
+
+def test_binary_files_are_not_candidates(tmp_path):
+    folder = tmp_path / "files"
+    folder.mkdir()
+    (folder / "a.bin").write_bytes(b"\0\1needle\0")
+    (folder / "b.txt").write_text("a needle\n")
+    index = SearchIndex(str(folder), str(tmp_path / "index.sqlite"))
+
+    index.update()
+    assert list(index.candidates("needle")) == [str(folder / "b.txt")]
@@ -0,0 +1,42 @@
+import os
+import pickle
+from ResultStore import ResultStore
+from SearchHelper import search_text_file
+from SearchMatch import STALE_CONTEXT, context_blocks, materialize
+
+def _rewrite(path, text):
+    """Change the file and make sure its modification time moves, even on coarse clocks."""
+    mtime = os.stat(path).st_mtime_ns
+    path.write_text(text)
+    os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+
+def test_lazy_match_reads_its_context_from_the_file(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("one\ntwo needle\nthree\nfour\n")
+    [match] = search_text_file(str(path), "needle", False, lines_before=1, lines_after=1)
+    assert match.lazy
+    assert match[0] == 2
+    assert match.context == "one\ntwo needle\nthree"
+    assert match.hits == [("needle", 8, 14)]
+
+def test_lazy_context_of_a_changed_file_is_stale(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("one\ntwo needle\nthree\n")
+    matches = search_text_file(str(path), "needle", False, lines_before=1, lines_after=1)
+    _rewrite(path, "something else entirely\n")
+    assert list(materialize(matches)) == [(2, STALE_CONTEXT, [])]
+    [block] = context_blocks(matches)
+    assert (block.location, block.text, block.hits) == (2, STALE_CONTEXT, [])
+
+def test_stamp_survives_pickling_and_the_result_store(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("needle\n")
+    matches = search_text_file(str(path), "needle", False, lines_before=0, lines_after=0)
+    with ResultStore(str(tmp_path / "results.sqlite")) as store:
+        store.add(str(path), matches)
+        [(_, stored)] = store.page()
+    for match in (pickle.loads(pickle.dumps(matches[0])), stored):
+        assert match.context == "needle"
+    _rewrite(path, "needle\n")
+    for match in (pickle.loads(pickle.dumps(matches[0])), stored):
+        assert match.context == STALE_CONTEXT
@@ -0,0 +1,54 @@
+import pytest
+from SearchHelper import search_text_file
+from SearchQuery import SearchQuery
+
+def test_regex_backreference():
+    query = SearchQuery([r"(a)\1"], regex=True)
+    assert query.search_line("xaay") == [(r"(a)\1", 1, 3)]
+
+def test_regex_backreferences_in_several_patterns():
+    query = SearchQuery([r"(\w)\1", r"(x)(y)\2\1"], regex=True)
+    assert query.search_line("abb xyyx") == [(r"(\w)\1", 1, 3), (r"(x)(y)\2\1", 4, 8), (r"(\w)\1", 5, 7)]
+
+def test_regex_whole_word_backreference():
+    query = SearchQuery([r"(o)\1"], regex=True, whole_word=True)
+    assert query.search_line("foo oo") == [(r"(o)\1", 4, 6)]
+
+def test_multi_term_hits_in_line_order():
+    query = SearchQuery(["error", "warn", "err"])
+    assert query.search_line("WARN: Error") == [("warn", 0, 4), ("err", 6, 9), ("error", 6, 11)]
+
+def test_whole_word_literal():
+    query = SearchQuery("log", whole_word=True)
+    assert query.search_line("log logs catalog log_x (log)") == [("log", 0, 3), ("log", 24, 27)]
+
+def test_case_insensitive_spans_after_characters_that_lowercase_longer():
+    # 'İ'.lower() is two characters: spans are still offsets into the line itself
+    line = "İİ İstanbul needle"
+    assert SearchQuery("NEEDLE").search_line(line) == [("NEEDLE", 12, 18)]
+    assert SearchQuery("needle", whole_word=True).search_line(line) == [("needle", 12, 18)]
+    assert SearchQuery(["needle", "İstanbul"]).search_line(line) == [("İstanbul", 3, 11), ("needle", 12, 18)]
+    assert SearchQuery("nedle", max_errors=1).search_line(line) == [("nedle", 12, 18, 1)]
+
+def test_fuzzy_hits_carry_their_distance():
+    query = SearchQuery("receive", max_errors=2)
+    # 'recv' is 3 edits away; case-insensitive by default
+    assert query.search_line("we recieve, recv and RECEIVE; receiver") == [
+        ("receive", 3, 10, 2), ("receive", 21, 28, 0), ("receive", 30, 37, 0)]
+
+def test_fuzzy_multi_term():
+    query = SearchQuery(["needle", "hay"], max_errors=1)
+    assert query.search_line("a neddle in the hey") == [("needle", 2, 8, 1), ("hay", 16, 19, 1)]
+
+def test_fuzzy_literals_are_pieces_a_hit_must_contain():
+    assert SearchQuery("receive", max_errors=1).literals == ["rece", "ive"]
+
+def test_fuzzy_pattern_too_short():
+    with pytest.raises(ValueError):
+        SearchQuery("ab", max_errors=2)
+
+def test_fuzzy_search_in_a_file(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("first line\nplease recieve this\nlast line\n")
+    [match] = search_text_file(str(path), SearchQuery("receive", max_errors=2), False, lines_before=0, lines_after=0)
+    assert (match[0], match[1], match[2]) == (2, "please recieve this", [("receive", 7, 14, 2)])
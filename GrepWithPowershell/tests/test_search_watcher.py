@@ -0,0 +1,53 @@
+import os
+import threading
+from SearchHelper import SearchSummary
+from SearchWatcher import SearchWatcher
+
+def _next_update(updates, timeout=10):
+    """The next WatchUpdate, failing instead of hanging if none comes."""
+    received = []
+    thread = threading.Thread(target=lambda: received.append(next(updates)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert received, "no update"
+    return received[0]
+
+def _watch(folder):
+    watcher = SearchWatcher(str(folder), "ERROR", extensions=".log", lines_before=0, lines_after=0,
+                            workers=1, backend="poll", interval=0.05)
+    updates = watcher.run()
+    for item in updates:
+        if isinstance(item, SearchSummary):
+            return updates
+    raise AssertionError("no summary")
+
+def _new_lines(update):
+    return [(path, match[0], match[1]) for path, matches in update.new_entries for match in matches]
+
+def test_rotated_log_reports_a_new_match_on_an_old_line_number(tmp_path):
+    log = tmp_path / "app.log"
+    log.write_text("start\nERROR disk full\n")
+    updates = _watch(tmp_path)
+
+    rotated = tmp_path / "app.log.tmp"
+    rotated.write_text("restart\nERROR network down\n")
+    os.replace(rotated, log)
+    update = _next_update(updates)
+    assert update.reason == "truncated"
+    assert _new_lines(update) == [(str(log), 2, "ERROR network down")]
+    updates.close()
+
+def test_appended_lines_only_report_the_new_matches(tmp_path):
+    log = tmp_path / "app.log"
+    log.write_text("ERROR one\n")
+    updates = _watch(tmp_path)
+
+    with open(log, "a") as f:
+        f.write("ok\nERROR two\n")
+    update = _next_update(updates)
+    assert update.reason == "appended"
+    assert _new_lines(update) == [(str(log), 3, "ERROR two")]
+    # The earlier match is rebound to the grown file: its context is not stale
+    [(_, matches)] = update.entries
+    assert [match[1] for match in matches] == ["ERROR one", "ERROR two"]
+    updates.close()
@@ -0,0 +1,96 @@
+import TextCache
+from TextCache import TextCache as Cache
+
+def _files(tmp_path, count):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"{i}.pdf"
+        path.write_bytes(b"%PDF")
+        paths.append(str(path))
+    return paths
+
+def _last_used(cache, path):
+    return cache._connect().execute("SELECT last_used FROM files WHERE path = ?", (path,)).fetchone()[0]
+
+def test_recent_hit_does_not_rewrite_last_used(tmp_path):
+    cache = Cache(str(tmp_path / "cache.sqlite"))
+    path, = _files(tmp_path, 1)
+    cache.put(path, "pdf", ["page one"])
+    used = _last_used(cache, path)
+
+    assert cache.get(path, "pdf") == ["page one"]
+    assert _last_used(cache, path) == used
+
+def test_old_hit_refreshes_last_used(tmp_path, monkeypatch):
+    cache = Cache(str(tmp_path / "cache.sqlite"))
+    path, = _files(tmp_path, 1)
+    cache.put(path, "pdf", ["page one"])
+    used = _last_used(cache, path)
+    monkeypatch.setattr(TextCache, "LRU_RESOLUTION", 0.0)
+
+    assert cache.get(path, "pdf") == ["page one"]
+    assert _last_used(cache, path) > used
+
+def test_puts_stay_under_max_bytes_and_keep_the_newest(tmp_path):
+    units = ["x%d " % i * 200 for i in range(50)]
+    probe = Cache(str(tmp_path / "probe.sqlite"))
+    probe.put(_files(tmp_path, 1)[0], "pdf", units)
+    entry_bytes = probe._connect().execute("SELECT nbytes FROM files").fetchone()[0]
+
+    cache = Cache(str(tmp_path / "cache.sqlite"), max_bytes=entry_bytes * 10)
+    paths = _files(tmp_path, 100)
+    for path in paths:
+        cache.put(path, "pdf", units)
+        total = cache._connect().execute("SELECT SUM(nbytes) FROM files").fetchone()[0]
+        assert total <= cache.max_bytes
+        assert cache._total == total
+
+    assert cache.has(paths[-1], "pdf")
+    assert not cache.has(paths[0], "pdf")
+
+def test_units_are_stored_and_read_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(TextCache, "CHUNK_CHARS", 100)
+    cache = Cache(str(tmp_path / "cache.sqlite"))
+    path, = _files(tmp_path, 1)
+    units = [[i, f"page {i} " * 5] for i in range(100)]
+    cache.put(path, "pdf", iter(units))
+
+    chunks = cache._connect().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+    assert chunks > 10
+    assert list(cache.iter_units(path, "pdf")) == units
+
+def test_miss_streams_into_the_cache_and_a_partial_read_stores_nothing(tmp_path, monkeypatch):
+    import SearchHelper
+    monkeypatch.setattr(TextCache, "CHUNK_CHARS", 100)
+    cache = Cache(str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(SearchHelper, "get_text_cache", lambda: cache)
+    path, = _files(tmp_path, 1)
+    reader = lambda file_path: (f"paragraph {i}" for i in range(1000))
+
+    units = SearchHelper._iter_cached(path, "docx", reader)
+    assert next(units) == "paragraph 0"
+    units.close()
+    assert cache.get(path, "docx") is None
+
+    assert len(list(SearchHelper._iter_cached(path, "docx", reader))) == 1000
+    assert cache.get(path, "docx") == [f"paragraph {i}" for i in range(1000)]
+
+def test_units_bigger_than_the_cache_are_not_stored(tmp_path, monkeypatch):
+    monkeypatch.setattr(TextCache, "CHUNK_CHARS", 100)
+    cache = Cache(str(tmp_path / "cache.sqlite"), max_bytes=200)
+    path, = _files(tmp_path, 1)
+    cache.put(path, "pdf", (str(i) * 50 for i in range(1000)))
+
+    assert cache.get(path, "pdf") is None
+    assert cache._connect().execute("SELECT COUNT(*) FROM chunks").fetchone()[0] == 0
+
+def test_file_changed_while_read_is_not_stored(tmp_path):
+    cache = Cache(str(tmp_path / "cache.sqlite"))
+    path, = _files(tmp_path, 1)
+    writer = cache.writer(path, "pdf")
+    writer.add("old text")
+    with open(path, "ab") as f:
+        f.write(b" more")
+    writer.commit()
+
+    assert cache.get(path, "pdf") is None